@@ -0,0 +1,167 @@
+"""Caché direccionada por contenido para features extraídas y predicciones.
+
+La clave es un hash del audio (bytes del WAV) más la versión del extractor
+y del modelo, de modo que una misma grabación nunca se analiza dos veces:
+los reruns de Streamlit (cambio de tema, de idioma, etc.) reutilizan el
+resultado previo.
+
+Dos niveles:
+  1. LRU en proceso (``OrderedDict``), siempre activo.
+  2. Disco (opcional): un ``.pkl`` por clave en ``PARKINSON_CACHE_DIR``,
+     con expulsión por tamaño total (los menos usados primero).
+
+Variables de entorno:
+    PARKINSON_CACHE_SIZE    nº de entradas en memoria (por defecto 128, 0 = desactiva)
+    PARKINSON_CACHE_DIR     carpeta del nivel en disco (sin definir = sin disco)
+    PARKINSON_CACHE_MAX_MB  tamaño máximo del nivel en disco (por defecto 256)
+"""
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+
+
+def audio_key(data: bytes, *parts: str) -> str:
+    """Clave estable: sha256 del audio + partes de versión (extractor, modelo...)."""
+    h = hashlib.sha256(data)
+    for p in parts:
+        h.update(b"\0" + str(p).encode("utf-8"))
+    return h.hexdigest()
+
+
+class AnalysisCache:
+    """Caché LRU en memoria con nivel opcional en disco.
+
+    Los valores se copian al guardar y al leer para que el llamador pueda
+    modificar el resultado sin alterar la entrada cacheada.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 128,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.max_items = max_items
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._mem: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(f.stat().st_size for f in self._disk_files())
+
+    @classmethod
+    def from_env(cls) -> "AnalysisCache":
+        return cls(
+            max_items=int(os.getenv("PARKINSON_CACHE_SIZE", "128")),
+            disk_dir=os.getenv("PARKINSON_CACHE_DIR") or None,
+            disk_max_bytes=int(float(os.getenv("PARKINSON_CACHE_MAX_MB", "256")) * 1024 * 1024),
+        )
+
+    # -- API pública -------------------------------------------------------
+    def get(self, key: str) -> Optional[Any]:
+        """Devuelve una copia del valor o ``None`` si no está en ningún nivel."""
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                return copy.deepcopy(self._mem[key])
+        value = self._disk_get(key)
+        if value is not None:
+            self._mem_set(key, value)
+            return copy.deepcopy(value)
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        value = copy.deepcopy(value)
+        self._mem_set(key, value)
+        self._disk_set(key, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._mem.clear()
+        for f in self._disk_files():
+            try:
+                f.unlink()
+            except OSError:
+                pass
+        self._disk_bytes = 0
+
+    # -- Nivel en memoria --------------------------------------------------
+    def _mem_set(self, key: str, value: Any) -> None:
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._mem[key] = value
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_items:
+                self._mem.popitem(last=False)
+
+    # -- Nivel en disco ----------------------------------------------------
+    def _disk_files(self):
+        if self.disk_dir is None:
+            return []
+        return list(self.disk_dir.glob("*.pkl"))
+
+    def _disk_get(self, key: str) -> Optional[Any]:
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / f"{key}.pkl"
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)  # marca de uso reciente para la expulsión LRU
+            return value
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    def _disk_set(self, key: str, value: Any) -> None:
+        if self.disk_dir is None:
+            return
+        path = self.disk_dir / f"{key}.pkl"
+        try:
+            # Escritura atómica: otro proceso nunca lee un pickle a medias
+            fd, tmp = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+            self._disk_bytes += path.stat().st_size
+        except OSError:
+            return
+        if self._disk_bytes > self.disk_max_bytes:
+            self._evict_disk()
+
+    def _evict_disk(self) -> None:
+        """Borra los archivos menos usados hasta quedar bajo el límite."""
+        entries = []
+        for f in self._disk_files():
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        for _, size, f in entries:
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                f.unlink()
+                total -= size
+            except OSError:
+                pass
+        self._disk_bytes = total
+
+
+cache = AnalysisCache.from_env()
+
+
+__all__ = ["AnalysisCache", "audio_key", "cache"]
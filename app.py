@@ -2,23 +2,22 @@ import streamlit as st
 import pandas as pd
 import requests
 import io
+import hashlib
 import wave
 from streamlit_mic_recorder import mic_recorder
 from fpdf import FPDF  # still needed for type usage earlier
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pdf_report import build_report_pdf
-from gemini_client import (
-    get_feature_interpretations,
-    get_short_recommendation,
-    get_long_recommendation,
-    GeminiError,
-)
+from gemini_client import stream_analysis_texts
 from gemini_prompts import parse_feature_interpretations_response
-from deep_translator import GoogleTranslator
-import logging
 import os
+from catalogs import static_texts
+from translation import translator
 from styles.theme import inject_base_css
 from ui_components.wizard import render_wizard
+from ui_components.metrics_sidebar import render_metrics_sidebar
+from metrics import child_span, metrics, span
 from funcion import predict_parkinson, MODEL_FEATURES, RANGE
 
 # Descripciones simples de cada feature usadas para prompt IA
@@ -102,21 +101,46 @@ if forced in ("light","dark"):
     """, unsafe_allow_html=True)
 
 
-@st.cache_data(show_spinner=False)
 def traducir(texto: str, dest: str) -> str:
-    """Traduce texto al idioma destino usando deep-translator.
+    """Traduce texto al idioma destino (ver ``translation.Translator``).
 
     Si el destino es español o el texto está vacío, retorna sin cambios.
     Ante error se devuelve el texto original para no romper el flujo UI.
+    Los textos fijos ya están precargados en lote, así que normalmente es
+    una consulta a memoria.
+    """
+    # Dentro de un análisis cuelga de su span; fuera sólo suma al histograma
+    with child_span("traducir", dest=dest):
+        return translator.translate(texto, dest)
+
+
+@st.cache_resource
+def _pdf_executor() -> ThreadPoolExecutor:
+    """Pool compartido para generar los PDF fuera del script de Streamlit."""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf")
+
+
+def _pdf_job_key(*campos) -> str:
+    """Huella de todo lo que entra en el informe PDF."""
+    return hashlib.sha256(repr(campos).encode("utf-8")).hexdigest()
+
+
+def traducir_fmt(plantilla: str, dest: str, **campos) -> str:
+    """Traduce una plantilla fija (``{campo}``) y la rellena después.
+
+    Así el texto sale del catálogo precompilado aunque lleve datos del
+    paciente. Si la traducción en línea estropea los campos, se traduce el
+    texto ya rellenado.
     """
-    if dest == "es" or not texto:
-        return texto or ""
-    texto_str = str(texto)
     try:
-        return GoogleTranslator(source="auto", target=dest).translate(texto_str)
-    except Exception:
-        logging.exception("Error traduciendo texto")
-        return texto_str
+        return traducir(plantilla, dest).format(**campos)
+    except (KeyError, IndexError, ValueError):
+        return traducir(plantilla.format(**campos), dest)
+
+
+# Textos fijos de la app y del PDF (ver catalogs.py): normalmente ya están en
+# locales/<idioma>.json; lo que falte se traduce en una sola pasada por lotes.
+translator.prefetch(static_texts(), st.session_state["idioma"])
 
 
 
@@ -201,7 +225,7 @@ if not audio_state:
             with wave.open(wav_buffer, "rb") as w:
                 dur = w.getnframes() / w.getframerate()
         if dur < 4.5:
-            st.error(traducir(f"El audio es muy corto ({dur:.1f} s). Por favor, graba al menos 5 segundos.", idioma))
+            st.error(traducir_fmt("El audio es muy corto ({dur} s). Por favor, graba al menos 5 segundos.", idioma, dur=f"{dur:.1f}"))
             st.stop()
         else:
             audio_ok = True
@@ -224,15 +248,15 @@ else:
     audio_ok = True
     # Botón Re-grabar
     if st.button(traducir("🔄 Re-grabar", idioma), key="re_record"):
-        for k in ["audio","analyzed","proba","rows","final_interps","diag_label","recomendacion_extensa","sano_p","park_p","ready_for_pdf","pdf_bytes","ml_report_bytes"]:
+        for k in ["audio","analyzed","proba","rows","final_interps","diag_label","recomendacion_extensa","sano_p","park_p","ready_for_pdf","pdf_future","ml_report_bytes"]:
             st.session_state.pop(k, None)
         st.rerun()
 
-# ── 2 · Reproducir y salvar ────────────────────────────────────
+# ── 2 · Reproducir ─────────────────────────────────────────────
+# El audio vive sólo en el buffer de la sesión: no se escribe ningún WAV
+# compartido, así varias sesiones concurrentes no se pisan entre sí.
 if audio_ok:
     st.audio(st.session_state.audio, format="audio/wav")
-    with open("recording.wav", "wb") as f:
-        f.write(st.session_state.audio)
 
 # ── 3 · ANALIZAR ───────────────────────────────────────────────
 analyze_col = st.column_config if False else None  # placeholder para mantener formato
@@ -244,8 +268,29 @@ if st.button(analyze_label, key="analyze") and audio_ok:
 if st.session_state.get("analyzed") and audio_ok:
     spinner_msg = traducir("Extrayendo variables…", idioma)
     with st.spinner(spinner_msg):
-        raw, clip, scl, y, proba = predict_parkinson("recording.wav")
+        raw, clip, scl, y, proba = predict_parkinson(st.session_state.audio)
     st.session_state["proba"] = proba
+    sano_p, park_p = proba[1], proba[0]
+    paciente = st.session_state.get("paciente", "Paciente")
+
+    detalles = []
+    for feat in MODEL_FEATURES:
+        desc = FEATURE_DESCRIPTIONS.get(feat, "")
+        clip_val = clip[feat]
+        detalles.append(f"{feat}: {desc} | Valor actual (clip): {clip_val:.3f}")
+    detalle = "\n".join(detalles)
+
+    if sano_p >= 0.7:
+        estado = "saludable"
+    elif park_p >= 0.7:
+        estado = "riesgo"
+    else:
+        estado = "intermedio"
+    cards = {
+        "saludable": {"icon": "✅", "title": "¡{paciente}, tu estado es Saludable!", "text": "Sano {sano} · Parkinson {park}"},
+        "intermedio": {"icon": "⚠️", "title": "{paciente}, estado Intermedio", "text": "Sano {sano} · Parkinson {park}"},
+        "riesgo": {"icon": "❌", "title": "{paciente}, Alto Riesgo", "text": "Sano {sano} · Parkinson {park}"}
+    }
 
     tab_vars, tab_interps, tab_diag, tab_descargas = st.tabs([
         traducir("Variables", idioma),
@@ -275,7 +320,7 @@ if st.session_state.get("analyzed") and audio_ok:
         df_vars = pd.DataFrame(rows, columns=cols_hdr)
         st.dataframe(df_vars, hide_index=True, use_container_width=True)
 
-    # 2) Interpretaciones
+    # 2) Interpretaciones (la tabla se rellena a medida que llega la IA)
     with tab_interps:
         title_ia = traducir("🔍 Interpretaciones de cada variable (IA)", idioma)
         tip_ia   = traducir(
@@ -289,44 +334,11 @@ if st.session_state.get("analyzed") and audio_ok:
             f'</span>',
             unsafe_allow_html=True
         )
-        detalles = []
-        for feat in MODEL_FEATURES:
-            desc = FEATURE_DESCRIPTIONS.get(feat, "")
-            clip_val = clip[feat]
-            detalles.append(f"{feat}: {desc} | Valor actual (clip): {clip_val:.3f}")
-        detalle = "\n".join(detalles)
-        try:
-            text_ia = get_feature_interpretations(detalle)
-        except GeminiError as e:
-            text_ia = f"Error IA: {e}"
-        if idioma != "es":
-            text_ia = traducir(text_ia, idioma)
-        parsed = parse_feature_interpretations_response(text_ia)
-        final_interps = []
-        for feat in MODEL_FEATURES:
-            desc = parsed.get(feat)
-            if not desc:
-                desc = traducir("Este indicador de voz es relevante. Recuerda mantener tu voz clara y relajada.", idioma)
-            final_interps.append((feat, desc))
-        st.session_state["final_interps"] = final_interps
-        df_ia = pd.DataFrame(final_interps, columns=[traducir("Variable", idioma), traducir("Interpretación", idioma)])
-        st.dataframe(df_ia, use_container_width=True)
-
-    # 3) Diagnóstico
+        interp_cols = [traducir("Variable", idioma), traducir("Interpretación", idioma)]
+        interp_slot = st.empty()
+
+    # 3) Diagnóstico (la recomendación breve también llega en streaming)
     with tab_diag:
-        sano_p, park_p = proba[1], proba[0]
-        paciente = st.session_state.get("paciente", "Paciente")
-        if sano_p >= 0.7:
-            estado = "saludable"
-        elif park_p >= 0.7:
-            estado = "riesgo"
-        else:
-            estado = "intermedio"
-        cards = {
-            "saludable": {"icon": "✅", "title": f"¡{paciente}, tu estado es Saludable!", "text":  f"Sano {sano_p:.1%} · Parkinson {park_p:.1%}"},
-            "intermedio": {"icon": "⚠️", "title": f"{paciente}, estado Intermedio", "text":  f"Sano {sano_p:.1%} · Parkinson {park_p:.1%}"},
-            "riesgo": {"icon": "❌", "title": f"{paciente}, Alto Riesgo", "text":  f"Sano {sano_p:.1%} · Parkinson {park_p:.1%}"}
-        }
         bg_colors = {"saludable": "#2ecc71","intermedio": "#f1c40f","riesgo": "#e74c3c"}
         inactive_bg, active_text, inactive_text = "#f0f0f0","#ffffff","#333333"
         st.subheader(traducir("🩺 Resultado y Recomendaciones", idioma))
@@ -334,8 +346,8 @@ if st.session_state.get("analyzed") and audio_ok:
         for key in ("saludable","intermedio","riesgo"):
             card = cards[key]
             is_active = (key == estado)
-            title = traducir(card["title"], idioma)
-            text  = traducir(card["text"],  idioma)
+            title = traducir_fmt(card["title"], idioma, paciente=paciente)
+            text  = traducir_fmt(card["text"], idioma, sano=f"{sano_p:.1%}", park=f"{park_p:.1%}")
             cls = "state-card active" if is_active else "state-card"
             card_html_blocks.append(
                 f"<div class='{cls}'><span class='state-icon'>{card['icon']}</span><div><div class='state-title'>{title}</div><div class='state-sub'>{text}</div></div></div>"
@@ -345,35 +357,89 @@ if st.session_state.get("analyzed") and audio_ok:
             f"<div>{traducir('Probabilidad Sano', idioma)}: {sano_p:.1%}<div class='prob-bar animated'><span style='width:{sano_p*100:.1f}%;background:linear-gradient(90deg,#2ecc71,#27ae60)'></span></div></div>" +
             f"<div>{traducir('Probabilidad Parkinson', idioma)}: {park_p:.1%}<div class='prob-bar animated'><span style='width:{park_p*100:.1f}%;background:linear-gradient(90deg,#e74c3c,#c0392b)'></span></div></div>" +
             "</div>", unsafe_allow_html=True)
-        try:
-            rec_ia = get_short_recommendation(paciente, sano_p, park_p)
-        except GeminiError as e:
-            rec_ia = f"Error IA: {e}"
-        if idioma != "es":
-            rec_ia = traducir(rec_ia, idioma)
         st.markdown(traducir("#### Recomendación breve", idioma))
-        fallback = traducir("No se pudo obtener la recomendación IA.", idioma)
-        st.markdown(
-            f"""<div style='background:#e0f7fa;border-left:6px solid #00796b;border-radius:8px;padding:1rem 1.3rem;margin-bottom:1rem;font-size:1.05rem;color:#114155;font-weight:500;'>💡 {rec_ia or fallback}</div>""",
-            unsafe_allow_html=True
+        rec_slot = st.empty()
+
+    def _rec_box(texto: str) -> str:
+        return f"""<div style='background:#e0f7fa;border-left:6px solid #00796b;border-radius:8px;padding:1rem 1.3rem;margin-bottom:1rem;font-size:1.05rem;color:#114155;font-weight:500;'>💡 {texto}</div>"""
+
+    # Textos IA en streaming, ya en el idioma de la sesión (el prompt lo
+    # pide así): se pintan según llegan, sin paso de traducción.
+    ai = None
+    with st.spinner(traducir("Generando interpretaciones con IA…", idioma)), span("ia", idioma=idioma):
+        for ai in stream_analysis_texts(detalle, paciente, sano_p, park_p, idioma):
+            if ai.por_variable:
+                interp_slot.dataframe(
+                    pd.DataFrame(
+                        [(f, ai.por_variable.get(f, "…")) for f in MODEL_FEATURES], columns=interp_cols
+                    ),
+                    use_container_width=True,
+                )
+            if ai.recomendacion_breve:
+                rec_slot.markdown(_rec_box(ai.recomendacion_breve + " …"), unsafe_allow_html=True)
+
+    if ai.por_variable:
+        parsed = dict(ai.por_variable)
+    else:
+        text_ia = ai.interpretaciones
+        if "interpretaciones" in ai.errores:
+            text_ia = traducir_fmt("Error IA: {error}", idioma, error=ai.errores["interpretaciones"])
+        parsed = parse_feature_interpretations_response(text_ia, MODEL_FEATURES)
+    final_interps = []
+    for feat in MODEL_FEATURES:
+        desc = parsed.get(feat)
+        if not desc:
+            desc = traducir("Este indicador de voz es relevante. Recuerda mantener tu voz clara y relajada.", idioma)
+        final_interps.append((feat, desc))
+    st.session_state["final_interps"] = final_interps
+    interp_slot.dataframe(pd.DataFrame(final_interps, columns=interp_cols), use_container_width=True)
+
+    rec_ia = ai.recomendacion_breve
+    if "recomendacion_breve" in ai.errores:
+        rec_ia = traducir_fmt("Error IA: {error}", idioma, error=ai.errores["recomendacion_breve"])
+    fallback = traducir("No se pudo obtener la recomendación IA.", idioma)
+    rec_slot.markdown(_rec_box(rec_ia or fallback), unsafe_allow_html=True)
+
+    recomendacion_extensa = ai.recomendacion_extensa
+    if "recomendacion_extensa" in ai.errores:
+        recomendacion_extensa = traducir_fmt(
+            "Consulta siempre a un especialista. (Detalle: {error})", idioma,
+            error=ai.errores["recomendacion_extensa"],
         )
-        try:
-            recomendacion_extensa = get_long_recommendation(paciente, sano_p, park_p)
-        except GeminiError as e:
-            recomendacion_extensa = f"Consulta siempre a un especialista. (Detalle: {e})"
-        if idioma != "es":
-            recomendacion_extensa = traducir(recomendacion_extensa, idioma)
-        if estado == "saludable":
-            diag_label = "Estado saludable"
-        elif estado == "riesgo":
-            diag_label = "Alta probabilidad de Parkinson"
-        else:
-            diag_label = "Estado intermedio"
-        st.session_state["diag_label"] = traducir(diag_label, idioma)
-        st.session_state["recomendacion_extensa"] = recomendacion_extensa
-        st.session_state["sano_p"] = sano_p
-        st.session_state["park_p"] = park_p
-        st.session_state["ready_for_pdf"] = True
+    if estado == "saludable":
+        diag_label = "Estado saludable"
+    elif estado == "riesgo":
+        diag_label = "Alta probabilidad de Parkinson"
+    else:
+        diag_label = "Estado intermedio"
+    st.session_state["diag_label"] = traducir(diag_label, idioma)
+    st.session_state["recomendacion_extensa"] = recomendacion_extensa
+    st.session_state["sano_p"] = sano_p
+    st.session_state["park_p"] = park_p
+    st.session_state["ready_for_pdf"] = True
+
+    # El PDF se genera en segundo plano en cuanto termina el análisis; se
+    # rehace si cambia cualquier dato del informe (idioma, nombre,
+    # probabilidades, textos de la IA). El botón de descarga sólo espera si
+    # aún no está listo.
+    pdf_key = _pdf_job_key(
+        idioma, paciente, rows, final_interps, st.session_state["diag_label"],
+        sano_p, park_p, recomendacion_extensa,
+    )
+    pdf_job = st.session_state.get("pdf_future")
+    if pdf_job is None or pdf_job[0] != pdf_key:
+        st.session_state["pdf_future"] = (pdf_key, _pdf_executor().submit(
+            build_report_pdf,
+            traducir,
+            paciente,
+            rows,
+            final_interps,
+            st.session_state["diag_label"],
+            sano_p,
+            park_p,
+            recomendacion_extensa,
+            idioma,
+        ))
 
     # 4) Descargas (contenido gestionado más adelante)
     with tab_descargas:
@@ -396,19 +462,8 @@ if st.session_state.get("analyzed") and st.session_state.get("ready_for_pdf"):
     park_p = st.session_state.get("park_p")
     recomendacion_extensa = st.session_state.get("recomendacion_extensa", "")
 
-    if None not in (sano_p, park_p) and rows and final_interps:
-        if "pdf_bytes" not in st.session_state:
-            st.session_state.pdf_bytes = build_report_pdf(
-                traducir,
-                paciente,
-                rows,
-                final_interps,
-                diag_label,
-                sano_p,
-                park_p,
-                recomendacion_extensa,
-                idioma,
-            )
+    if None not in (sano_p, park_p) and rows and final_interps and "pdf_future" in st.session_state:
+        _, pdf_future = st.session_state["pdf_future"]
 
         if "ml_report_bytes" not in st.session_state:
             try:
@@ -421,7 +476,7 @@ if st.session_state.get("analyzed") and st.session_state.get("ready_for_pdf"):
         with c1:
             st.download_button(
                 label=traducir("📥 Descargar Informe detallado (PDF)", idioma),
-                data=st.session_state.pdf_bytes,
+                data=pdf_future.result,
                 file_name=f"reporte_{paciente.replace(' ','_')}.pdf",
                 mime="application/pdf",
                 key="download_detailed_report"
@@ -444,7 +499,7 @@ if st.session_state.get("analyzed") and st.session_state.get("ready_for_pdf"):
                 else:
                     with open(pdf_path, "rb") as f:
                         ml_bytes = f.read()
-                    label = traducir(f"📥 Descargar Reporte ML ({lang_name})", idioma)
+                    label = traducir_fmt("📥 Descargar Reporte ML ({idioma})", idioma, idioma=lang_name)
                     st.download_button(
                         label=label,
                         data=ml_bytes,
@@ -453,4 +508,8 @@ if st.session_state.get("analyzed") and st.session_state.get("ready_for_pdf"):
                         key="download_ml_report"
                     )
     else:
-        st.info(traducir("Realiza el análisis para generar los reportes.", idioma))
\ No newline at end of file
+        st.info(traducir("Realiza el análisis para generar los reportes.", idioma))
+
+# Desglose de tiempos del último análisis (opcional, ver metrics.py)
+if os.getenv("PARKINSON_METRICS_SIDEBAR", "0") == "1":
+    render_metrics_sidebar(metrics, roots=("predict", "ia", "pdf.build_report_pdf"))
@@ -0,0 +1,103 @@
+"""Scoring por lotes de grabaciones WAV desde la línea de comandos.
+
+Uso:
+    python batch_predict.py audios/ otra_carpeta/x.wav -o resultados.csv
+    python batch_predict.py audios/ --method stack --workers 8 -o resultados.jsonl
+
+Las carpetas se recorren recursivamente buscando ``*.wav``. Los resultados se
+escriben a medida que se completan (CSV o JSONL según la extensión de salida
+o ``--format``); los archivos que fallan quedan registrados con
+``status=error`` en lugar de abortar el lote.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import Iterable, List
+
+from funcion import predict_parkinson_batch, MODEL_FEATURES
+
+CSV_COLUMNS = ["path", "status", "error", "pred", "p_parkinson", "p_sano", *MODEL_FEATURES]
+
+
+def collect_wavs(inputs: Iterable[str]) -> List[str]:
+    """Expande carpetas a sus ``*.wav`` (recursivo) y conserva archivos sueltos."""
+    paths: List[str] = []
+    for item in inputs:
+        p = Path(item)
+        if p.is_dir():
+            paths.extend(str(w) for w in sorted(p.rglob("*.wav")))
+        else:
+            paths.append(str(p))
+    return paths
+
+
+def _positive_int(value: str) -> int:
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"debe ser un entero >= 1 (recibido {value})")
+    return n
+
+
+def _positive_float(value: str) -> float:
+    x = float(value)
+    if not x > 0:  # también rechaza nan
+        raise argparse.ArgumentTypeError(f"debe ser un número > 0 (recibido {value})")
+    return x
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Predicción de Parkinson por lotes.")
+    parser.add_argument("inputs", nargs="+", help="Archivos WAV o carpetas.")
+    parser.add_argument("-o", "--output", default="-", help="Archivo de salida (por defecto stdout).")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Formato de salida (por defecto según extensión).")
+    parser.add_argument("--method", default="soft", help="'soft' (Voting), 'stack' (Stacking) o 'svm'.")
+    parser.add_argument("--workers", type=_positive_int, default=None, help="Procesos de extracción (por defecto nº de CPUs).")
+    parser.add_argument("--chunk-size", type=_positive_int, default=64, help="Filas por pasada del pipeline.")
+    parser.add_argument("--flush-interval", type=_positive_float, default=1.0,
+                        help="Segundos máximos que una fila espera a completar su bloque.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    fmt = args.format or ("jsonl" if args.output.endswith(".jsonl") else "csv")
+    paths = collect_wavs(args.inputs)
+    if not paths:
+        print("No se encontraron archivos WAV.", file=sys.stderr)
+        return 1
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        writer = None
+        if fmt == "csv":
+            writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+            writer.writeheader()
+        ok = errores = 0
+        for rec in predict_parkinson_batch(
+            paths, method=args.method, workers=args.workers,
+            chunk_size=args.chunk_size, flush_interval=args.flush_interval,
+        ):
+            if writer is not None:
+                writer.writerow(rec)
+            else:
+                out.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            out.flush()
+            if rec["status"] == "ok":
+                ok += 1
+            else:
+                errores += 1
+                print(f"[error] {rec['path']}: {rec['error']}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Procesados {ok + errores} archivos: {ok} ok, {errores} con error.", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+"""Suite de rendimiento: extracción, inferencia, IA y PDF.
+
+Genera vocales sostenidas sintéticas (``shimmer.synthetic_vowel``) a varias
+duraciones y frecuencias de muestreo, más ``recording.wav``, y mide por
+separado cada etapa del análisis:
+
+    <caso>/load                 librosa.load desde los bytes del WAV
+    <caso>/trim                 librosa.effects.trim (top_db del motor)
+    <caso>/praat.pitch          analyze_pitch ("To Pitch (ac)")
+    <caso>/praat.point_process  "To PointProcess (cc)" desde ese Pitch
+    <caso>/praat.shimmer.<m>    cada "Get shimmer (<m>)" de Praat
+    <caso>/shimmer.numpy        amplitudes por periodo + shimmer_measures
+    <caso>/extract              extract_parkinson_features_from_array completo
+    predict/<modelo>            predict_proba de cada pipeline de models/ (1 fila)
+    predict/<modelo>.batch      ídem con --batch filas
+    pdf/build_report_pdf        informe de un paciente (traducción identidad)
+    ai/prompt.build             build_combined_analysis_prompt
+    ai/prompt.parse             parse_combined_analysis_response
+    ai/combined_analysis        get_combined_analysis contra gemini_stub (HTTP local, sin caché)
+
+De cada etapa se guarda la mediana, el mínimo y el máximo en ms
+(``--repeat`` repeticiones tras una de calentamiento) en un JSON.
+
+Presupuestos (``benchmark_budgets.json``, o ``--budgets``):
+    {"max_regression": 0.25,
+     "budgets_ms": {"vocal_5s_44100/extract": 400, "predict/*": 30, ...}}
+Las claves admiten comodines (fnmatch); cada etapa debe quedar por debajo de
+todos los presupuestos que casen con ella (mediana). Con ``--baseline`` se
+compara además con un JSON anterior: falla si la mediana empeora más de
+``max_regression`` (fracción; también ``--max-regression``). Las etapas de
+menos de ``--min-ms`` en la línea base no se comparan (ruido).
+
+Uso:
+    python benchmark.py -o bench.json
+    python benchmark.py --durations 1 3 --rates 16000 --repeat 3
+    python benchmark.py --baseline bench_main.json          # sale con 1 si hay regresiones
+"""
+from __future__ import annotations
+
+import argparse
+import fnmatch
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+# El cliente Gemini lee clave y caché al importarse: el stub no necesita
+# clave real y la caché falsearía los tiempos de red
+os.environ.setdefault("GEMINI_KEY", "benchmark")
+os.environ["GEMINI_CACHE"] = "0"
+
+ROOT = Path(__file__).resolve().parent
+DEFAULT_BUDGETS = ROOT / "benchmark_budgets.json"
+
+
+class Bench:
+    """Acumula los tiempos de cada etapa."""
+
+    def __init__(self, repeat: int):
+        self.repeat = max(1, repeat)
+        self.results: Dict[str, dict] = {}
+
+    def run(self, nombre: str, fn: Callable, repeat: Optional[int] = None):
+        """Ejecuta ``fn`` una vez de calentamiento y ``repeat`` veces medidas;
+        devuelve el último resultado."""
+        valor = fn()
+        tiempos = []
+        for _ in range(repeat or self.repeat):
+            t0 = time.perf_counter()
+            valor = fn()
+            tiempos.append((time.perf_counter() - t0) * 1000)
+        self.results[nombre] = {
+            "median_ms": statistics.median(tiempos),
+            "min_ms": min(tiempos),
+            "max_ms": max(tiempos),
+            "n": len(tiempos),
+        }
+        print(f"  {nombre:<44} {self.results[nombre]['median_ms']:9.2f} ms", file=sys.stderr)
+        return valor
+
+
+def _wav_bytes(y: np.ndarray, sr: int) -> bytes:
+    import soundfile as sf
+
+    buf = io.BytesIO()
+    sf.write(buf, y, sr, format="WAV", subtype="PCM_16")
+    return buf.getvalue()
+
+
+def audio_cases(durations: List[float], rates: List[int], wavs: List[str]) -> Dict[str, bytes]:
+    """{nombre: bytes WAV}: vocales sintéticas por duración y sr + los WAV dados."""
+    from shimmer import synthetic_vowel
+
+    casos = {}
+    for sr in rates:
+        for dur in durations:
+            y = 0.8 * synthetic_vowel(f0=140.0, dur=dur, sr=sr, jitter=0.01, shimmer=0.05, seed=int(dur * 10))
+            # Silencio alrededor, como una grabación real (lo quita el recorte)
+            pausa = np.zeros(int(0.3 * sr))
+            casos[f"vocal_{dur:g}s_{sr}"] = _wav_bytes(np.concatenate([pausa, y, pausa]), sr)
+    for w in wavs:
+        casos[Path(w).stem] = Path(w).read_bytes()
+    return casos
+
+
+def bench_extraction(b: Bench, nombre: str, data: bytes) -> None:
+    import librosa
+    import parselmouth
+    from parselmouth.praat import call
+
+    from feature_engine import TRIM_TOP_DB, analyze_pitch
+    from funcion import extract_parkinson_features_from_array
+    from shimmer import MAX_AMPLITUDE_FACTOR, MAX_PERIOD_FACTOR, PERIOD_MAX, PERIOD_MIN, SHIMMER_MEASURES
+    from shimmer import period_amplitudes, shimmer_measures
+
+    y, sr = b.run(f"{nombre}/load", lambda: librosa.load(io.BytesIO(data), sr=None))
+    yt, _ = b.run(f"{nombre}/trim", lambda: librosa.effects.trim(y, top_db=TRIM_TOP_DB))
+    snd = parselmouth.Sound((yt / np.max(np.abs(yt))).astype(np.float64), sampling_frequency=sr)
+    pitch = b.run(f"{nombre}/praat.pitch", lambda: analyze_pitch(snd))
+    pp = b.run(f"{nombre}/praat.point_process", lambda: call([snd, pitch], "To PointProcess (cc)"))
+    args = (0, 0, PERIOD_MIN, PERIOD_MAX, MAX_PERIOD_FACTOR, MAX_AMPLITUDE_FACTOR)
+    for m in SHIMMER_MEASURES:
+        b.run(f"{nombre}/praat.shimmer.{m}", lambda: call([snd, pp], f"Get shimmer ({m})", *args))
+    b.run(f"{nombre}/shimmer.numpy", lambda: shimmer_measures(*period_amplitudes(snd, pp)))
+    b.run(f"{nombre}/extract", lambda: extract_parkinson_features_from_array(y, sr))
+
+
+def bench_inference(b: Bench, batch: int) -> None:
+    from funcion import MODEL_FEATURES, RANGE
+    from model_registry import registry
+
+    lo = np.array([RANGE[f][0] for f in MODEL_FEATURES])
+    hi = np.array([RANGE[f][1] for f in MODEL_FEATURES])
+    rng = np.random.default_rng(0)
+    X1 = ((lo + hi) / 2).reshape(1, -1)
+    Xn = lo + (hi - lo) * rng.random((batch, len(MODEL_FEATURES)))
+    for nombre in registry.available():
+        pipe = registry.get(nombre)
+        b.run(f"predict/{nombre}", lambda: pipe.predict_proba(X1))
+        b.run(f"predict/{nombre}.batch", lambda: pipe.predict_proba(Xn))
+
+
+def _sample_report():
+    from funcion import MODEL_FEATURES, RANGE
+
+    rows = [(f, float(np.mean(RANGE[f])), float(np.mean(RANGE[f])), *RANGE[f]) for f in MODEL_FEATURES]
+    interps = [(f, f"Interpretación de ejemplo para {f}. " * 4) for f in MODEL_FEATURES]
+    return rows, interps, "Recomendación extensa de ejemplo. " * 30
+
+
+def bench_pdf(b: Bench) -> None:
+    from pdf_report import build_report_pdf
+
+    rows, interps, recom = _sample_report()
+    b.run(
+        "pdf/build_report_pdf",
+        lambda: build_report_pdf(lambda t, idioma: t, "Paciente Benchmark", rows, interps,
+                                 "Estado intermedio", 0.55, 0.45, recom, "es"),
+    )
+
+
+def bench_ai(b: Bench) -> None:
+    import gemini_client
+    from gemini_prompts import build_combined_analysis_prompt, parse_combined_analysis_response
+    from gemini_stub import GeminiStubServer, default_json_responder
+
+    rows, _, _ = _sample_report()
+    detalles = "\n".join(f"{f}: descripción de {f} | Valor actual (clip): {clip:.3f}" for f, _, clip, *_ in rows)
+    features = [r[0] for r in rows]
+    prompt = b.run("ai/prompt.build", lambda: build_combined_analysis_prompt(detalles, "Paciente", 0.55, 0.45, "es"))
+    respuesta = default_json_responder(prompt)
+    b.run("ai/prompt.parse", lambda: parse_combined_analysis_response(respuesta, features))
+
+    anterior = os.environ.get("GEMINI_API_URL")
+    with GeminiStubServer(chunk_delay=0.0) as stub:
+        os.environ["GEMINI_API_URL"] = stub.url
+        try:
+            b.run("ai/combined_analysis", lambda: gemini_client.get_combined_analysis(detalles, "Paciente", 0.55, 0.45, "es"))
+        finally:
+            if anterior is None:
+                os.environ.pop("GEMINI_API_URL", None)
+            else:
+                os.environ["GEMINI_API_URL"] = anterior
+
+
+# -------------------------------
+# Presupuestos y regresiones
+# -------------------------------
+def load_budgets(path: Optional[str]) -> dict:
+    if path is None:
+        if not DEFAULT_BUDGETS.exists():
+            return {}
+        path = str(DEFAULT_BUDGETS)
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def check(results: Dict[str, dict], budgets: dict, baseline: Optional[dict], max_regression: float, min_ms: float) -> List[str]:
+    """Lista de incumplimientos (vacía si todo está en presupuesto)."""
+    fallos = []
+    for patron, limite in budgets.get("budgets_ms", {}).items():
+        casan = fnmatch.filter(results, patron)
+        for etapa in casan:
+            med = results[etapa]["median_ms"]
+            if med > limite:
+                fallos.append(f"{etapa}: {med:.2f} ms > presupuesto {limite:g} ms ({patron})")
+    if baseline:
+        for etapa, ref in baseline.get("results", {}).items():
+            if etapa not in results or ref["median_ms"] < min_ms:
+                continue
+            med = results[etapa]["median_ms"]
+            if med > ref["median_ms"] * (1 + max_regression):
+                fallos.append(
+                    f"{etapa}: {med:.2f} ms vs {ref['median_ms']:.2f} ms en la línea base "
+                    f"(+{med / ref['median_ms'] - 1:.0%} > {max_regression:.0%})"
+                )
+    return fallos
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de extracción, inferencia, IA y PDF.")
+    parser.add_argument("wavs", nargs="*", default=[str(ROOT / "recording.wav")], help="WAV reales además de los sintéticos.")
+    parser.add_argument("--durations", type=float, nargs="+", default=[1.0, 3.0, 5.0], help="Segundos de las vocales sintéticas.")
+    parser.add_argument("--rates", type=int, nargs="+", default=[16000, 44100], help="Frecuencias de muestreo sintéticas.")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--batch", type=int, default=1000, help="Filas de predict/<modelo>.batch.")
+    parser.add_argument("--skip", nargs="*", default=[], choices=["extraction", "inference", "pdf", "ai"])
+    parser.add_argument("-o", "--output", default=None, help="JSON de resultados (por defecto stdout).")
+    parser.add_argument("--budgets", default=None, help=f"JSON de presupuestos (por defecto {DEFAULT_BUDGETS.name}).")
+    parser.add_argument("--baseline", default=None, help="JSON de una ejecución anterior para detectar regresiones.")
+    parser.add_argument("--max-regression", type=float, default=None, help="Empeoramiento máximo frente a --baseline (0.25 = 25%%).")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Etapas más rápidas que esto no se comparan con --baseline.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    # Avisos de sklearn al deserializar/predecir sin nombres de columna
+    warnings.filterwarnings("ignore", category=UserWarning)
+    b = Bench(args.repeat)
+    if "extraction" not in args.skip:
+        for nombre, data in audio_cases(args.durations, args.rates, args.wavs).items():
+            print(nombre, file=sys.stderr)
+            bench_extraction(b, nombre, data)
+    if "inference" not in args.skip:
+        print("inferencia", file=sys.stderr)
+        bench_inference(b, args.batch)
+    if "pdf" not in args.skip:
+        print("pdf", file=sys.stderr)
+        bench_pdf(b)
+    if "ai" not in args.skip:
+        print("ia (stub local)", file=sys.stderr)
+        bench_ai(b)
+
+    budgets = load_budgets(args.budgets)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    max_regression = args.max_regression if args.max_regression is not None else budgets.get("max_regression", 0.25)
+    fallos = check(b.results, budgets, baseline, max_regression, args.min_ms)
+
+    salida = {
+        "meta": {
+            "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": b.repeat,
+        },
+        "results": b.results,
+        "fallos": fallos,
+    }
+    texto = json.dumps(salida, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(texto + "\n", encoding="utf-8")
+    else:
+        print(texto)
+    for f in fallos:
+        print(f"[regresión] {f}", file=sys.stderr)
+    return 1 if fallos else 0
+
+
+__all__ = ["Bench", "audio_cases", "check", "load_budgets"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+"""Catálogos de traducción precompilados (``locales/<idioma>.json``).
+
+Los textos fijos de la interfaz y del PDF son literales en español. Aquí se
+recogen todos (``static_texts``: literales pasados a ``traducir`` /
+``traducir_fmt`` en app.py, ``pdf_report.REPORT_TEXTS`` / ``COHORT_TEXTS`` y los que viven en
+variables) y se traducen en lote una sola vez, en el build. En
+ejecución ``translation.Translator`` carga el catálogo de cada idioma al
+primer uso y las consultas son un acceso a diccionario.
+
+Las plantillas con ``{campo}`` se traducen tal cual y se rellenan después
+con ``str.format``; el build descarta traducciones que pierdan los campos.
+
+Herramienta:
+    python catalogs.py build               # traduce lo que falte en cada idioma
+    python catalogs.py build --refresh     # retraduce todo
+    python catalogs.py check               # informa textos sin traducir/obsoletos
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import string
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from pdf_report import COHORT_TEXTS, REPORT_TEXTS
+from translation import LOCALES_DIR, Translator, catalog_path, collect_literals, load_catalog
+
+LANGS = ["en", "pt", "fr", "zh-cn"]
+
+_ROOT = Path(__file__).resolve().parent
+SOURCES = [
+    (_ROOT / "app.py", "traducir"),
+    (_ROOT / "app.py", "traducir_fmt"),
+]
+
+# Textos fijos que no aparecen como literal en la llamada (listas, dicts)
+EXTRA_TEXTS = [
+    "Bruto", "Clip", "Min", "Max",
+    "Estado saludable", "Alta probabilidad de Parkinson", "Estado intermedio",
+    "¡{paciente}, tu estado es Saludable!",
+    "{paciente}, estado Intermedio",
+    "{paciente}, Alto Riesgo",
+    "Sano {sano} · Parkinson {park}",
+]
+
+
+def static_texts() -> Tuple[str, ...]:
+    textos: List[str] = []
+    for path, func in SOURCES:
+        textos.extend(collect_literals(str(path), func))
+    textos.extend(REPORT_TEXTS.values())
+    textos.extend(COHORT_TEXTS.values())
+    textos.extend(EXTRA_TEXTS)
+    return tuple(dict.fromkeys(textos))
+
+
+def _fields(texto: str) -> set:
+    return {campo for _, campo, _, _ in string.Formatter().parse(texto) if campo}
+
+
+def build(langs=LANGS, refresh: bool = False, locales_dir: Path = LOCALES_DIR) -> Dict[str, int]:
+    """Traduce los textos que falten y reescribe los catálogos (ordenados)."""
+    textos = static_texts()
+    tr = Translator(locales_dir=None)
+    locales_dir = Path(locales_dir)
+    locales_dir.mkdir(parents=True, exist_ok=True)
+    nuevos: Dict[str, int] = {}
+    for lang in langs:
+        cat = {} if refresh else load_catalog(lang, locales_dir)
+        faltan = [t for t in textos if t not in cat]
+        tr.prefetch(faltan, lang)
+        for texto in faltan:
+            traducido = tr.lookup(texto, lang)
+            # Error de red o {campos} alterados: no se guarda
+            if traducido and _fields(traducido) == _fields(texto):
+                cat[texto] = traducido
+        cat = {t: cat[t] for t in textos if t in cat}
+        with open(catalog_path(lang, locales_dir), "w", encoding="utf-8") as f:
+            json.dump(cat, f, ensure_ascii=False, indent=0, sort_keys=True)
+            f.write("\n")
+        nuevos[lang] = sum(1 for t in faltan if t in cat)
+    return nuevos
+
+
+def check(langs=LANGS, locales_dir: Path = LOCALES_DIR) -> Dict[str, dict]:
+    textos = set(static_texts())
+    informe = {}
+    for lang in langs:
+        cat = load_catalog(lang, locales_dir)
+        informe[lang] = {
+            "faltan": sorted(textos - cat.keys()),
+            "obsoletos": sorted(cat.keys() - textos),
+        }
+    return informe
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Catálogos de traducción precompilados.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Genera/actualiza locales/<idioma>.json")
+    b.add_argument("--langs", nargs="+", default=LANGS)
+    b.add_argument("--refresh", action="store_true", help="Retraduce también lo ya presente.")
+    c = sub.add_parser("check", help="Lista textos sin traducir u obsoletos")
+    c.add_argument("--langs", nargs="+", default=LANGS)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        for lang, n in build(args.langs, args.refresh).items():
+            print(f"{lang}: {n} textos nuevos")
+        return 0
+    ok = True
+    for lang, info in check(args.langs).items():
+        print(f"{lang}: {len(info['faltan'])} sin traducir, {len(info['obsoletos'])} obsoletos")
+        for t in info["faltan"]:
+            print(f"   - {t[:80]}")
+        ok = ok and not info["faltan"]
+    return 0 if ok else 1
+
+
+__all__ = ["EXTRA_TEXTS", "LANGS", "SOURCES", "build", "check", "static_texts"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,233 @@
+"""Informes PDF por cohorte a partir de resultados guardados.
+
+Pensado para jornadas clínicas: toma la salida de ``batch_predict.py`` (CSV o
+JSONL, un registro por grabación) y genera
+
+  - un PDF individual por paciente (mismo formato que el de la app),
+  - un PDF consolidado con el conteo por estado y una fila por paciente
+    (``cohorte.pdf``),
+  - un CSV resumen (``cohorte.csv``).
+
+Los PDF individuales se reparten por bloques en un pool de procesos; cada
+proceso calcula el esqueleto del informe una vez por idioma y reutiliza los
+catálogos de traducción, así que cientos de pacientes tardan segundos.
+
+Campos opcionales por registro (JSONL): ``paciente`` (por defecto el nombre
+del archivo), ``final_interps`` (dict o lista de pares feature/texto),
+``diag_label`` y ``recomendacion_extensa``. Si faltan se usan textos
+genéricos; este script no llama a la IA.
+
+Uso:
+    python batch_predict.py audios/ -o resultados.jsonl
+    python cohort_report.py resultados.jsonl -o informes/ --idioma es --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from funcion import MODEL_FEATURES, RANGE
+from pdf_report import COHORT_TEXTS, build_cohort_pdf, build_report_pdf
+
+SUMMARY_COLUMNS = [
+    "paciente", "path", "status", "estado", "diag_label",
+    "p_sano", "p_parkinson", *MODEL_FEATURES, "informe", "error",
+]
+
+# Mismos umbrales y etiquetas que la pantalla de resultados de app.py
+DIAG_LABELS = {
+    "saludable": "Estado saludable",
+    "riesgo": "Alta probabilidad de Parkinson",
+    "intermedio": "Estado intermedio",
+}
+
+
+def estado_de(p_sano: float, p_parkinson: float) -> str:
+    if p_sano >= 0.7:
+        return "saludable"
+    if p_parkinson >= 0.7:
+        return "riesgo"
+    return "intermedio"
+
+
+def read_records(path: str) -> List[dict]:
+    """Registros de un CSV o JSONL de ``batch_predict.py`` (según extensión)."""
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            return [json.loads(ln) for ln in f if ln.strip()]
+        return list(csv.DictReader(f))
+
+
+def _slug(texto: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", texto, flags=re.UNICODE).strip("_")[:60] or "paciente"
+
+
+def _interps(valor, textos: Dict[str, str]) -> List[tuple]:
+    if isinstance(valor, dict):
+        parsed = valor
+    elif isinstance(valor, list):
+        parsed = dict(valor)
+    else:
+        parsed = {}
+    return [(f, parsed.get(f) or textos["interp_defecto"]) for f in MODEL_FEATURES]
+
+
+def prepare(records: Iterable[dict], traducir_func, idioma: str) -> List[dict]:
+    """Normaliza los registros: nombre, estado, filas (feature, bruto, clip,
+    min, max) y textos; los que vienen con error sólo van al resumen."""
+    textos = {k: traducir_func(COHORT_TEXTS[k], idioma) for k in ("interp_defecto", "recom_defecto")}
+    trabajos = []
+    for i, rec in enumerate(records):
+        paciente = rec.get("paciente") or Path(rec.get("path", "")).stem or f"Paciente {i + 1}"
+        item = {"n": i, "paciente": paciente, "path": rec.get("path", ""), "error": rec.get("error") or ""}
+        try:
+            if rec.get("status", "ok") != "ok":
+                raise ValueError(item["error"] or "registro con error")
+            p_sano, p_park = float(rec["p_sano"]), float(rec["p_parkinson"])
+            raw = {f: float(rec[f]) for f in MODEL_FEATURES}
+        except (KeyError, TypeError, ValueError) as e:
+            item.update(status="error", estado="error", error=item["error"] or f"{type(e).__name__}: {e}")
+            trabajos.append(item)
+            continue
+        estado = estado_de(p_sano, p_park)
+        item.update(
+            status="ok",
+            estado=estado,
+            p_sano=p_sano,
+            p_parkinson=p_park,
+            raw=raw,
+            rows=[(f, raw[f], float(np.clip(raw[f], *RANGE[f])), *RANGE[f]) for f in MODEL_FEATURES],
+            final_interps=_interps(rec.get("final_interps"), textos),
+            diag_label=rec.get("diag_label") or traducir_func(DIAG_LABELS[estado], idioma),
+            recomendacion_extensa=rec.get("recomendacion_extensa") or textos["recom_defecto"],
+            informe=f"{i + 1:04d}_{_slug(paciente)}.pdf",
+        )
+        trabajos.append(item)
+    return trabajos
+
+
+def _render_chunk(out_dir: str, idioma: str, items: List[dict]) -> List[tuple]:
+    """Worker: escribe los PDF de un bloque. Devuelve (n, error) por paciente."""
+    from translation import translator  # cada proceso usa su propio traductor
+
+    resultados = []
+    for it in items:
+        try:
+            pdf = build_report_pdf(
+                translator.translate,
+                it["paciente"],
+                it["rows"],
+                it["final_interps"],
+                it["diag_label"],
+                it["p_sano"],
+                it["p_parkinson"],
+                it["recomendacion_extensa"],
+                idioma,
+            )
+            (Path(out_dir) / it["informe"]).write_bytes(pdf)
+            resultados.append((it["n"], None))
+        except Exception as e:
+            resultados.append((it["n"], f"{type(e).__name__}: {e}"))
+    return resultados
+
+
+def render_reports(trabajos: List[dict], out_dir: str, idioma: str, workers: Optional[int] = None) -> None:
+    """Genera los PDF individuales en paralelo y anota los fallos en ``trabajos``.
+
+    workers: nº de procesos (None = os.cpu_count(), 1 = sin pool).
+    """
+    pendientes = [t for t in trabajos if t["status"] == "ok"]
+    if not pendientes:
+        return
+    if workers == 1:
+        resultados = _render_chunk(out_dir, idioma, pendientes)
+    else:
+        n = workers or os.cpu_count() or 1
+        # Bloques de varios pacientes: amortiza el envío entre procesos
+        tam = max(1, min(32, -(-len(pendientes) // (n * 4))))
+        bloques = [pendientes[i:i + tam] for i in range(0, len(pendientes), tam)]
+        with ProcessPoolExecutor(max_workers=n) as pool:
+            resultados = [r for rs in pool.map(_render_chunk, [out_dir] * len(bloques), [idioma] * len(bloques), bloques) for r in rs]
+    por_n = {t["n"]: t for t in trabajos}
+    for n, error in resultados:
+        if error is not None:
+            por_n[n].update(status="error", estado="error", error=error, informe="")
+
+
+def write_summary_csv(trabajos: List[dict], path: Path) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for t in trabajos:
+            writer.writerow({**t, **t.get("raw", {})})
+
+
+def build_cohort(
+    records: Iterable[dict],
+    out_dir: str,
+    idioma: str = "es",
+    workers: Optional[int] = None,
+    traducir_func=None,
+) -> List[dict]:
+    """Genera informes individuales, ``cohorte.pdf`` y ``cohorte.csv`` en ``out_dir``."""
+    if traducir_func is None:
+        from translation import translator
+
+        traducir_func = translator.translate
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    trabajos = prepare(records, traducir_func, idioma)
+    render_reports(trabajos, str(out), idioma, workers)
+    (out / "cohorte.pdf").write_bytes(build_cohort_pdf(traducir_func, trabajos, idioma))
+    write_summary_csv(trabajos, out / "cohorte.csv")
+    return trabajos
+
+
+def _parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Informes PDF por cohorte a partir de resultados guardados.")
+    parser.add_argument("resultados", help="CSV o JSONL de batch_predict.py.")
+    parser.add_argument("-o", "--output", default="informes", help="Carpeta de salida (por defecto informes/).")
+    parser.add_argument("--idioma", default="es", help="Idioma de los informes (es, en, pt, fr, zh-cn).")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (por defecto nº de CPUs).")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    t0 = time.perf_counter()
+    trabajos = build_cohort(read_records(args.resultados), args.output, args.idioma, args.workers)
+    ok = sum(1 for t in trabajos if t["status"] == "ok")
+    for t in trabajos:
+        if t["status"] != "ok":
+            print(f"[error] {t['paciente']}: {t['error']}", file=sys.stderr)
+    print(
+        f"{ok} informes, {len(trabajos) - ok} con error en {time.perf_counter() - t0:.1f} s -> {args.output}",
+        file=sys.stderr,
+    )
+    return 0
+
+
+__all__ = [
+    "DIAG_LABELS",
+    "SUMMARY_COLUMNS",
+    "build_cohort",
+    "estado_de",
+    "prepare",
+    "read_records",
+    "render_reports",
+    "write_summary_csv",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,271 @@
+"""Predictor "compilado": tabla precalculada de probabilidades sobre la caja RANGE.
+
+Los modelos sólo ven 3 features recortadas a la caja fija ``RANGE`` de
+``funcion.py``. Aquí se evalúa ``predict_proba`` de un pipeline una única vez
+sobre una rejilla 3-D densa de esa caja y se guarda en
+``models/<modelo>.grid.npz``. En servicio, las probabilidades se obtienen
+por interpolación trilineal vectorizada en NumPy puro: microsegundos por
+fila y sin necesidad de sklearn cargado.
+
+Sólo sirve para modelos suaves (SVC, regresión logística, ...): su
+probabilidad es continua y la interpolación converge al subir la resolución
+(el SVM ``svm_mcc_final`` baja de 0,076 a 0,0125 de |Δp| máxima entre 41³ y
+121³ puntos). Con árboles (RandomForest, XGBoost; los ensembles ``soft`` y
+``stack`` los llevan) la probabilidad es escalonada y la interpolación no
+converge (0,17 con 121³ en ``soft``): ``build_grid`` los rechaza.
+
+La tabla guarda también media/escala del StandardScaler (para devolver las
+features escaladas), el hash del artefacto de origen y la desviación máxima
+medida por ``check`` al construirla. Si el .joblib cambia, o si esa desviación
+supera ``PARKINSON_COMPILED_MAX_DEV`` (0.02 por defecto), la tabla se ignora y
+se usa el pipeline real.
+
+Herramienta:
+    python compiled_predictor.py build --method svm --points 121   # sale con 1 si no cumple MAX_DEV
+    python compiled_predictor.py check --method svm --samples 20000
+
+Activación en ``funcion.predict_features``: ``PARKINSON_COMPILED=1``.
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+from model_registry import registry
+
+# Desviación máxima |Δp| admitida frente al ensemble real para servir la tabla
+MAX_DEV = float(os.getenv("PARKINSON_COMPILED_MAX_DEV", "0.02"))
+
+
+def grid_path(method: str) -> Path:
+    return registry.models_dir / f"{registry.resolve(method)}.grid.npz"
+
+
+class CompiledPredictor:
+    def __init__(self, axes, proba, mean, scale, classes, model_version: str = "",
+                 max_dev: float = float("nan"), grid_hash: str = "", decision=None):
+        self.axes = [np.asarray(a, dtype=np.float64) for a in axes]
+        self.proba = np.asarray(proba, dtype=np.float64)   # (n0, n1, n2, n_clases)
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.classes = np.asarray(classes)
+        self.model_version = model_version
+        self.max_dev = float(max_dev)      # NaN = sin verificar
+        self.grid_hash = grid_hash         # sha256[:16] del .npz (vacío si no se cargó de disco)
+        # SVC: decision_function en la rejilla (la etiqueta sale de su signo,
+        # no del argmax de las probabilidades de Platt)
+        self.decision = None if decision is None else np.asarray(decision, dtype=np.float64)
+        self._lo = np.array([a[0] for a in self.axes])
+        self._step = np.array([a[1] - a[0] for a in self.axes])
+        self._n = np.array([len(a) for a in self.axes])
+        # Las 8 esquinas de una celda como desplazamientos (8, 3)
+        self._corners = np.array([[(c >> 2) & 1, (c >> 1) & 1, c & 1] for c in range(8)])
+
+    # -- Persistencia ------------------------------------------------------
+    @classmethod
+    def load(cls, path) -> "CompiledPredictor":
+        raw = Path(path).read_bytes()
+        with np.load(io.BytesIO(raw), allow_pickle=False) as z:
+            return cls(
+                [z["axis0"], z["axis1"], z["axis2"]],
+                z["proba"], z["mean"], z["scale"], z["classes"],
+                str(z["model_version"]),
+                float(z["max_dev"]) if "max_dev" in z.files else float("nan"),
+                hashlib.sha256(raw).hexdigest()[:16],
+                z["decision"] if "decision" in z.files else None,
+            )
+
+    def save(self, path) -> None:
+        extra = {} if self.decision is None else {"decision": self.decision.astype(np.float32)}
+        np.savez_compressed(
+            path,
+            axis0=self.axes[0], axis1=self.axes[1], axis2=self.axes[2],
+            proba=self.proba.astype(np.float32),
+            mean=self.mean, scale=self.scale, classes=self.classes,
+            model_version=np.array(self.model_version),
+            max_dev=np.array(self.max_dev),
+            **extra,
+        )
+
+    # -- Inferencia --------------------------------------------------------
+    def _interp(self, table: np.ndarray, X) -> np.ndarray:
+        """Interpolación trilineal de ``table`` (n0, n1, n2, k); X (n, 3) dentro de la caja."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        pos = (X - self._lo) / self._step
+        pos = np.clip(pos, 0, self._n - 1)
+        i0 = np.minimum(pos.astype(np.intp), self._n - 2)
+        t = (pos - i0)[:, None, :]                     # (n, 1, 3) fracción en la celda
+        w = np.prod(np.where(self._corners, t, 1.0 - t), axis=2)     # (n, 8)
+        idx = i0[:, None, :] + self._corners                         # (n, 8, 3)
+        vals = table[idx[..., 0], idx[..., 1], idx[..., 2]]          # (n, 8, k)
+        return np.einsum("nc,nck->nk", w, vals)
+
+    def predict_proba(self, X) -> np.ndarray:
+        return self._interp(self.proba, X)
+
+    def predict_features(self, X):
+        """Misma salida que ``funcion.predict_features``: (y_pred, proba, scaled)."""
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        proba = self.predict_proba(X)
+        if self.decision is not None:
+            y_pred = self.classes[(self._interp(self.decision[..., None], X)[:, 0] > 0).astype(np.intp)]
+        else:
+            y_pred = self.classes[np.argmax(proba, axis=1)]
+        scaled = (X - self.mean) / self.scale
+        return y_pred, proba, scaled
+
+
+_loaded: Dict[str, Optional[CompiledPredictor]] = {}
+
+
+def _load_current(method: str) -> Optional[CompiledPredictor]:
+    """Tabla de disco para ``method`` si corresponde al .joblib actual."""
+    stem = registry.resolve(method)
+    path = grid_path(stem)
+    comp = CompiledPredictor.load(path) if path.exists() else None
+    if comp is not None and comp.model_version != registry.version(stem):
+        comp = None
+    return comp
+
+
+def load_compiled(method: str) -> Optional[CompiledPredictor]:
+    """Tabla vigente para ``method`` o ``None`` si no existe, está obsoleta o
+    su desviación máxima (medida al construirla) no cumple ``MAX_DEV``."""
+    stem = registry.resolve(method)
+    if stem in _loaded:
+        cached = _loaded[stem]
+        if cached is None or cached.model_version == registry.version(stem):
+            return cached
+    comp = _load_current(stem)
+    # NaN (tabla antigua sin verificar) tampoco pasa la comparación
+    if comp is not None and not comp.max_dev <= MAX_DEV:
+        comp = None
+    _loaded[stem] = comp
+    return comp
+
+
+def _has_trees(est) -> bool:
+    """True si el estimador o alguno de sus miembros (Voting/Stacking,
+    bosques) es de árboles: probabilidad constante a trozos."""
+    from sklearn.tree import BaseDecisionTree
+
+    if isinstance(est, BaseDecisionTree) or type(est).__module__.split(".")[0] in ("xgboost", "lightgbm", "catboost"):
+        return True
+    miembros = list(np.ravel(np.asarray(getattr(est, "estimators_", None) or [], dtype=object)))
+    miembros.append(getattr(est, "final_estimator_", None))
+    return any(_has_trees(m) for m in miembros if m is not None)
+
+
+def build_grid(method: str, points: int = 121) -> CompiledPredictor:
+    """Evalúa el pipeline real sobre una rejilla ``points``³ de la caja RANGE.
+
+    Lanza ValueError si el modelo tiene árboles (la tabla no convergería).
+    """
+    from funcion import MODEL_FEATURES, RANGE
+
+    from sklearn.svm import SVC, NuSVC
+
+    pipe = registry.get(method)
+    if _has_trees(pipe[-1]):
+        raise ValueError(
+            f"'{method}' contiene árboles (probabilidad escalonada): la interpolación no converge; "
+            "sólo admiten tabla los modelos suaves (p.e. 'svm')."
+        )
+    axes = [np.linspace(*RANGE[f], points) for f in MODEL_FEATURES]
+    mesh = np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, len(axes))
+    proba = pipe.predict_proba(mesh).reshape(points, points, points, -1)
+    decision = None
+    if isinstance(pipe[-1], (SVC, NuSVC)):
+        decision = pipe.decision_function(mesh).reshape(points, points, points)
+    scaler = pipe[:-1][-1]
+    return CompiledPredictor(
+        axes, proba, scaler.mean_, scaler.scale_, pipe.classes_, registry.version(method),
+        decision=decision,
+    )
+
+
+def check(method: str, samples: int = 20000, seed: int = 0,
+          comp: Optional[CompiledPredictor] = None) -> dict:
+    """Compara la tabla (la de disco si no se pasa ``comp``) con el ensemble
+    real en puntos aleatorios de la caja."""
+    from funcion import MODEL_FEATURES, RANGE
+
+    if comp is None:
+        comp = _load_current(method)
+    if comp is None:
+        raise FileNotFoundError(f"No hay tabla vigente para '{method}'; ejecuta 'build' primero.")
+    pipe = registry.get(method)
+    lo = np.array([RANGE[f][0] for f in MODEL_FEATURES])
+    hi = np.array([RANGE[f][1] for f in MODEL_FEATURES])
+    X = np.random.default_rng(seed).uniform(lo, hi, size=(samples, len(lo)))
+
+    t = time.perf_counter(); real = pipe.predict_proba(X); t_real = time.perf_counter() - t
+    t = time.perf_counter(); approx = comp.predict_proba(X); t_comp = time.perf_counter() - t
+    pipe.predict_proba(X[:1]); comp.predict_proba(X[:1])  # calentamiento
+    t = time.perf_counter(); pipe.predict_proba(X[:1]); t_real_one = time.perf_counter() - t
+    t = time.perf_counter(); comp.predict_proba(X[:1]); t_one = time.perf_counter() - t
+    err = np.abs(real - approx)[:, 1]
+    return {
+        "method": method,
+        "samples": samples,
+        "max_dev_limit": MAX_DEV,
+        "max_abs_dev": float(err.max()),
+        "mean_abs_dev": float(err.mean()),
+        "p99_abs_dev": float(np.quantile(err, 0.99)),
+        "label_mismatch": float(np.mean(pipe.predict(X) != comp.predict_features(X)[0])),
+        "real_us_per_row": 1e6 * t_real / samples,
+        "compiled_us_per_row": 1e6 * t_comp / samples,
+        "real_us_single": 1e6 * t_real_one,
+        "compiled_us_single": 1e6 * t_one,
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Tabla precalculada de probabilidades.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Genera models/<modelo>.grid.npz")
+    b.add_argument("--method", default="svm")
+    b.add_argument("--points", type=int, default=121)
+    b.add_argument("--samples", type=int, default=20000)
+    c = sub.add_parser("check", help="Mide la desviación frente al ensemble real")
+    c.add_argument("--method", default="svm")
+    c.add_argument("--samples", type=int, default=20000)
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        try:
+            comp = build_grid(args.method, args.points)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+        report = check(args.method, args.samples, comp=comp)
+    else:
+        report = check(args.method, args.samples)
+    for k, v in report.items():
+        print(f"{k:>22}: {v:.6g}" if isinstance(v, float) else f"{k:>22}: {v}")
+    if not report["max_abs_dev"] <= MAX_DEV:
+        print(f"Desviación máxima > {MAX_DEV:g}: la tabla no se usará "
+              "(sube --points).", file=sys.stderr)
+        return 1
+    if args.cmd == "build":
+        comp.max_dev = report["max_abs_dev"]
+        path = grid_path(args.method)
+        comp.save(path)
+        _loaded.pop(registry.resolve(args.method), None)
+        print(f"Tabla guardada en {path} ({args.points}^3 puntos).")
+    return 0
+
+
+__all__ = ["MAX_DEV", "CompiledPredictor", "build_grid", "check", "grid_path", "load_compiled"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,365 @@
+"""Motor de features con grafo de dependencias.
+
+Cada paso intermedio es un nodo con sus dependencias declaradas:
+
+    signal (mono, recortada, normalizada)
+    ├─ sound ─ pitch ─┬─ f0 ────────────────────────── Fo/Fhi/Flo, spread1, *_aprox
+    │                 └─ point_process ─┬─ jitter ──── Jitter(%)/(Abs), RAP, PPQ, DDP
+    │                                   └─ period_amplitudes ─ shimmer ─ Shimmer*, APQ*, DDA
+    ├─ sound ─ harmonicity ─────────────────────────── HNR, NHR
+    ├─ stft ─ spectral ─────────────────────────────── spectral_contrast
+    └─ rpde / dfa / d2 (``nonlinear``) ─────────────── RPDE, DFA, D2
+
+Se pide una lista de features (``MODEL_FEATURES``, las de un modelo con
+``registry.features(nombre)``, ...) y sólo se construyen los nodos que esas
+features necesitan, cada uno una vez por grabación: los 3 features de los
+modelos actuales no calculan STFT ni harmonicity.
+
+    feats = extract_features(y, sr, ["spread1", "MDVP:APQ", "MDVP:Shimmer"])
+    ctx = FeatureContext(y, sr); ctx.features([...]); ctx.computed  # nodos usados
+
+Definiciones: las de ``funcion`` para los features de los modelos (spread1
+sobre f0; MDVP:APQ = apq3, o apq5 si apq3 no sale, como siempre se les ha
+dado). Todas en la escala del dataset (Jitter(%) como fracción, no ×100).
+Las no lineales (RPDE, DFA, D2) son las de ``nonlinear`` con sus valores por
+defecto (RPDE y D2 sobre un subconjunto de puntos del embebido).
+El resto sigue a ``test_backend.py`` con las correcciones obvias
+(Jitter(Abs) en segundos, NHR como cociente de potencias a partir del HNR).
+Los NaN se devuelven como 0.0.
+
+Las que acaban en ``_aprox`` NO son las columnas del dataset y ningún modelo
+las usa: ``spread2_aprox`` (dispersión del log de la desviación de f0) y
+``PPE_aprox`` (entropía del residuo AR(2) de f0) se inspiran en Little et
+al. 2009 pero no reproducen su escala (``PPE_aprox`` de recording.wav da
+0,77, por encima del máximo del dataset, 0,527). ``spectral_contrast``
+tampoco es del dataset.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+from typing import Callable, Dict, Iterable, List, Tuple
+
+import librosa
+import numpy as np
+import parselmouth
+from parselmouth.praat import call
+
+try:
+    from . import nonlinear  # type: ignore
+    from .metrics import span  # type: ignore
+    from .shimmer import PERIOD_MAX, PERIOD_MIN, MAX_PERIOD_FACTOR, period_amplitudes, shimmer_measures  # type: ignore
+except ImportError:
+    import nonlinear  # type: ignore
+    from metrics import span  # type: ignore
+    from shimmer import PERIOD_MAX, PERIOD_MIN, MAX_PERIOD_FACTOR, period_amplitudes, shimmer_measures  # type: ignore
+
+# Un único Pitch (AC) alimenta spread1 y el PointProcess. Son los ajustes de
+# ``snd.to_pitch()`` (techo 600 Hz), con los que se entrenó spread1; el
+# PointProcess antes salía de "To PointProcess (periodic, cc)" 75-500 Hz y
+# con este Pitch el shimmer sólo cambia en ~1e-4 (``python feature_engine.py``).
+PITCH_FLOOR = 75
+PITCH_CEILING = 600
+PITCH_SILENCE_THRESHOLD = 0.03
+
+TRIM_TOP_DB = 20
+
+
+def analyze_pitch(snd: parselmouth.Sound, silence_threshold: float = PITCH_SILENCE_THRESHOLD):
+    """Pitch (AC) compartido por spread1 y "To PointProcess (cc)"; el resto
+    de parámetros son los valores por defecto de Praat."""
+    return call(
+        snd, "To Pitch (ac)",
+        0, PITCH_FLOOR, 15, "no", silence_threshold, 0.45, 0.01, 0.35, 0.14, PITCH_CEILING,
+    )
+
+
+def _safe(*args) -> float:
+    try:
+        return float(call(*args))
+    except parselmouth.PraatError:
+        return np.nan
+
+
+# -------------------------------
+# Nodos: nombre -> (dependencias, función de sus valores)
+# -------------------------------
+NODES: Dict[str, Tuple[Tuple[str, ...], Callable]] = {}
+
+
+def _node(name: str, *deps: str):
+    def registrar(fn):
+        NODES[name] = (deps, fn)
+        return fn
+    return registrar
+
+
+@_node("signal", "raw")
+def _signal(raw):
+    y, sr = raw
+    y = np.asarray(y, dtype=np.float32)
+    if y.ndim > 1:
+        y = librosa.to_mono(y)
+    y, _ = librosa.effects.trim(y, top_db=TRIM_TOP_DB)
+    if y.size == 0:
+        raise ValueError("Audio vacío")
+    return y / np.max(np.abs(y)), sr
+
+
+@_node("sound", "signal")
+def _sound(signal):
+    y, sr = signal
+    return parselmouth.Sound(y.astype(np.float64), sampling_frequency=sr)
+
+
+@_node("pitch", "sound")
+def _pitch(snd):
+    return analyze_pitch(snd)
+
+
+@_node("f0", "pitch")
+def _f0(pitch):
+    f0 = pitch.selected_array["frequency"]
+    return f0[f0 > 0]
+
+
+@_node("point_process", "sound", "pitch")
+def _point_process(snd, pitch):
+    return call([snd, pitch], "To PointProcess (cc)")
+
+
+@_node("jitter", "point_process")
+def _jitter(pp):
+    args = (0, 0, PERIOD_MIN, PERIOD_MAX, MAX_PERIOD_FACTOR)
+    return {
+        m: _safe(pp, f"Get jitter ({m})", *args)
+        for m in ("local", "local, absolute", "rap", "ppq5", "ddp")
+    }
+
+
+@_node("period_amplitudes", "sound", "point_process")
+def _period_amplitudes(snd, pp):
+    return period_amplitudes(snd, pp)
+
+
+@_node("shimmer", "period_amplitudes")
+def _shimmer(amps):
+    return shimmer_measures(*amps)
+
+
+@_node("harmonicity", "sound")
+def _harmonicity(snd):
+    hnr = _safe(call(snd, "To Harmonicity (cc)", 0.01, PITCH_FLOOR, 0.1, 1.0), "Get mean", 0, 0)
+    return {"hnr": hnr, "nhr": 10 ** (-hnr / 10) if not np.isnan(hnr) else np.nan}
+
+
+@_node("stft", "signal")
+def _stft(signal):
+    y, _ = signal
+    return np.abs(librosa.stft(y))
+
+
+@_node("spectral", "stft", "signal")
+def _spectral(S, signal):
+    _, sr = signal
+    return {"contrast": float(librosa.feature.spectral_contrast(S=S, sr=sr).mean())}
+
+
+@_node("rpde", "signal")
+def _rpde(signal):
+    return nonlinear.rpde(*signal, max_points=nonlinear.RPDE_POINTS)
+
+
+@_node("dfa", "signal")
+def _dfa(signal):
+    return nonlinear.dfa_feature(*signal)
+
+
+@_node("d2", "signal")
+def _d2(signal):
+    return nonlinear.d2(*signal, max_points=nonlinear.D2_POINTS)
+
+
+# -------------------------------
+# Features: nombre -> (nodo, función del valor del nodo)
+# -------------------------------
+def _spread1(f0):
+    if not f0.size:
+        return np.nan
+    fo_bar = np.mean(f0)
+    return np.log(np.mean(np.abs(f0 - fo_bar)) / fo_bar)
+
+
+def _spread2_aprox(f0):
+    # L = log(|f0 - f̄| / f̄): spread1 ≈ su posición y esto su dispersión
+    # relativa std(L) / |media(L)|. No es el spread2 del dataset (definición
+    # no publicada); sólo orientativo
+    if not f0.size:
+        return np.nan
+    fo_bar = np.mean(f0)
+    dev = np.abs(f0 - fo_bar) / fo_bar
+    L = np.log(dev[dev > 0])
+    if L.size < 2:
+        return np.nan
+    return np.std(L) / abs(np.mean(L))
+
+
+def _mdvp_apq(shim):
+    return shim["apq3"] if not np.isnan(shim["apq3"]) else shim["apq5"]
+
+
+FEATURES: Dict[str, Tuple[str, Callable]] = {
+    "MDVP:Fo(Hz)": ("f0", lambda f0: np.mean(f0) if f0.size else np.nan),
+    "MDVP:Fhi(Hz)": ("f0", lambda f0: np.max(f0) if f0.size else np.nan),
+    "MDVP:Flo(Hz)": ("f0", lambda f0: np.min(f0) if f0.size else np.nan),
+    "MDVP:Jitter(%)": ("jitter", lambda j: j["local"]),
+    "MDVP:Jitter(Abs)": ("jitter", lambda j: j["local, absolute"]),
+    "MDVP:RAP": ("jitter", lambda j: j["rap"]),
+    "MDVP:PPQ": ("jitter", lambda j: j["ppq5"]),
+    "Jitter:DDP": ("jitter", lambda j: j["ddp"]),
+    "MDVP:Shimmer": ("shimmer", lambda s: s["local"]),
+    "MDVP:Shimmer(dB)": ("shimmer", lambda s: s["local_dB"]),
+    "Shimmer:APQ3": ("shimmer", lambda s: s["apq3"]),
+    "Shimmer:APQ5": ("shimmer", lambda s: s["apq5"]),
+    "MDVP:APQ": ("shimmer", _mdvp_apq),
+    "Shimmer:DDA": ("shimmer", lambda s: s["dda"]),
+    "NHR": ("harmonicity", lambda h: h["nhr"]),
+    "HNR": ("harmonicity", lambda h: h["hnr"]),
+    "spread1": ("f0", _spread1),
+    "spread2_aprox": ("f0", _spread2_aprox),
+    "RPDE": ("rpde", lambda v: v),
+    "DFA": ("dfa", lambda v: v),
+    "D2": ("d2", lambda v: v),
+    "PPE_aprox": ("f0", nonlinear.ppe),
+    "spectral_contrast": ("spectral", lambda s: s["contrast"]),
+}
+
+
+def required_nodes(features: Iterable[str]) -> List[str]:
+    """Nodos que hay que construir para ``features``, en orden topológico."""
+    orden: List[str] = []
+
+    def visitar(nodo: str):
+        if nodo in orden or nodo == "raw":
+            return
+        for dep in NODES[nodo][0]:
+            visitar(dep)
+        orden.append(nodo)
+
+    for f in features:
+        if f not in FEATURES:
+            raise KeyError(f"Feature desconocido '{f}'. Disponibles: {', '.join(FEATURES)}")
+        visitar(FEATURES[f][0])
+    return orden
+
+
+class FeatureContext:
+    """Nodos de una grabación, calculados bajo demanda y memorizados."""
+
+    def __init__(self, y: np.ndarray, sr: int):
+        self._values = {"raw": (y, sr)}
+        self.computed: List[str] = []
+
+    def node(self, name: str):
+        if name not in self._values:
+            deps, fn = NODES[name]
+            args = [self.node(d) for d in deps]
+            # Span por nodo sin sus dependencias: tiempo exclusivo de cada paso
+            with span(f"feature.{name}"):
+                self._values[name] = fn(*args)
+            self.computed.append(name)
+        return self._values[name]
+
+    def features(self, names: Iterable[str]) -> Dict[str, float]:
+        names = list(names)
+        required_nodes(names)  # valida los nombres antes de calcular nada
+        out = {}
+        for f in names:
+            nodo, fn = FEATURES[f]
+            v = float(fn(self.node(nodo)))
+            out[f] = 0.0 if np.isnan(v) else v
+        return out
+
+
+def extract_features(y: np.ndarray, sr: int, features: Iterable[str]) -> Dict[str, float]:
+    """Calcula sólo ``features`` (y los nodos que necesitan) desde la señal."""
+    return FeatureContext(y, sr).features(features)
+
+
+# -------------------------------
+# Comprobación frente al extractor original
+# -------------------------------
+def _baseline_features(y: np.ndarray, sr: int) -> Dict[str, float]:
+    """Extractor original de ``funcion`` (antes del grafo), paso a paso: WAV
+    temporal de 16 bits, "To PointProcess (periodic, cc)" 75-500 Hz,
+    ``to_pitch()`` para spread1 y shimmer de Praat."""
+    import soundfile as sf
+
+    y, _ = librosa.effects.trim(np.asarray(y, dtype=np.float32), top_db=TRIM_TOP_DB)
+    y = y / np.max(np.abs(y))
+    fd, tmp = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        sf.write(tmp, y, sr)
+        snd = parselmouth.Sound(tmp)
+    finally:
+        os.remove(tmp)
+    pp = call(snd, "To PointProcess (periodic, cc)", 75, 500)
+    f0 = snd.to_pitch().selected_array["frequency"]
+    args = (0, 0, 1e-4, 0.02, 1.3, 1.6)
+    apq = _safe([snd, pp], "Get shimmer (apq3)", *args)
+    if np.isnan(apq):
+        apq = _safe([snd, pp], "Get shimmer (apq5)", *args)
+    out = {
+        "spread1": _spread1(f0[f0 > 0]),
+        "MDVP:APQ": apq,
+        "MDVP:Shimmer": _safe([snd, pp], "Get shimmer (local)", *args),
+    }
+    return {f: 0.0 if np.isnan(v) else float(v) for f, v in out.items()}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Features de los modelos frente al extractor original.")
+    parser.add_argument("wavs", nargs="*", default=["recording.wav"])
+    parser.add_argument("--tol", type=float, default=0.001,
+                        help="Diferencia relativa máxima admitida por feature.")
+    args = parser.parse_args(argv)
+
+    try:
+        from .shimmer import synthetic_vowel  # type: ignore
+    except ImportError:
+        from shimmer import synthetic_vowel  # type: ignore
+
+    casos = [(w, *librosa.load(w, sr=None)) for w in args.wavs]
+    for i, (f0, jit, shim) in enumerate([(110, 0.005, 0.02), (150, 0.01, 0.05), (220, 0.02, 0.12)]):
+        y = synthetic_vowel(f0=f0, jitter=jit, shimmer=shim, seed=i)
+        casos.append((f"vocal sintética f0={f0} Hz, shimmer={shim}", y, 44100))
+    ok = True
+    for nombre, y, sr in casos:
+        ref = _baseline_features(y, sr)
+        nuevo = extract_features(y, sr, list(ref))
+        print(nombre)
+        for f, r in ref.items():
+            igual = abs(nuevo[f] - r) <= args.tol * max(abs(r), 1e-12)
+            ok = ok and igual
+            print(f"  {f:<13} original={r: .6f}  motor={nuevo[f]: .6f}  {'ok' if igual else 'DIFIERE'}")
+    return 0 if ok else 1
+
+
+__all__ = [
+    "FEATURES",
+    "NODES",
+    "PITCH_CEILING",
+    "PITCH_FLOOR",
+    "PITCH_SILENCE_THRESHOLD",
+    "FeatureContext",
+    "analyze_pitch",
+    "extract_features",
+    "required_nodes",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,26 +1,38 @@
 # -------------------------------
 # IMPORTS
 # -------------------------------
-import os, joblib, numpy as np, parselmouth, librosa, soundfile as sf, nolds
-from parselmouth.praat import call
-
-from sklearn.pipeline        import Pipeline
-from sklearn.preprocessing   import StandardScaler
-from sklearn.ensemble        import VotingClassifier, StackingClassifier
-from sklearn.linear_model    import LogisticRegression
-from sklearn.ensemble        import RandomForestClassifier
-from xgboost                 import XGBClassifier
-from sklearn.svm             import SVC
+import io, os, time, numpy as np, librosa
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Iterable, Iterator, Optional, Union
+
+from analysis_cache import cache, audio_key
+from model_registry import registry
+from feature_engine import extract_features
+from metrics import span
 # -------------------------------
-# 1) CARGAR EL NUEVO PIPELINE
+# 1) MODELOS (carga perezosa)
 # -------------------------------
-# Guardaste el pipeline así: {'scaler': StandardScaler(), 'model': SVC(...)}
-# ⇨  carpeta /models/  ──┐
-PIPE_SOFT  = "models/soft_voting_parkinson.joblib"
-PIPE_STACK = "models/stacking_parkinson.joblib"
+# Los pipelines de /models/ se cargan en el primer uso vía ``registry``:
+#   "soft"  -> Pipeline(StandardScaler + SoftVoting)
+#   "stack" -> Pipeline(StandardScaler + Stacking)
+#   "svm"   -> {'scaler': StandardScaler(), 'model': SVC(...)} (normalizado a Pipeline)
+
+def __getattr__(name):
+    # Compatibilidad: ``funcion.pipe_soft`` / ``funcion.pipe_stack`` siguen
+    # existiendo, pero sólo se cargan al accederlos.
+    if name == "pipe_soft":
+        return registry.get("soft")
+    if name == "pipe_stack":
+        return registry.get("stack")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Súbelo si cambia la extracción: invalida las entradas cacheadas.
+EXTRACTOR_VERSION = "4"
 
-pipe_soft  = joblib.load(PIPE_SOFT)   # Pipeline(StandardScaler + SoftVoting)
-pipe_stack = joblib.load(PIPE_STACK)  # Pipeline(StandardScaler + Stacking)
+# Con PARKINSON_COMPILED=1 se sirve desde la tabla precalculada
+# (compiled_predictor.py) cuando existe una vigente para el modelo.
+USE_COMPILED = os.getenv("PARKINSON_COMPILED", "0") == "1"
 
 
 
@@ -31,84 +43,237 @@ RANGE = {
     "MDVP:Shimmer": ( 0.009540,  0.119080),
 }
 
+def _read_bytes(wav_path: str) -> bytes:
+    with open(wav_path, "rb") as f:
+        return f.read()
+
+
 def extract_parkinson_features(wav_path: str) -> dict:
-    # — preprocesado igual que antes —
-    y, sr = librosa.load(wav_path, sr=None)
-    y, _ = librosa.effects.trim(y, top_db=20)
-    if y.size == 0:
-        raise ValueError("Audio vacío")
-    y = y / np.max(np.abs(y))
-    tmp = wav_path.replace(".wav", "_pp.wav")
-    sf.write(tmp, y, sr)
-
-    snd = parselmouth.Sound(tmp)
-    pp  = call(snd, "To PointProcess (periodic, cc)", 75, 500)
-
-    # 1) spread1 (misma fórmula que en entrenamiento)
-    f0 = snd.to_pitch().selected_array["frequency"]
-    f0 = f0[f0>0]
-    if f0.size:
-        fo_bar = np.mean(f0)
-        spread1 = np.log(np.mean(np.abs(f0 - fo_bar)) / fo_bar)
+    return extract_parkinson_features_from_bytes(_read_bytes(wav_path))
+
+
+def extract_parkinson_features_from_bytes(data: bytes) -> dict:
+    """Igual que ``extract_parkinson_features`` pero desde los bytes del WAV
+    (p.e. ``st.session_state.audio``), sin pasar por disco.
+
+    El resultado se cachea por hash del audio + EXTRACTOR_VERSION.
+    """
+    key = audio_key(data, "features", EXTRACTOR_VERSION)
+    feats = cache.get(key)
+    if feats is None:
+        with span("predict.decode"):
+            y, sr = librosa.load(io.BytesIO(data), sr=None)
+        with span("predict.extract"):
+            feats = extract_parkinson_features_from_array(y, sr)
+        cache.set(key, feats)
+    return feats
+
+
+def extract_parkinson_features_from_array(y: np.ndarray, sr: int) -> dict:
+    """
+    Extrae las features de MODEL_FEATURES desde una señal ya decodificada.
+
+    y: muestras mono (1-D) o multicanal con forma (canales, muestras).
+    El ``Sound`` de Praat se construye directamente desde el array, sin
+    escribir ni releer ningún WAV temporal.
+    """
+    # Recorte, normalización, Pitch compartido y shimmer: ver feature_engine
+    # (sólo se construyen los nodos que necesitan estas 3 features)
+    return extract_features(y, sr, MODEL_FEATURES)
+
+def _get_pipe(method: str):
+    """Pipeline del registro ("soft", "stack", "svm" o el nombre del .joblib)."""
+    return registry.get(method)
+
+
+def predict_features(X, method: str = "soft"):
+    """
+    Inferencia vectorizada sobre una matriz (n, 3) de features ya recortadas
+    (columnas en el orden de MODEL_FEATURES).
+
+    Escalador y ensemble se ejecutan una sola vez y las features escaladas
+    salen de la misma pasada. La etiqueta es la de ``predict``: en
+    Voting/Stacking coincide con el argmax de las probabilidades y se deriva
+    de ellas; en SVC/NuSVC las probabilidades (Platt) pueden contradecir a la
+    decisión, así que se pide ``predict`` sobre las features ya escaladas.
+
+    Devuelve (y_pred, proba, scaled) con formas (n,), (n, 2) y (n, 3).
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    if X.shape[1] != len(MODEL_FEATURES):
+        raise ValueError(f"X debe tener {len(MODEL_FEATURES)} columnas ({', '.join(MODEL_FEATURES)})")
+    if USE_COMPILED:
+        from compiled_predictor import load_compiled
+        comp = load_compiled(method)
+        if comp is not None:
+            return comp.predict_features(X)
+    from sklearn.svm import SVC, NuSVC  # ya cargado junto con el pipeline
+
+    pipe = _get_pipe(method)
+    scaled = pipe[:-1].transform(X)
+    est    = pipe[-1]
+    proba  = est.predict_proba(scaled)
+    if isinstance(est, (SVC, NuSVC)):
+        y_pred = est.predict(scaled)
     else:
-        spread1 = np.nan
-
-    # 2) MDVP:APQ (shimmer apq) — prueba tres métodos
-    apq = np.nan
-    for metodo in ["Get shimmer (apq)", "Get shimmer (apq3)", "Get shimmer (apq5)"]:
-        try:
-            val = call([snd, pp], metodo,
-                       0, 0,      # time range
-                       1e-4, 0.02, 1.3, 1.6)
-            if not np.isnan(val):
-                apq = val
-                break
-        except parselmouth.PraatError:
-            continue
-
-    # 3) MDVP:Shimmer (local)
+        y_pred = pipe.classes_[np.argmax(proba, axis=1)]
+    return y_pred, proba, scaled
+
+
+def _predictor_variant(method: str) -> str:
+    """Parte de la clave de caché que distingue pipeline real y tabla compilada
+    (con el hash del .npz: reconstruir la rejilla invalida sus resultados)."""
+    if USE_COMPILED:
+        from compiled_predictor import load_compiled
+        comp = load_compiled(method)
+        if comp is not None:
+            return f"compiled:{comp.grid_hash}"
+    return "exact"
+
+
+def predict_parkinson(audio: Union[str, bytes], method: str = "soft"):
+    """
+    audio:  ruta a un WAV o sus bytes ya en memoria (p.e. el buffer de la
+            sesión de Streamlit); con bytes no se toca el disco.
+    method: "soft" para Voting suave, "stack" para Stacking (o cualquier
+            otro modelo del registro, p.e. "svm")
+
+    Una grabación idéntica (mismo contenido, extractor y modelo) se sirve
+    desde la caché sin volver a ejecutar librosa, Praat ni el ensemble.
+    """
+    registry.resolve(method)
+    data = bytes(audio) if isinstance(audio, (bytes, bytearray)) else _read_bytes(audio)
+    with span("predict.cache"):
+        key  = audio_key(data, "predict", EXTRACTOR_VERSION, method, registry.version(method),
+                         _predictor_variant(method))
+        hit  = cache.get(key)
+    if hit is not None:
+        return hit
+
+    # Cada etapa del cálculo es un span hijo de "predict" (ver metrics.py);
+    # los aciertos de caché no lo pisan
+    with span("predict", method=method):
+        # --- 2) Extrae y recorta características igual que antes ---
+        raw     = extract_parkinson_features_from_bytes(data)
+        clipped = { f: np.clip(raw[f], *RANGE[f]) for f in MODEL_FEATURES }
+        X       = np.array([clipped[f] for f in MODEL_FEATURES]).reshape(1, -1)
+
+        # --- 3) Escalado interno + predicción (una sola pasada) ---
+        with span("predict.ensemble"):
+            y_pred, proba, scaled_vals = predict_features(X, method)
+
+        # --- 4) Features escaladas de la misma pasada ---
+        scaled = { f: scaled_vals[0][i] for i, f in enumerate(MODEL_FEATURES) }
+
+        result = (raw, clipped, scaled, y_pred[0], proba[0])
+        cache.set(key, result)
+    return result
+
+
+# -------------------------------
+# 5) SCORING POR LOTES
+# -------------------------------
+def _extract_safe(wav_path: str):
+    """Versión de ``extract_parkinson_features`` para el pool de procesos.
+
+    Nunca lanza: devuelve ``(ruta, features, error)`` para que un archivo
+    defectuoso no aborte el lote completo.
+    """
     try:
-        shimmer = call([snd, pp],
-                       "Get shimmer (local)",
-                       0, 0, 1e-4, 0.02, 1.3, 1.6)
-    except parselmouth.PraatError:
-        shimmer = np.nan
-
-    # limpio archivo temporal
-    try: os.remove(tmp)
-    except OSError: pass
-
-    # convierto NaN→0.0 para clipping y devuelvo solo las 3
-    return {
-        "spread1":      float(0.0 if np.isnan(spread1) else spread1),
-        "MDVP:APQ":     float(0.0 if np.isnan(apq)      else apq),
-        "MDVP:Shimmer": float(0.0 if np.isnan(shimmer) else shimmer)
-    }
-
-def predict_parkinson(wav_path: str, method: str = "soft"):
+        return wav_path, extract_parkinson_features(wav_path), None
+    except Exception as e:
+        return wav_path, None, f"{type(e).__name__}: {e}"
+
+
+def _score_chunk(method: str, pendientes: list) -> Iterator[dict]:
+    """Escala y predice de una sola vez todas las filas acumuladas."""
+    X = np.array([[r["clipped"][f] for f in MODEL_FEATURES] for r in pendientes])
+    y_pred, proba, _ = predict_features(X, method)
+    for rec, y, p in zip(pendientes, y_pred, proba):
+        rec.pop("clipped")
+        rec["pred"] = int(y)
+        rec["p_parkinson"] = float(p[0])
+        rec["p_sano"] = float(p[1])
+        yield rec
+
+
+def predict_parkinson_batch(
+    paths: Iterable[str],
+    method: str = "soft",
+    workers: Optional[int] = None,
+    chunk_size: int = 64,
+    flush_interval: float = 1.0,
+) -> Iterator[dict]:
     """
-    method: "soft" para Voting suave, "stack" para Stacking
+    Puntúa muchos WAV: la extracción se reparte en un pool de procesos y el
+    pipeline se ejecuta una vez por bloque de ``chunk_size`` filas. Un bloque
+    incompleto se puntúa igualmente cuando lleva ``flush_interval`` segundos
+    esperando o el pool no entrega nada en ese tiempo, para que los
+    resultados no se queden retenidos mientras se extraen archivos lentos.
+
+    Devuelve un generador de dicts (uno por archivo, en orden de finalización):
+        path, status ("ok" | "error"), error, pred, p_parkinson, p_sano,
+        más los valores brutos de MODEL_FEATURES.
+    Si un proceso del pool muere (BrokenProcessPool), los archivos que
+    quedaban se devuelven con status "error" en lugar de abortar el lote.
+    workers: nº de procesos (None = os.cpu_count(), 1 = sin pool).
     """
+    if workers is not None and workers < 1:
+        raise ValueError(f"workers debe ser >= 1 (recibido {workers})")
+    if not flush_interval > 0:  # con 0 el bucle de espera giraría sin pausa
+        raise ValueError(f"flush_interval debe ser > 0 (recibido {flush_interval})")
+    registry.resolve(method)  # valida antes de lanzar el pool
+    paths = [str(p) for p in paths]
+    pendientes: list = []
+    desde = 0.0  # instante en que entró la primera fila del bloque actual
 
-    # --- 2) Extrae y recorta características igual que antes ---
-    raw     = extract_parkinson_features(wav_path)
-    clipped = { f: np.clip(raw[f], *RANGE[f]) for f in MODEL_FEATURES }
-    X       = np.array([clipped[f] for f in MODEL_FEATURES]).reshape(1, -1)
-
-    # --- 3) Escalado interno + predicción ---
-    if method == "soft":
-        y_pred = pipe_soft.predict(X)[0]
-        proba  = pipe_soft.predict_proba(X)[0]
-        scaler = pipe_soft.named_steps['scaler']
-    elif method == "stack":
-        y_pred = pipe_stack.predict(X)[0]
-        proba  = pipe_stack.predict_proba(X)[0]
-        scaler = pipe_stack.named_steps['scaler']
-    else:
-        raise ValueError("method debe ser 'soft' o 'stack'")
+    def _registro(wav_path, raw, error):
+        if error is not None:
+            return {"path": wav_path, "status": "error", "error": error}
+        clipped = { f: float(np.clip(raw[f], *RANGE[f])) for f in MODEL_FEATURES }
+        return {"path": wav_path, "status": "ok", "error": "", **raw, "clipped": clipped}
 
-    # --- 4) Si quieres exponer también las features escaladas ---
-    scaled_vals = scaler.transform(X)[0]
-    scaled = { f: scaled_vals[i] for i, f in enumerate(MODEL_FEATURES) }
+    def _resultados():
+        # Produce (ruta, features, error); ``None`` = el pool lleva
+        # ``flush_interval`` segundos sin entregar nada
+        if workers == 1:
+            for p in paths:
+                yield _extract_safe(p)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futuros = {}
+            try:
+                for p in paths:
+                    futuros[pool.submit(_extract_safe, p)] = p
+            except BrokenProcessPool as e:
+                for p in paths[len(futuros):]:
+                    yield p, None, f"BrokenProcessPool: {e}"
+            restantes = set(futuros)
+            while restantes:
+                hechos, restantes = wait(restantes, timeout=flush_interval, return_when=FIRST_COMPLETED)
+                if not hechos:
+                    yield None
+                for fut in hechos:
+                    try:
+                        yield fut.result()
+                    except BrokenProcessPool as e:
+                        yield futuros[fut], None, f"BrokenProcessPool: {e}"
 
-    return raw, clipped, scaled, y_pred, proba
\ No newline at end of file
+    for item in _resultados():
+        if item is not None:
+            rec = _registro(*item)
+            if rec["status"] == "error":
+                yield rec
+            else:
+                if not pendientes:
+                    desde = time.monotonic()
+                pendientes.append(rec)
+        if pendientes and (
+            item is None
+            or len(pendientes) >= chunk_size
+            or time.monotonic() - desde >= flush_interval
+        ):
+            yield from _score_chunk(method, pendientes)
+            pendientes = []
+    if pendientes:
+        yield from _score_chunk(method, pendientes)
@@ -0,0 +1,127 @@
+"""Caché persistente de respuestas Gemini (SQLite, TTL + LRU).
+
+Los prompts dependen de muy pocos datos: las interpretaciones sólo de los
+tres valores recortados y las recomendaciones de un nombre y dos
+probabilidades. La clave se forma con el nombre del builder y las entradas
+normalizadas:
+
+  - Probabilidades redondeadas a ``GEMINI_CACHE_PRECISION`` (por defecto
+    0.01). El prompt se construye con el valor redondeado para que la
+    respuesta cacheada corresponda exactamente a su clave.
+  - El nombre del paciente no forma parte de la clave: al guardar se
+    sustituye por una plantilla (``{{paciente}}`` / ``{{nombre}}``) y al leer
+    se rellena con el nombre actual. Si la respuesta contiene alguna otra
+    parte del nombre (por corta que sea, en cualquier capitalización), no
+    se cachea.
+
+Variables de entorno:
+    GEMINI_CACHE              "0" desactiva la caché (por defecto activa)
+    GEMINI_CACHE_PATH         archivo SQLite (por defecto .cache/gemini_cache.sqlite)
+    GEMINI_CACHE_TTL          segundos de vida (por defecto 7 días)
+    GEMINI_CACHE_MAX_ENTRIES  máximo de respuestas guardadas (por defecto 2000)
+    GEMINI_CACHE_PRECISION    resolución de las probabilidades (por defecto 0.01)
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+try:
+    from .sqlite_cache import SQLiteCache  # type: ignore
+except ImportError:
+    from sqlite_cache import SQLiteCache  # type: ignore
+
+_SLOT_FULL = "{{paciente}}"
+_SLOT_FIRST = "{{nombre}}"
+
+
+def bucket(p: float, precision: float) -> float:
+    """Redondea una probabilidad a múltiplos de ``precision``."""
+    if precision <= 0:
+        return float(p)
+    return round(round(float(p) / precision) * precision, 10)
+
+
+def _name_tokens(paciente: str):
+    return paciente.split()
+
+
+def _word(token: str) -> str:
+    # Límites por "no alfanumérico" (``\b`` falla con tokens como "J.")
+    return rf"(?<!\w){re.escape(token)}(?!\w)"
+
+
+def to_template(text: str, paciente: str) -> Optional[str]:
+    """Sustituye el nombre por plantillas; ``None`` si quedan restos del nombre
+    (cualquier parte, sin distinguir mayúsculas, también las de 1-2 letras)."""
+    paciente = (paciente or "").strip()
+    if not paciente:
+        return text
+    out = text.replace(paciente, _SLOT_FULL)
+    tokens = _name_tokens(paciente)
+    out = re.sub(_word(tokens[0]), _SLOT_FIRST, out)
+    if any(re.search(_word(t), out, flags=re.IGNORECASE) for t in tokens):
+        return None
+    return out
+
+
+def from_template(text: str, paciente: str) -> str:
+    paciente = (paciente or "").strip()
+    tokens = _name_tokens(paciente)
+    first = tokens[0] if tokens else paciente
+    return text.replace(_SLOT_FULL, paciente).replace(_SLOT_FIRST, first)
+
+
+class GeminiResponseCache:
+    def __init__(self, path, ttl: float, max_entries: int, precision: float):
+        self.store = SQLiteCache(path, ttl=ttl, max_entries=max_entries)
+        self.precision = precision
+
+    @classmethod
+    def from_env(cls) -> Optional["GeminiResponseCache"]:
+        if os.getenv("GEMINI_CACHE", "1") == "0":
+            return None
+        default_path = Path(__file__).resolve().parent / ".cache" / "gemini_cache.sqlite"
+        try:
+            return cls(
+                os.getenv("GEMINI_CACHE_PATH") or default_path,
+                ttl=float(os.getenv("GEMINI_CACHE_TTL", str(7 * 24 * 3600))),
+                max_entries=int(os.getenv("GEMINI_CACHE_MAX_ENTRIES", "2000")),
+                precision=float(os.getenv("GEMINI_CACHE_PRECISION", "0.01")),
+            )
+        except Exception:
+            # Sin disco escribible la app sigue funcionando, sólo sin caché
+            return None
+
+    def bucket(self, p: float) -> float:
+        return bucket(p, self.precision)
+
+    @staticmethod
+    def key(builder: str, *inputs) -> str:
+        raw = json.dumps([builder, *inputs], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, paciente: str = "") -> Optional[str]:
+        try:
+            value = self.store.get(key)
+        except Exception:
+            return None
+        return None if value is None else from_template(value, paciente)
+
+    def set(self, key: str, text: str, paciente: str = "") -> None:
+        if not text:
+            return
+        plantilla = to_template(text, paciente)
+        if plantilla is None:
+            return
+        try:
+            self.store.set(key, plantilla)
+        except Exception:
+            pass
+
+
+__all__ = ["GeminiResponseCache", "bucket", "from_template", "to_template"]
@@ -2,10 +2,25 @@
 
 Extraído de app.py para desacoplar la vista Streamlit de las llamadas HTTP.
 
-Funciones expuestas:
-    get_feature_interpretations(detalles: str) -> str
-    get_short_recommendation(paciente: str, sano_p: float, park_p: float) -> str
-    get_long_recommendation(paciente: str, sano_p: float, park_p: float) -> str
+Funciones expuestas (``idioma`` opcional, "es" por defecto: la IA responde
+directamente en ese idioma):
+    get_feature_interpretations(detalles, idioma) -> str
+    get_short_recommendation(paciente, sano_p, park_p, idioma) -> str
+    get_long_recommendation(paciente, sano_p, park_p, idioma) -> str
+    get_combined_analysis(detalles, paciente, sano_p, park_p, idioma) -> AnalysisTexts
+        (una sola petición con respuesta JSON)
+    get_analysis_texts(detalles, paciente, sano_p, park_p, idioma) -> AnalysisTexts
+        (petición combinada; lo que falte se pide con las tres anteriores
+        lanzadas a la vez en un pool de hilos)
+    stream_analysis_texts(detalles, paciente, sano_p, park_p, idioma) -> Iterator[AnalysisTexts]
+        (igual, pero vía streamGenerateContent/SSE: instantáneas progresivas)
+
+Transporte: una ``requests.Session`` keep-alive compartida y un planificador
+de claves con enfriamiento (403/429), circuit breaker (5xx/red) y token
+bucket por clave (GEMINI_KEY_RATE peticiones/s, ráfaga GEMINI_KEY_BURST).
+
+El endpoint puede sobrescribirse con GEMINI_API_URL (p.e. el servidor local
+de ``gemini_stub.py`` para pruebas).
 
 Nota: Por seguridad se recomienda mover el API key a una variable de entorno
       y leerla con os.getenv('GEMINI_KEY'). Aquí se mantiene literal
@@ -13,9 +28,16 @@ Nota: Por seguridad se recomienda mover el API key a una variable de entorno
 """
 from __future__ import annotations
 
+import contextvars
+import json
 import os
+import threading
+import time
 import requests
-from typing import Optional, Iterable
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Iterable
 from pathlib import Path
 
 # Carga manual de .env (sin dependencia externa) si existe en el directorio del proyecto.
@@ -47,14 +69,30 @@ try:
         build_feature_interpretations_prompt,
         build_short_recommendation_prompt,
         build_long_recommendation_prompt,
+        build_combined_analysis_prompt,
+        parse_combined_analysis_response,
+        parse_partial_combined_response,
     )  # type: ignore
 except ImportError:
     from gemini_prompts import (
         build_feature_interpretations_prompt,
         build_short_recommendation_prompt,
         build_long_recommendation_prompt,
+        build_combined_analysis_prompt,
+        parse_combined_analysis_response,
+        parse_partial_combined_response,
     )  # type: ignore
 
+try:
+    from .gemini_cache import GeminiResponseCache  # type: ignore
+except ImportError:
+    from gemini_cache import GeminiResponseCache  # type: ignore
+
+try:
+    from .metrics import metrics, span  # type: ignore
+except ImportError:
+    from metrics import metrics, span  # type: ignore
+
 # Claves disponibles (failover). Se permiten 3 nombres por compatibilidad.
 GEMINI_KEY: str | None = os.getenv("GEMINI_KEY")  # retro-compatibilidad
 PRIMARY_ENV = os.getenv("PRIMARY_GEMINI_KEY")
@@ -63,6 +101,11 @@ SECONDARY_ENV = os.getenv("SECONDARY_GEMINI_KEY")
 _API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash-latest:generateContent"
 
 
+def _api_url() -> str:
+    # Se lee en cada llamada para poder apuntar a un servidor local en pruebas.
+    return os.getenv("GEMINI_API_URL") or _API_URL
+
+
 class GeminiError(RuntimeError):
     pass
 
@@ -83,67 +126,504 @@ def _iter_keys() -> Iterable[str]:
                         yield k
 
 
-def _post_prompt(prompt: str, timeout: int = 12) -> str:
+# ---------------------------------------------------------------------------
+# Transporte: sesión HTTP compartida + planificador de claves
+# ---------------------------------------------------------------------------
+
+# Una sesión keep-alive para todo el proceso: las peticiones reutilizan la
+# conexión TCP+TLS en lugar de abrir una nueva por prompt.
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
+
+@dataclass
+class _KeyState:
+    key: str
+    tokens: float
+    updated: float
+    cooldown_until: float = 0.0
+    failures: int = 0
+    strikes: int = 0          # enfriamientos consecutivos (backoff exponencial)
+    last_used: float = 0.0
+
+
+class _KeyScheduler:
+    """Salud por clave + token bucket para repartir la carga.
+
+    - Errores de la clave (403/429, o un 400 ``API_KEY_INVALID``, ver
+      ``_error_kind``): la clave entra en enfriamiento de inmediato
+      (``Retry-After`` si viene, si no backoff exponencial).
+    - 5xx / error de red: tras ``failure_threshold`` fallos seguidos se abre
+      el circuito y la clave se enfría igual.
+    - Sólo se usan claves con token (``rate`` por segundo, hasta ``burst``),
+      de más tokens a menos y de uso más antiguo a más reciente: el tráfico
+      se reparte en vez de cargar siempre la primera, y si todas están sin
+      token ``_send`` espera al siguiente.
+    """
+
+    def __init__(
+        self,
+        keys: List[str],
+        rate: float = 0.25,
+        burst: float = 5.0,
+        base_cooldown: float = 30.0,
+        max_cooldown: float = 600.0,
+        failure_threshold: int = 3,
+    ):
+        now = time.monotonic()
+        self.rate = rate
+        self.burst = burst
+        self.base_cooldown = base_cooldown
+        self.max_cooldown = max_cooldown
+        self.failure_threshold = failure_threshold
+        self._states = [_KeyState(k, burst, now) for k in keys]
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, keys: List[str]) -> "_KeyScheduler":
+        return cls(
+            keys,
+            rate=float(os.getenv("GEMINI_KEY_RATE", "0.25")),
+            burst=float(os.getenv("GEMINI_KEY_BURST", "5")),
+            base_cooldown=float(os.getenv("GEMINI_KEY_COOLDOWN", "30")),
+            max_cooldown=float(os.getenv("GEMINI_KEY_MAX_COOLDOWN", "600")),
+            failure_threshold=int(os.getenv("GEMINI_KEY_FAILURES", "3")),
+        )
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def _state(self, key: str) -> _KeyState:
+        return next(st for st in self._states if st.key == key)
+
+    def _refill(self, now: float) -> None:
+        for st in self._states:
+            st.tokens = min(self.burst, st.tokens + (now - st.updated) * self.rate)
+            st.updated = now
+
+    def order(self) -> List[str]:
+        """Claves utilizables (fuera de enfriamiento y con token), de mejor a peor."""
+        now = time.monotonic()
+        with self._lock:
+            self._refill(now)
+            listas = [st for st in self._states if st.cooldown_until <= now and st.tokens >= 1.0]
+            listas.sort(key=lambda st: (-st.tokens, st.last_used))
+            return [st.key for st in listas]
+
+    def next_token_in(self) -> float:
+        """Segundos hasta que alguna clave fuera de enfriamiento tenga token
+        (``inf`` si todas están enfriándose)."""
+        now = time.monotonic()
+        with self._lock:
+            self._refill(now)
+            esperas = [
+                max(0.0, (1.0 - st.tokens) / self.rate) if self.rate > 0 else float("inf")
+                for st in self._states if st.cooldown_until <= now
+            ]
+            return min(esperas, default=float("inf"))
+
+    def acquire(self, key: str) -> bool:
+        """Gasta un token de ``key``; False si otro hilo se lo llevó antes."""
+        now = time.monotonic()
+        with self._lock:
+            self._refill(now)
+            st = self._state(key)
+            if st.tokens < 1.0:
+                return False
+            st.tokens -= 1.0
+            st.last_used = now
+            return True
+
+    def success(self, key: str) -> None:
+        with self._lock:
+            st = self._state(key)
+            st.failures = 0
+            st.strikes = 0
+
+    def failure(
+        self, key: str, status: Optional[int] = None, retry_after: Optional[float] = None, key_error: bool = False
+    ) -> None:
+        with self._lock:
+            st = self._state(key)
+            if key_error or status in (403, 429):
+                self._cool(st, retry_after)
+                return
+            st.failures += 1
+            if st.failures >= self.failure_threshold:
+                self._cool(st, retry_after)
+
+    def _cool(self, st: _KeyState, retry_after: Optional[float]) -> None:
+        wait = retry_after if retry_after else self.base_cooldown * (2 ** st.strikes)
+        st.cooldown_until = time.monotonic() + min(wait, self.max_cooldown)
+        st.strikes += 1
+        st.failures = 0
+
+    def next_available_in(self) -> float:
+        now = time.monotonic()
+        with self._lock:
+            return max(0.0, min((st.cooldown_until for st in self._states), default=0.0) - now)
+
+
+_scheduler = _KeyScheduler.from_env(list(_iter_keys()))
+
+
+def _retry_after(res) -> Optional[float]:
+    try:
+        return float(res.headers.get("Retry-After", ""))
+    except ValueError:
+        return None
+
+
+def _payload(prompt: str, json_mode: bool) -> dict:
+    """json_mode pide ``responseMimeType: application/json`` a la API."""
+    payload = {"contents": [{"parts": [{"text": prompt}]}]}
+    if json_mode:
+        payload["generationConfig"] = {"responseMimeType": "application/json"}
+    return payload
+
+
+def _chunk_text(data: dict) -> str:
+    return (
+        data.get("candidates", [{}])[0]
+        .get("content", {})
+        .get("parts", [{}])[0]
+        .get("text", "")
+    ) or ""
+
+
+# Errores que dependen de la clave: Gemini responde a una clave inválida o
+# caducada con 400 INVALID_ARGUMENT + reason API_KEY_INVALID, así que no basta
+# con el código HTTP
+_KEY_HTTP_STATUS = frozenset({401, 403, 429})
+_KEY_RPC_STATUS = frozenset({"UNAUTHENTICATED", "PERMISSION_DENIED", "RESOURCE_EXHAUSTED"})
+_KEY_REASONS = frozenset({
+    "API_KEY_INVALID", "API_KEY_EXPIRED", "API_KEY_SERVICE_BLOCKED", "API_KEY_HTTP_REFERRER_BLOCKED",
+    "API_KEY_IP_ADDRESS_BLOCKED", "SERVICE_DISABLED", "CONSUMER_INVALID", "BILLING_DISABLED",
+})
+
+
+def _error_kind(res) -> str:
+    """Clasifica una respuesta de error:
+
+    "key"        la clave no sirve o agotó su cuota: otra clave puede funcionar
+    "transient"  5xx / 408: se reintenta con otra clave
+    "request"    la petición es inválida (400 de verdad, 404, ...): fallará
+                 igual con cualquier clave
+    """
+    try:
+        body = res.json()
+    except ValueError:
+        body = None
+    err = body.get("error") if isinstance(body, dict) else None
+    err = err if isinstance(err, dict) else {}
+    detalles = err.get("details") if isinstance(err.get("details"), list) else []
+    reasons = {d.get("reason") for d in detalles if isinstance(d, dict)}
+    if (
+        res.status_code in _KEY_HTTP_STATUS
+        or err.get("status") in _KEY_RPC_STATUS
+        or reasons & _KEY_REASONS
+        or "api key" in str(err.get("message", "")).lower()
+    ):
+        return "key"
+    if res.status_code >= 500 or res.status_code == 408:
+        return "transient"
+    return "request"
+
+
+def _send(url: str, payload: dict, timeout: int, stream: bool = False, params: Optional[dict] = None):
+    """Envía la petición con la primera clave sana que responda sin error.
+
+    Devuelve la respuesta (abierta si ``stream``); lanza GeminiError si todas
+    las claves fallan o están en enfriamiento, o en cuanto un error indica
+    que la petición en sí es inválida (``_error_kind`` == "request"). Si
+    todas las claves sanas se han quedado sin token se espera al siguiente
+    (como mucho ``timeout`` segundos).
+    """
+    if not len(_scheduler):
+        raise GeminiError("No hay claves Gemini configuradas.")
+    keys = _scheduler.order()
+    while not keys:
+        espera = _scheduler.next_token_in()
+        if espera == float("inf"):
+            raise GeminiError(
+                f"Todas las claves Gemini están en enfriamiento (próxima en {_scheduler.next_available_in():.0f} s)."
+            )
+        if espera > timeout:
+            raise GeminiError(f"Todas las claves Gemini han agotado su ritmo (próximo token en {espera:.0f} s).")
+        time.sleep(espera)
+        keys = _scheduler.order()
+
     last_error: Optional[Exception] = None
-    for key in _iter_keys():
+    for key in keys:
+        if not _scheduler.acquire(key):
+            continue
         try:
-            res = requests.post(
-                _API_URL,
-                params={"key": key},
+            res = _session.post(
+                url,
+                params={"key": key, **(params or {})},
                 headers={"Content-Type": "application/json"},
-                json={"contents": [{"parts": [{"text": prompt}]}]},
+                json=payload,
                 timeout=timeout,
+                stream=stream,
             )
         except requests.RequestException as e:
             # Error de red, prueba siguiente clave
+            _scheduler.failure(key)
             last_error = e
             continue
 
         if res.status_code >= 400:
-            # Errores 4xx/5xx: intentar siguiente clave (p.e. 403 quota agotada)
-            last_error = GeminiError(
+            error = GeminiError(
                 f"Gemini devolvió {res.status_code} con la clave terminada en ...{key[-6:]}: {res.text[:160]}"
             )
+            kind = _error_kind(res)
+            res.close()
+            if kind == "request":
+                # La petición falla igual con cualquier clave: ni se penaliza
+                # la clave ni se reintenta con las demás
+                raise error
+            # Clave inválida/sin cuota (se enfría ya) o fallo del servidor
+            # (cuenta para el circuito): se prueba la siguiente
+            _scheduler.failure(key, res.status_code, _retry_after(res), key_error=kind == "key")
+            last_error = error
             continue
 
-        data = res.json()
-        text = (
-            data.get("candidates", [{}])[0]
-            .get("content", {})
-            .get("parts", [{}])[0]
-            .get("text", "")
-        )
-        return text or ""
+        _scheduler.success(key)
+        return res
 
-    if last_error is None:
-        raise GeminiError("No hay claves Gemini configuradas.")
     if isinstance(last_error, GeminiError):
         raise last_error
+    if last_error is None:
+        raise GeminiError("Otras peticiones agotaron los tokens de todas las claves Gemini.")
     raise GeminiError(f"Error de red al llamar Gemini: {last_error}")
 
 
-def get_feature_interpretations(detalles: str) -> str:
-    """Genera interpretaciones por variable.
+def _post_prompt(prompt: str, timeout: int = 12, json_mode: bool = False) -> str:
+    with span("gemini.post", json_mode=json_mode):
+        res = _send(_api_url(), _payload(prompt, json_mode), timeout)
+        return _chunk_text(res.json())
+
+
+def _stream_prompt(prompt: str, timeout: int = 20, json_mode: bool = False) -> Iterator[str]:
+    """Como ``_post_prompt`` pero vía ``streamGenerateContent`` (SSE): va
+    devolviendo los fragmentos de texto a medida que la API los genera."""
+    url = _api_url().replace(":generateContent", ":streamGenerateContent")
+    # Un generador no puede abrir un span (el consumidor anidaría los suyos
+    # dentro): se mide a mano hasta el primer fragmento y hasta el final
+    t0 = time.perf_counter()
+    error = None
+    primero = True
+    try:
+        res = _send(url, _payload(prompt, json_mode), timeout, stream=True, params={"alt": "sse"})
+    except GeminiError:
+        metrics.observe("gemini.stream", time.perf_counter() - t0, error="GeminiError")
+        raise
+    try:
+        for raw in res.iter_lines():
+            line = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+            if not line.startswith("data:"):
+                continue
+            text = _chunk_text(json.loads(line[5:].strip()))
+            if text:
+                if primero:
+                    metrics.observe("gemini.stream.first_chunk", time.perf_counter() - t0)
+                    primero = False
+                yield text
+    except (requests.RequestException, ValueError) as e:
+        error = "GeminiError"
+        raise GeminiError(f"Streaming de Gemini interrumpido: {e}")
+    finally:
+        res.close()
+        metrics.observe("gemini.stream", time.perf_counter() - t0, error=error)
+
+
+# Caché persistente de respuestas (None si está desactivada: GEMINI_CACHE=0)
+_cache = GeminiResponseCache.from_env()
+
+
+def _cached_prompt(
+    builder: str, key_inputs: tuple, build, timeout: int, paciente: str = "", json_mode: bool = False
+) -> str:
+    """Consulta la caché por (builder, entradas normalizadas) antes de ir a la red."""
+    if _cache is None:
+        return _post_prompt(build(), timeout=timeout, json_mode=json_mode)
+    key = _cache.key(builder, *key_inputs)
+    hit = _cache.get(key, paciente)
+    if hit is not None:
+        return hit
+    text = _post_prompt(build(), timeout=timeout, json_mode=json_mode)
+    _cache.set(key, text, paciente)
+    return text
+
+
+def _bucketed(sano_p: float, park_p: float):
+    if _cache is None:
+        return sano_p, park_p
+    return _cache.bucket(sano_p), _cache.bucket(park_p)
+
+
+def get_feature_interpretations(detalles: str, idioma: str = "es") -> str:
+    """Genera interpretaciones por variable (en ``idioma``).
 
     'detalles' es el bloque multilinea que arma la vista/servicio con:
         feature: descripcion | Valor actual (clip): X.YYY
     """
-    prompt = build_feature_interpretations_prompt(detalles)
-    return _post_prompt(prompt, timeout=15)
+    return _cached_prompt(
+        "feature_interpretations", (detalles, idioma),
+        lambda: build_feature_interpretations_prompt(detalles, idioma), timeout=15,
+    )
+
+
+def get_short_recommendation(paciente: str, sano_p: float, park_p: float, idioma: str = "es") -> str:
+    sano_p, park_p = _bucketed(sano_p, park_p)
+    return _cached_prompt(
+        "short_recommendation", (sano_p, park_p, idioma),
+        lambda: build_short_recommendation_prompt(paciente, sano_p, park_p, idioma), timeout=10,
+        paciente=paciente,
+    )
+
 
+def get_long_recommendation(paciente: str, sano_p: float, park_p: float, idioma: str = "es") -> str:
+    sano_p, park_p = _bucketed(sano_p, park_p)
+    return _cached_prompt(
+        "long_recommendation", (sano_p, park_p, idioma),
+        lambda: build_long_recommendation_prompt(paciente, sano_p, park_p, idioma), timeout=18,
+        paciente=paciente,
+    )
 
-def get_short_recommendation(paciente: str, sano_p: float, park_p: float) -> str:
-    prompt = build_short_recommendation_prompt(paciente, sano_p, park_p)
-    return _post_prompt(prompt, timeout=10)
 
+# ---------------------------------------------------------------------------
+# Fan-out concurrente de las tres llamadas por análisis
+# ---------------------------------------------------------------------------
 
-def get_long_recommendation(paciente: str, sano_p: float, park_p: float) -> str:
-    prompt = build_long_recommendation_prompt(paciente, sano_p, park_p)
-    return _post_prompt(prompt, timeout=18)
+@dataclass
+class AnalysisTexts:
+    """Textos IA de un análisis. ``errores`` guarda el GeminiError de cada
+    campo que falló (el campo queda vacío) para que la vista elija su fallback.
+
+    ``por_variable`` trae las interpretaciones ya estructuradas cuando vienen
+    de la petición combinada; si está vacío, ``interpretaciones`` es texto
+    libre a parsear con ``parse_feature_interpretations_response``."""
+    interpretaciones: str = ""
+    recomendacion_breve: str = ""
+    recomendacion_extensa: str = ""
+    errores: Dict[str, GeminiError] = field(default_factory=dict)
+    por_variable: Dict[str, str] = field(default_factory=dict)
+
+
+# Pool compartido por todas las sesiones; cada análisis usa 3 hilos a la vez.
+_executor = ThreadPoolExecutor(max_workers=12, thread_name_prefix="gemini")
+
+
+def _combined_request(detalles: str, paciente: str, sano_p: float, park_p: float, idioma: str):
+    """(clave de caché, builder del prompt, features) de la petición combinada."""
+    sano_p, park_p = _bucketed(sano_p, park_p)
+    key = _cache.key("combined_analysis", detalles, sano_p, park_p, idioma) if _cache is not None else None
+    build = lambda: build_combined_analysis_prompt(detalles, paciente, sano_p, park_p, idioma)
+    features = [ln.split(": ", 1)[0] for ln in detalles.splitlines() if ": " in ln]
+    return key, build, features
+
+
+def _texts_from_parsed(parsed: dict) -> AnalysisTexts:
+    por_variable = parsed["interpretaciones"]
+    return AnalysisTexts(
+        interpretaciones="\n".join(f"{k}: {v}" for k, v in por_variable.items()),
+        recomendacion_breve=parsed["recomendacion_breve"],
+        recomendacion_extensa=parsed["recomendacion_extensa"],
+        por_variable=dict(por_variable),
+    )
+
+
+def get_combined_analysis(
+    detalles: str, paciente: str, sano_p: float, park_p: float, idioma: str = "es"
+) -> AnalysisTexts:
+    """Una sola petición (JSON) con interpretaciones y ambas recomendaciones.
+
+    Los campos que la respuesta no traiga quedan vacíos.
+    """
+    key, build, features = _combined_request(detalles, paciente, sano_p, park_p, idioma)
+    text = _cache.get(key, paciente) if key else None
+    if text is None:
+        text = _post_prompt(build(), timeout=20, json_mode=True)
+        if key:
+            _cache.set(key, text, paciente)
+    return _texts_from_parsed(parse_combined_analysis_response(text, features))
+
+
+def _fill_missing(
+    result: AnalysisTexts, detalles: str, paciente: str, sano_p: float, park_p: float, idioma: str
+) -> AnalysisTexts:
+    """Pide con sus prompts individuales (a la vez) los campos aún vacíos."""
+    individuales = {
+        "interpretaciones": (get_feature_interpretations, (detalles, idioma)),
+        "recomendacion_breve": (get_short_recommendation, (paciente, sano_p, park_p, idioma)),
+        "recomendacion_extensa": (get_long_recommendation, (paciente, sano_p, park_p, idioma)),
+    }
+    tareas = {
+        # Copia del contexto por tarea: sus spans cuelgan del span abierto ("ia")
+        campo: _executor.submit(contextvars.copy_context().run, fn, *args)
+        for campo, (fn, args) in individuales.items()
+        if not getattr(result, campo)
+    }
+    for campo, fut in tareas.items():
+        try:
+            setattr(result, campo, fut.result())
+        except GeminiError as e:
+            result.errores[campo] = e
+    return result
+
+
+def get_analysis_texts(
+    detalles: str, paciente: str, sano_p: float, park_p: float, idioma: str = "es"
+) -> AnalysisTexts:
+    """Textos IA de un análisis con el mínimo de round trips, ya en ``idioma``.
+
+    Primero la petición combinada; si falla o le falta algún campo, sólo
+    los campos ausentes se piden con sus prompts individuales, lanzados a
+    la vez (latencia acotada por la más lenta, no por la suma).
+    """
+    try:
+        result = get_combined_analysis(detalles, paciente, sano_p, park_p, idioma)
+    except GeminiError:
+        result = AnalysisTexts()
+    return _fill_missing(result, detalles, paciente, sano_p, park_p, idioma)
+
+
+def stream_analysis_texts(
+    detalles: str, paciente: str, sano_p: float, park_p: float, idioma: str = "es"
+) -> Iterator[AnalysisTexts]:
+    """Versión en streaming de ``get_analysis_texts``.
+
+    Produce instantáneas acumuladas a medida que llega la respuesta
+    combinada (JSON parcial ya parseado); la última es la definitiva, con
+    los campos ausentes completados igual que en ``get_analysis_texts``.
+    Si la respuesta está en caché se produce directamente la definitiva.
+    """
+    key, build, features = _combined_request(detalles, paciente, sano_p, park_p, idioma)
+    text = _cache.get(key, paciente) if key else None
+    try:
+        if text is None:
+            buf = ""
+            for chunk in _stream_prompt(build(), timeout=20, json_mode=True):
+                buf += chunk
+                yield _texts_from_parsed(parse_partial_combined_response(buf))
+            text = buf
+            if key:
+                _cache.set(key, text, paciente)
+        result = _texts_from_parsed(parse_combined_analysis_response(text, features))
+    except GeminiError:
+        result = AnalysisTexts()
+    yield _fill_missing(result, detalles, paciente, sano_p, park_p, idioma)
 
 
 __all__ = [
+    "AnalysisTexts",
     "GeminiError",
+    "get_analysis_texts",
+    "get_combined_analysis",
+    "stream_analysis_texts",
     "get_feature_interpretations",
     "get_short_recommendation",
     "get_long_recommendation",
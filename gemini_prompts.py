@@ -12,24 +12,48 @@ Relación con la vista (app.py):
   - build_short_recommendation_prompt -> Se usa en la tarjeta de "Recomendación breve".
   - build_long_recommendation_prompt -> Se usa antes de generar el bloque PDF y el texto extenso.
   - parse_feature_interpretations_response -> Convierte el texto crudo de Gemini en un dict {feature: interpretacion}.
+  - build_combined_analysis_prompt / parse_combined_analysis_response -> Una sola petición que devuelve
+    un JSON con las interpretaciones y ambas recomendaciones (evita tres round trips por análisis).
+
+Todos los builders aceptan ``idioma`` (código de la sesión: "es", "en", "pt",
+"fr", "zh-cn"); la IA responde directamente en ese idioma, así la vista no
+necesita traducir sus textos.
 
 Si deseas cambiar la redacción de la IA, modifica aquí SIN tocar la vista.
 """
 from __future__ import annotations
 
-from typing import Dict, List
+import json
+from typing import Dict, List, Optional, Sequence
 
 
 # ---------------------------------------------------------------------------
 # BUILDERS (Prompts)
 # ---------------------------------------------------------------------------
 
-def build_feature_interpretations_prompt(detalles: str) -> str:
+LANGUAGE_NAMES = {
+    "es": "español",
+    "en": "inglés",
+    "pt": "portugués",
+    "fr": "francés",
+    "zh-cn": "chino mandarín simplificado",
+}
+
+
+def _language_instruction(idioma: str) -> str:
+    """Frase final que fija el idioma de la respuesta ("" para español)."""
+    if not idioma or idioma == "es":
+        return ""
+    nombre = LANGUAGE_NAMES.get(idioma, idioma)
+    return f"\n\nEscribe toda la respuesta en {nombre}."
+
+def build_feature_interpretations_prompt(detalles: str, idioma: str = "es") -> str:
     """Prompt para obtener interpretaciones por variable.
 
     Parametros:
         detalles: Lista formateada (string) con líneas del tipo:
             "feature: descripcion | Valor actual (clip): X.YYY"
+        idioma: idioma de la respuesta.
     """
     return (
         "Eres un experto en análisis de voz y Parkinson. "
@@ -39,24 +63,59 @@ def build_feature_interpretations_prompt(detalles: str) -> str:
         "2. Da una pequeña recomendación, comentario o feedback positivo sobre la voz, usando sólo el valor actual (clip). "
         "Habla directo al usuario, con lenguaje humano y cálido.\n\n"
         f"Variables:\n{detalles}"
+        "\n\nEmpieza cada línea con el nombre exacto de la variable seguido de ':'."
+        + _language_instruction(idioma)
     )
 
 
-def build_short_recommendation_prompt(paciente: str, sano_p: float, park_p: float) -> str:
+def build_short_recommendation_prompt(paciente: str, sano_p: float, park_p: float, idioma: str = "es") -> str:
     """Prompt para recomendación breve (máx 30 palabras)."""
     return (
         f"Paciente: {paciente}. Probabilidades: Sano {sano_p:.1%}, Parkinson {park_p:.1%}. "
         "Dame una recomendación breve y empática (máx 30 palabras)."
+        + _language_instruction(idioma)
     )
 
 
-def build_long_recommendation_prompt(paciente: str, sano_p: float, park_p: float) -> str:
+def build_long_recommendation_prompt(paciente: str, sano_p: float, park_p: float, idioma: str = "es") -> str:
     """Prompt para recomendación médica extendida (usado en PDF y vista)."""
     return (
         f"Eres un médico empático experto en Parkinson. Explica al paciente {paciente} "
         f"el resultado de su análisis de voz (Sano: {sano_p:.1%}, Parkinson: {park_p:.1%}), "
         "qué significa para su salud, y da consejos útiles para la vida diaria y cuándo consultar "
         "con un especialista. Máx 170 palabras."
+        + _language_instruction(idioma)
+    )
+
+
+def build_combined_analysis_prompt(
+    detalles: str, paciente: str, sano_p: float, park_p: float, idioma: str = "es"
+) -> str:
+    """Prompt único: interpretaciones por variable + recomendación breve y extensa en JSON.
+
+    Reúne las instrucciones de los tres builders anteriores en una sola
+    petición, pidiendo una respuesta estructurada que se parsea con
+    ``parse_combined_analysis_response``.
+    """
+    return (
+        "Eres un médico empático experto en análisis de voz y Parkinson. "
+        f"Paciente: {paciente}. Probabilidades de su análisis de voz: Sano {sano_p:.1%}, Parkinson {park_p:.1%}.\n\n"
+        "Tareas:\n"
+        "1. Para cada variable de la lista, explica en una sola frase y SIN REPETIR qué mide (usa la descripción) "
+        "y da una pequeña recomendación o feedback positivo según su valor actual (clip), hablando directo al "
+        "usuario con lenguaje humano y cálido.\n"
+        "2. Una recomendación breve y empática (máx 30 palabras).\n"
+        "3. Una explicación al paciente del resultado, qué significa para su salud, consejos útiles para la vida "
+        "diaria y cuándo consultar con un especialista (máx 170 palabras).\n\n"
+        "Responde ÚNICAMENTE con un objeto JSON válido, sin texto adicional ni bloques de código, con esta forma:\n"
+        '{"interpretaciones": {"<variable>": "<texto>"}, "recomendacion_breve": "<texto>", '
+        '"recomendacion_extensa": "<texto>"}\n'
+        "Usa como claves de 'interpretaciones' exactamente los nombres de variable de la lista."
+        + (
+            f" Los textos van en {LANGUAGE_NAMES.get(idioma, idioma)}; las claves del JSON se mantienen tal cual."
+            if idioma and idioma != "es" else ""
+        )
+        + f"\n\nVariables:\n{detalles}"
     )
 
 
@@ -64,7 +123,133 @@ def build_long_recommendation_prompt(paciente: str, sano_p: float, park_p: float
 # PARSER (Respuesta de interpretaciones por variable)
 # ---------------------------------------------------------------------------
 
-def parse_feature_interpretations_response(text: str) -> Dict[str, str]:
+def _strip_code_fence(text: str) -> str:
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+        if text.rstrip().endswith("```"):
+            text = text.rstrip()[:-3]
+    return text.strip()
+
+
+def parse_combined_analysis_response(text: str, features: Optional[Sequence[str]] = None) -> Dict[str, object]:
+    """Parsea la respuesta de ``build_combined_analysis_prompt``.
+
+    Intenta primero el JSON estricto (tolerando un bloque ```json alrededor);
+    si no es válido, recurre a las heurísticas de
+    ``parse_feature_interpretations_response`` para las interpretaciones y
+    deja vacías las recomendaciones (el cliente las pide por separado).
+
+    Retorna:
+        {"interpretaciones": {feature: texto}, "recomendacion_breve": str, "recomendacion_extensa": str}
+    """
+    result: Dict[str, object] = {"interpretaciones": {}, "recomendacion_breve": "", "recomendacion_extensa": ""}
+    if not text:
+        return result
+    body = _strip_code_fence(text)
+    start, end = body.find("{"), body.rfind("}")
+    data = None
+    if start != -1 and end > start:
+        try:
+            data = json.loads(body[start:end + 1])
+        except ValueError:
+            data = None
+    if not isinstance(data, dict):
+        result["interpretaciones"] = parse_feature_interpretations_response(text, features)
+        return result
+
+    interps = data.get("interpretaciones")
+    if isinstance(interps, dict):
+        result["interpretaciones"] = {
+            str(k).strip(): str(v).strip() for k, v in interps.items() if str(v).strip()
+        }
+    for campo in ("recomendacion_breve", "recomendacion_extensa"):
+        val = data.get(campo)
+        if isinstance(val, str):
+            result[campo] = val.strip()
+    return result
+
+
+def parse_partial_combined_response(text: str) -> Dict[str, object]:
+    """Versión tolerante de ``parse_combined_analysis_response`` para una
+    respuesta JSON aún incompleta (streaming).
+
+    Recorre el texto carácter a carácter siguiendo las claves abiertas y
+    devuelve lo ya recibido de cada campo, incluidas las cadenas cortadas a
+    mitad. Los escapes incompletos al final se descartan.
+    """
+    result: Dict[str, object] = {"interpretaciones": {}, "recomendacion_breve": "", "recomendacion_extensa": ""}
+    body = _strip_code_fence(text or "")
+    stack: List[Optional[str]] = []  # clave bajo la que se abrió cada objeto
+    key: Optional[str] = None        # última clave leída en el objeto actual
+    i, n = body.find("{"), len(body)
+    if i == -1:
+        return result
+
+    def _store(value: str) -> None:
+        path = [k for k in stack[1:] if k is not None] + [key]
+        if len(path) == 2 and path[0] == "interpretaciones":
+            if value.strip():
+                result["interpretaciones"][path[-1]] = value.strip()
+        elif path in (["recomendacion_breve"], ["recomendacion_extensa"]):
+            result[path[0]] = value.strip()
+
+    while i < n:
+        c = body[i]
+        if c == "{":
+            stack.append(key)
+            key = None
+        elif c == "}":
+            if not stack:
+                break
+            stack.pop()
+            key = None
+        elif c == ",":
+            key = None
+        elif c == '"':
+            # Lee la cadena hasta la comilla de cierre o el final del texto
+            buf: List[str] = []
+            i += 1
+            closed = False
+            while i < n:
+                c = body[i]
+                if c == "\\":
+                    if i + 1 >= n:
+                        break
+                    esc = body[i + 1]
+                    if esc == "u":
+                        if i + 6 > n:
+                            break
+                        try:
+                            buf.append(chr(int(body[i + 2:i + 6], 16)))
+                        except ValueError:
+                            pass
+                        i += 6
+                        continue
+                    buf.append({"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}.get(esc, esc))
+                    i += 2
+                    continue
+                if c == '"':
+                    closed = True
+                    break
+                buf.append(c)
+                i += 1
+            value = "".join(buf)
+            j = i + 1
+            while j < n and body[j].isspace():
+                j += 1
+            if key is None and closed and j < n and body[j] == ":":
+                key = value.strip()
+                i = j
+            elif key is not None and stack:
+                _store(value)
+            if not closed:
+                break
+        i += 1
+    return result
+
+
+def parse_feature_interpretations_response(text: str, features: Optional[Sequence[str]] = None) -> Dict[str, str]:
     """Parsea la respuesta de Gemini para interpretaciones por variable.
 
     Soporta formatos:
@@ -72,6 +257,9 @@ def parse_feature_interpretations_response(text: str) -> Dict[str, str]:
       - Varias líneas con formato 'feature: texto'
       - Líneas con bullets ('-', '*', '•')
 
+    Si se pasan ``features``, una línea que empieza por uno de esos nombres
+    se asigna a él aunque el nombre contenga ':' (p.e. 'MDVP:APQ').
+
     Retorna:
         dict { nombre_feature: descripcion_interpretacion }
     """
@@ -84,9 +272,16 @@ def parse_feature_interpretations_response(text: str) -> Dict[str, str]:
         lines = [seg.strip() for seg in lines[0].split(';') if seg.strip()]
 
     parsed: Dict[str, str] = {}
+    conocidas = sorted(features or [], key=len, reverse=True)
     for ln in lines:
         # Remover bullets
         ln = ln.lstrip('-*• ').strip()
+        match = next((f for f in conocidas if ln.startswith(f) and ln[len(f):].lstrip().startswith(':')), None)
+        if match:
+            desc_val = ln[len(match):].lstrip()[1:].strip()
+            if desc_val:
+                parsed[match] = desc_val
+            continue
         if ':' in ln:
             var, desc = ln.split(':', 1)
             var_key = var.strip()
@@ -97,8 +292,12 @@ def parse_feature_interpretations_response(text: str) -> Dict[str, str]:
 
 
 __all__ = [
+    'LANGUAGE_NAMES',
     'build_feature_interpretations_prompt',
     'build_short_recommendation_prompt',
     'build_long_recommendation_prompt',
-    'parse_feature_interpretations_response'
+    'build_combined_analysis_prompt',
+    'parse_combined_analysis_response',
+    'parse_partial_combined_response',
+    'parse_feature_interpretations_response',
 ]
@@ -0,0 +1,188 @@
+"""Servidor HTTP local que imita los endpoints ``generateContent`` y
+``streamGenerateContent`` (SSE) de Gemini.
+
+Sirve para probar ``gemini_client`` (latencia, failover de claves, fan-out
+concurrente, streaming) sin red ni cuota. Responde con el formato real de la API:
+    {"candidates": [{"content": {"parts": [{"text": "..."}]}}]}
+En streaming (``?alt=sse``) el texto se parte en trozos de ``chunk_size``
+caracteres, cada uno como un evento ``data: {...}`` separado ``chunk_delay``
+segundos.
+
+Uso en código:
+    with GeminiStubServer(delay=0.5) as stub:
+        os.environ["GEMINI_API_URL"] = stub.url
+        ...
+
+Uso standalone:
+    python gemini_stub.py --port 8765 --delay 1.0
+    GEMINI_API_URL=http://127.0.0.1:8765/v1beta/models/stub:generateContent GEMINI_KEY=x streamlit run app.py
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+
+_MODEL_PATH = "/v1beta/models/stub"
+
+
+def default_responder(prompt: str) -> str:
+    """Respuesta canónica: eco breve del prompt recibido."""
+    return f"Respuesta simulada ({len(prompt)} caracteres de prompt)."
+
+
+def default_json_responder(prompt: str) -> str:
+    """Respuesta para peticiones en modo JSON (prompt combinado): una
+    interpretación por cada línea 'feature: ...' tras 'Variables:'."""
+    bloque = prompt.split("Variables:", 1)[-1]
+    features = [ln.split(": ", 1)[0].strip() for ln in bloque.splitlines() if ": " in ln]
+    return json.dumps({
+        "interpretaciones": {f: f"Interpretación simulada de {f}." for f in features},
+        "recomendacion_breve": "Recomendación breve simulada.",
+        "recomendacion_extensa": "Recomendación extensa simulada.",
+    }, ensure_ascii=False)
+
+
+class GeminiStubServer:
+    """Stub en un hilo de fondo.
+
+    responder: función prompt -> texto.
+    json_responder: igual, para peticiones con ``responseMimeType: application/json``.
+    delay:     segundos de espera antes de responder (simula latencia).
+    status_by_key: códigos HTTP forzados por clave (p.e. {"mala": 403}).
+    chunk_size / chunk_delay: tamaño y separación de los eventos SSE.
+    """
+
+    def __init__(
+        self,
+        responder: Callable[[str], str] = default_responder,
+        json_responder: Callable[[str], str] = default_json_responder,
+        delay: float = 0.0,
+        status_by_key: Optional[Dict[str, int]] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        chunk_size: int = 40,
+        chunk_delay: float = 0.05,
+    ):
+        self.responder = responder
+        self.json_responder = json_responder
+        self.delay = delay
+        self.status_by_key = dict(status_by_key or {})
+        self.chunk_size = max(1, chunk_size)
+        self.chunk_delay = chunk_delay
+        self.requests: List[dict] = []  # registro de peticiones recibidas
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}{_MODEL_PATH}"
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}:generateContent"
+
+    @property
+    def stream_url(self) -> str:
+        return f"{self.base_url}:streamGenerateContent"
+
+    def start(self) -> "GeminiStubServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "GeminiStubServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):  # silencioso
+                pass
+
+            def _send_json(self, status: int, payload: dict):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _send_sse(self, text: str):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                n = stub.chunk_size
+                for i in range(0, len(text), n):
+                    event = {"candidates": [{"content": {"parts": [{"text": text[i:i + n]}]}}]}
+                    self.wfile.write(f"data: {json.dumps(event)}\r\n\r\n".encode("utf-8"))
+                    self.wfile.flush()
+                    if stub.chunk_delay:
+                        time.sleep(stub.chunk_delay)
+                self.close_connection = True
+
+            def do_POST(self):
+                path, _, query = self.path.partition("?")
+                params = dict(p.split("=", 1) for p in query.split("&") if "=" in p)
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                    prompt = body["contents"][0]["parts"][0]["text"]
+                except (ValueError, KeyError, IndexError):
+                    self._send_json(400, {"error": {"message": "petición mal formada"}})
+                    return
+                key = params.get("key", "")
+                with stub._lock:
+                    stub.requests.append({"path": path, "key": key, "prompt": prompt, "t": time.time()})
+                if stub.delay:
+                    time.sleep(stub.delay)
+                status = stub.status_by_key.get(key)
+                if status:
+                    self._send_json(status, {"error": {"code": status, "message": "simulado"}})
+                    return
+                json_mode = body.get("generationConfig", {}).get("responseMimeType") == "application/json"
+                text = (stub.json_responder if json_mode else stub.responder)(prompt)
+                if path.endswith(":streamGenerateContent"):
+                    self._send_sse(text)
+                    return
+                self._send_json(200, {"candidates": [{"content": {"parts": [{"text": text}]}}]})
+
+        return Handler
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Stub local del endpoint Gemini.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--delay", type=float, default=0.0)
+    args = parser.parse_args(argv)
+    stub = GeminiStubServer(delay=args.delay, host=args.host, port=args.port).start()
+    print(f"Stub Gemini escuchando en {stub.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stub.stop()
+    return 0
+
+
+__all__ = ["GeminiStubServer", "default_json_responder", "default_responder"]
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,395 @@
+"""Tiempos (y memoria opcional) por etapa del análisis.
+
+Cada etapa se envuelve en un ``span``; los spans se anidan por contexto
+(``contextvars``: un hilo de un pool sólo hereda el span abierto si la tarea
+se lanza con ``contextvars.copy_context().run``), así un análisis queda como
+un árbol (predict → decode / extract → feature.pitch …) y cada duración
+alimenta además un histograma por etapa:
+
+    with span("predict.decode"):
+        y, sr = librosa.load(...)
+
+    @timed("pdf.build_report_pdf")
+    def build_report_pdf(...): ...
+
+Para llamadas pequeñas y frecuentes (``traducir``) ``child_span`` se cuelga
+del span abierto si lo hay y, si no, sólo suma al histograma: ni árbol propio
+ni línea de log por llamada.
+
+Etapas instrumentadas: ``predict`` (cache, decode, extract, ensemble) en
+``funcion``, cada nodo del motor de features (``feature.<nodo>``: el recorte
+es ``feature.signal``, Praat ``feature.pitch`` / ``feature.point_process`` /
+``feature.period_amplitudes``), ``gemini.post`` / ``gemini.stream`` en
+``gemini_client``, ``traducir`` en la app y ``pdf.build_report_pdf``.
+
+Salidas:
+  - ``prometheus_text()``: histogramas en formato de exposición de
+    Prometheus (``parkinson_stage_seconds``), errores por etapa y pico de
+    memoria de la última ejecución de cada etapa.
+  - Archivo de texto para el textfile collector de node_exporter
+    (``PARKINSON_METRICS_FILE``; se reescribe de forma atómica al cerrar un
+    span raíz, como mucho cada ``PARKINSON_METRICS_FILE_INTERVAL`` s).
+  - Endpoint HTTP ``/metrics`` (``PARKINSON_METRICS_PORT``).
+  - Una línea JSON por span en el logger ``metrics`` (nivel INFO; con
+    ``PARKINSON_METRICS_LOG=1`` se vuelca a stderr).
+  - ``last_run(nombre)``: el último árbol completo de un span raíz (la
+    barra lateral de la app lo muestra con ``PARKINSON_METRICS_SIDEBAR=1``).
+
+Variables de entorno:
+    PARKINSON_METRICS                 "0" desactiva los spans (por defecto activos)
+    PARKINSON_METRICS_TRACEMALLOC     "1" mide el pico de memoria de cada span (más lento)
+    PARKINSON_METRICS_FILE            ruta del archivo .prom
+    PARKINSON_METRICS_FILE_INTERVAL   segundos mínimos entre escrituras (por defecto 5)
+    PARKINSON_METRICS_PORT            puerto del endpoint /metrics
+    PARKINSON_METRICS_LOG             "1" añade un handler a stderr para los JSON
+"""
+from __future__ import annotations
+
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Límites de los buckets (segundos): de 1 ms a 30 s
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+@dataclass
+class SpanRecord:
+    """Un span terminado (con sus hijos, si es raíz de un árbol)."""
+    name: str
+    start: float  # epoch
+    duration: float = 0.0  # segundos
+    labels: Dict[str, str] = field(default_factory=dict)
+    peak_bytes: Optional[int] = None
+    error: Optional[str] = None
+    children: List["SpanRecord"] = field(default_factory=list)
+    # Pico absoluto de tracemalloc visto mientras estaba abierto
+    _peak_abs: int = field(default=0, repr=False)
+    _mem_start: int = field(default=0, repr=False)
+
+    def breakdown(self) -> List[dict]:
+        """Hijos (a cualquier profundidad) agregados por nombre, en orden de
+        aparición: [{"stage", "count", "total_ms", "peak_kb"}]."""
+        filas: Dict[str, dict] = {}
+
+        def visitar(rec: "SpanRecord"):
+            for h in rec.children:
+                f = filas.setdefault(h.name, {"stage": h.name, "count": 0, "total_ms": 0.0, "peak_kb": None})
+                f["count"] += 1
+                f["total_ms"] += h.duration * 1000
+                if h.peak_bytes is not None:
+                    f["peak_kb"] = max(f["peak_kb"] or 0, h.peak_bytes / 1024)
+                visitar(h)
+
+        visitar(self)
+        return list(filas.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": self.duration * 1000,
+            "labels": self.labels,
+            "peak_bytes": self.peak_bytes,
+            "error": self.error,
+            "children": [h.to_dict() for h in self.children],
+        }
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count", "errors", "peak_bytes")
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+        self.errors = 0
+        self.peak_bytes: Optional[int] = None
+
+    def observe(self, seconds: float):
+        for i, limite in enumerate(BUCKETS):
+            if seconds <= limite:
+                self.counts[i] += 1
+                break
+        self.sum += seconds
+        self.count += 1
+
+
+_current: contextvars.ContextVar[Optional[SpanRecord]] = contextvars.ContextVar("metrics_span", default=None)
+
+
+class Metrics:
+    """Histogramas por etapa + último árbol de cada span raíz."""
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        trace_memory: bool = False,
+        prom_file: Optional[str] = None,
+        file_interval: float = 5.0,
+    ):
+        self.enabled = enabled
+        self.trace_memory = trace_memory
+        self.prom_file = Path(prom_file) if prom_file else None
+        self.file_interval = file_interval
+        self._hist: Dict[str, _Histogram] = {}
+        self._last: Dict[str, SpanRecord] = {}
+        self._lock = threading.Lock()
+        self._last_write = 0.0
+        self._server: Optional[ThreadingHTTPServer] = None
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @classmethod
+    def from_env(cls) -> "Metrics":
+        m = cls(
+            enabled=os.getenv("PARKINSON_METRICS", "1") != "0",
+            trace_memory=os.getenv("PARKINSON_METRICS_TRACEMALLOC", "0") == "1",
+            prom_file=os.getenv("PARKINSON_METRICS_FILE") or None,
+            file_interval=float(os.getenv("PARKINSON_METRICS_FILE_INTERVAL", "5")),
+        )
+        if os.getenv("PARKINSON_METRICS_LOG", "0") == "1" and not logger.handlers:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+        port = os.getenv("PARKINSON_METRICS_PORT")
+        if port and m.enabled:
+            try:
+                m.serve(int(port))
+            except OSError as e:
+                # Otro proceso (p.e. un worker del pool) ya tiene el puerto
+                logger.warning("No se pudo abrir el endpoint de métricas en el puerto %s: %s", port, e)
+        return m
+
+    # -- Spans ---------------------------------------------------------------
+    def span(self, name: str, **labels) -> "_Span":
+        return _Span(self, name, labels)
+
+    def child_span(self, name: str, **labels) -> "_Span":
+        """Como ``span``, pero fuera de cualquier span sólo cuenta en el histograma."""
+        return _Span(self, name, labels, child_only=True)
+
+    def timed(self, name: str):
+        """Decorador: cada llamada es un span ``name``."""
+        def deco(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return deco
+
+    def observe(self, name: str, seconds: float, error: Optional[str] = None, **labels) -> None:
+        """Registra una duración medida a mano (p.e. a lo largo de un
+        generador), como hijo del span abierto si lo hay."""
+        if not self.enabled:
+            return
+        rec = SpanRecord(name, time.time() - seconds, seconds, {k: str(v) for k, v in labels.items()}, error=error)
+        padre = _current.get()
+        if padre is not None:
+            padre.children.append(rec)
+        self._finish(rec, raiz=padre is None)
+
+    def _finish(self, rec: SpanRecord, raiz: bool, log: bool = True) -> None:
+        with self._lock:
+            h = self._hist.get(rec.name)
+            if h is None:
+                h = self._hist[rec.name] = _Histogram()
+            h.observe(rec.duration)
+            if rec.error:
+                h.errors += 1
+            if rec.peak_bytes is not None:
+                h.peak_bytes = rec.peak_bytes
+            if raiz:
+                self._last[rec.name] = rec
+        if log and logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                "event": "span",
+                "stage": rec.name,
+                "duration_ms": round(rec.duration * 1000, 3),
+                "peak_bytes": rec.peak_bytes,
+                "error": rec.error,
+                "root": raiz,
+                "labels": rec.labels,
+            }, ensure_ascii=False))
+        if raiz and self.prom_file is not None:
+            self._maybe_write()
+
+    # -- Consulta ------------------------------------------------------------
+    def last_run(self, name: str) -> Optional[SpanRecord]:
+        """Último span raíz ``name`` terminado (con su árbol)."""
+        with self._lock:
+            return self._last.get(name)
+
+    def summary(self) -> List[dict]:
+        """[{"stage", "count", "mean_ms", "errors"}] de todas las etapas."""
+        with self._lock:
+            return [
+                {"stage": n, "count": h.count, "mean_ms": h.sum / h.count * 1000 if h.count else 0.0, "errors": h.errors}
+                for n, h in sorted(self._hist.items())
+            ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hist.clear()
+            self._last.clear()
+
+    # -- Exportación ---------------------------------------------------------
+    def prometheus_text(self) -> str:
+        """Métricas en formato de exposición de texto de Prometheus."""
+        with self._lock:
+            items = sorted(self._hist.items())
+            lineas = [
+                "# HELP parkinson_stage_seconds Duración de cada etapa del análisis.",
+                "# TYPE parkinson_stage_seconds histogram",
+            ]
+            for n, h in items:
+                etiqueta = _label(n)
+                acumulado = 0
+                for limite, c in zip(BUCKETS, h.counts):
+                    acumulado += c
+                    lineas.append(f'parkinson_stage_seconds_bucket{{stage="{etiqueta}",le="{limite:g}"}} {acumulado}')
+                lineas.append(f'parkinson_stage_seconds_bucket{{stage="{etiqueta}",le="+Inf"}} {h.count}')
+                lineas.append(f'parkinson_stage_seconds_sum{{stage="{etiqueta}"}} {h.sum:.6f}')
+                lineas.append(f'parkinson_stage_seconds_count{{stage="{etiqueta}"}} {h.count}')
+            lineas += [
+                "# HELP parkinson_stage_errors_total Spans terminados con excepción.",
+                "# TYPE parkinson_stage_errors_total counter",
+            ]
+            lineas += [f'parkinson_stage_errors_total{{stage="{_label(n)}"}} {h.errors}' for n, h in items]
+            picos = [(n, h.peak_bytes) for n, h in items if h.peak_bytes is not None]
+            if picos:
+                lineas += [
+                    "# HELP parkinson_stage_peak_bytes Pico de memoria (tracemalloc) de la última ejecución.",
+                    "# TYPE parkinson_stage_peak_bytes gauge",
+                ]
+                lineas += [f'parkinson_stage_peak_bytes{{stage="{_label(n)}"}} {p}' for n, p in picos]
+        return "\n".join(lineas) + "\n"
+
+    def write_prometheus(self, path) -> None:
+        """Escribe ``prometheus_text()`` en ``path`` de forma atómica."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp, path)
+        except OSError:
+            logger.exception("No se pudo escribir %s", path)
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def _maybe_write(self) -> None:
+        ahora = time.monotonic()
+        with self._lock:
+            if ahora - self._last_write < self.file_interval:
+                return
+            self._last_write = ahora
+        self.write_prometheus(self.prom_file)
+
+    def serve(self, port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+        """Sirve ``/metrics`` en un hilo de fondo."""
+        if self._server is not None:
+            return self._server
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):  # silencioso
+                pass
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="metrics").start()
+        return self._server
+
+
+def _label(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Span:
+    """Context manager de ``Metrics.span``."""
+
+    __slots__ = ("m", "rec", "padre", "token", "t0", "child_only")
+
+    def __init__(self, m: Metrics, name: str, labels: dict, child_only: bool = False):
+        self.m = m
+        self.child_only = child_only
+        self.rec = SpanRecord(name, 0.0, labels={k: str(v) for k, v in labels.items()}) if m.enabled else None
+
+    def __enter__(self) -> Optional[SpanRecord]:
+        if self.rec is None:
+            return None
+        self.padre = _current.get()
+        self.token = _current.set(self.rec)
+        if self.m.trace_memory and tracemalloc.is_tracing():
+            # El pico de tracemalloc es global: se reparte entre los spans
+            # abiertos guardando el máximo visto antes de cada reset
+            actual, pico = tracemalloc.get_traced_memory()
+            if self.padre is not None:
+                self.padre._peak_abs = max(self.padre._peak_abs, pico)
+            tracemalloc.reset_peak()
+            self.rec._mem_start = self.rec._peak_abs = actual
+        self.rec.start = time.time()
+        self.t0 = time.perf_counter()
+        return self.rec
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.rec is None:
+            return
+        rec = self.rec
+        rec.duration = time.perf_counter() - self.t0
+        if exc_type is not None:
+            rec.error = exc_type.__name__
+        if self.m.trace_memory and tracemalloc.is_tracing():
+            _, pico = tracemalloc.get_traced_memory()
+            rec._peak_abs = max(rec._peak_abs, pico)
+            rec.peak_bytes = rec._peak_abs - rec._mem_start
+            if self.padre is not None:
+                self.padre._peak_abs = max(self.padre._peak_abs, rec._peak_abs)
+            tracemalloc.reset_peak()
+        _current.reset(self.token)
+        if self.padre is not None:
+            self.padre.children.append(rec)
+            self.m._finish(rec, raiz=False)
+        elif self.child_only:
+            self.m._finish(rec, raiz=False, log=False)
+        else:
+            self.m._finish(rec, raiz=True)
+
+
+metrics = Metrics.from_env()
+span = metrics.span
+child_span = metrics.child_span
+timed = metrics.timed
+
+
+__all__ = ["BUCKETS", "Metrics", "SpanRecord", "child_span", "metrics", "span", "timed"]
@@ -0,0 +1,115 @@
+"""Registro perezoso de los modelos en ``models/``.
+
+Descubre los artefactos ``*.joblib`` de la carpeta y sólo los deserializa la
+primera vez que se piden. Los modelos cargados se guardan en una caché LRU
+compartida y acotada, de modo que el arranque y la memoria del proceso sólo
+pagan por los modelos realmente servidos (importar ``funcion`` ya no carga
+nada ni importa XGBoost/sklearn.ensemble).
+
+Nombres: el *stem* del archivo (``soft_voting_parkinson``) o un alias corto:
+    soft  -> soft_voting_parkinson.joblib   Pipeline(StandardScaler + SoftVoting)
+    stack -> stacking_parkinson.joblib      Pipeline(StandardScaler + Stacking)
+    svm   -> svm_mcc_final.joblib           {'scaler': StandardScaler, 'model': SVC}
+
+Los artefactos guardados como dict ``{'scaler', 'model'}`` se normalizan a un
+``Pipeline`` para que todos expongan la misma interfaz.
+
+Variables de entorno:
+    PARKINSON_MAX_MODELS  nº máximo de modelos en memoria (por defecto 2)
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import joblib
+
+MODELS_DIR = Path(__file__).resolve().parent / "models"
+
+ALIASES: Dict[str, str] = {
+    "soft": "soft_voting_parkinson",
+    "stack": "stacking_parkinson",
+    "svm": "svm_mcc_final",
+}
+
+
+def _as_pipeline(obj):
+    """Convierte ``{'scaler': ..., 'model': ...}`` en un Pipeline equivalente."""
+    if isinstance(obj, dict) and {"scaler", "model"} <= set(obj):
+        from sklearn.pipeline import Pipeline
+        return Pipeline([("scaler", obj["scaler"]), ("model", obj["model"])])
+    return obj
+
+
+class ModelRegistry:
+    def __init__(self, models_dir: Path = MODELS_DIR, max_loaded: Optional[int] = None):
+        self.models_dir = Path(models_dir)
+        self.max_loaded = max_loaded if max_loaded is not None else int(os.getenv("PARKINSON_MAX_MODELS", "2"))
+        self._loaded: "OrderedDict[str, object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self._versions: Dict[tuple, str] = {}
+
+    def available(self) -> List[str]:
+        """Nombres de los artefactos presentes en ``models/``."""
+        return sorted(p.stem for p in self.models_dir.glob("*.joblib"))
+
+    def resolve(self, name: str) -> str:
+        """Nombre canónico (stem) a partir de un alias; ``ValueError`` si no existe."""
+        stem = ALIASES.get(name, name)
+        if not (self.models_dir / f"{stem}.joblib").exists():
+            opciones = sorted(set(self.available()) | {a for a, s in ALIASES.items() if s in self.available()})
+            raise ValueError(f"Modelo desconocido '{name}'. Disponibles: {', '.join(opciones)}")
+        return stem
+
+    def path(self, name: str) -> Path:
+        return self.models_dir / f"{self.resolve(name)}.joblib"
+
+    def get(self, name: str):
+        """Devuelve el modelo, cargándolo en el primer uso."""
+        stem = self.resolve(name)
+        with self._lock:
+            if stem in self._loaded:
+                self._loaded.move_to_end(stem)
+                return self._loaded[stem]
+            load_lock = self._load_locks.setdefault(stem, threading.Lock())
+        # Un lock por artefacto: dos hilos pidiendo el mismo modelo lo cargan una vez
+        with load_lock:
+            with self._lock:
+                if stem in self._loaded:
+                    return self._loaded[stem]
+            model = _as_pipeline(joblib.load(self.models_dir / f"{stem}.joblib"))
+            with self._lock:
+                self._loaded[stem] = model
+                self._loaded.move_to_end(stem)
+                while len(self._loaded) > max(1, self.max_loaded):
+                    self._loaded.popitem(last=False)
+        return model
+
+    def loaded(self) -> List[str]:
+        with self._lock:
+            return list(self._loaded)
+
+    def version(self, name: str) -> str:
+        """Hash corto del artefacto (recalculado sólo si cambia en disco)."""
+        path = self.path(name)
+        st = path.stat()
+        sig = (str(path), st.st_size, st.st_mtime_ns)
+        if sig not in self._versions:
+            self._versions[sig] = hashlib.sha256(path.read_bytes()).hexdigest()[:16]
+        return self._versions[sig]
+
+    def features(self, name: str) -> Optional[List[str]]:
+        """Columnas con las que se entrenó el modelo, si el artefacto las guarda."""
+        names = getattr(self.get(name), "feature_names_in_", None)
+        return list(names) if names is not None else None
+
+
+registry = ModelRegistry()
+
+
+__all__ = ["ALIASES", "MODELS_DIR", "ModelRegistry", "registry"]
@@ -0,0 +1,545 @@
+"""Medidas de dinámica no lineal (RPDE, DFA, D2, PPE) vectorizadas en NumPy.
+
+RPDE, DFA y D2 son columnas no lineales de ``entrenamiento/dataset/parkinsons.data``
+(Little et al. 2007/2009); ``ppe`` es sólo una aproximación de la cuarta (ver
+su docstring). Son, con diferencia, las más caras de extraer: las
+versiones de ``nolds`` recorren la señal punto a punto en Python y D2 crea la
+matriz de distancias completa (N², inviable con segundos de audio a 44,1 kHz).
+Aquí cada medida trabaja por bloques de arrays:
+
+    rpde  entropía normalizada de los tiempos de recurrencia a una bola de
+          radio r en el espacio embebido (m=4, τ≈1,4 ms, r=0,12, T_max≈40 ms)
+    dfa   exponente α de Detrended Fluctuation Analysis; el feature del
+          dataset es la sigmoide 1/(1+e^-α) con ventanas de 50–100 muestras
+    d2    dimensión de correlación: pendiente de log C(r) frente a log r;
+          C(r) para todos los radios en una sola pasada por bloque
+    ppe   entropía del pitch: f0 en semitonos, blanqueada con predicción
+          lineal (AR(2)) y entropía normalizada del residuo (aproximada)
+
+Opciones para audio largo o tiempo real (aproximaciones; sin ellas el
+cálculo es exacto):
+
+    decimate    factor entero de diezmado (filtro anti-aliasing) antes de
+                RPDE/DFA/D2; los parámetros en segundos se reescalan solos
+    max_points  nº máximo de puntos de referencia del embebido (RPDE y D2);
+                el histograma de tiempos de RPDE se estima sobre puntos
+                repartidos uniformemente y C(r) de D2 por estratos (pares
+                cercanos completos + resto al azar, ver ``corr_dim``)
+
+``dfa`` acepta los mismos parámetros que ``nolds.dfa`` y da el mismo
+resultado (ajuste por mínimos cuadrados, el ``fit_exp="poly"`` de nolds);
+``corr_dim`` igual que ``nolds.corr_dim`` salvo que no cuenta la distancia de
+cada punto consigo mismo. RPDE no está en nolds: se compara con una versión
+directa punto a punto (mismo histograma).
+
+Precisión y tiempos frente a nolds (recording.wav + vocales sintéticas):
+    python nonlinear.py
+    python nonlinear.py otro.wav --seconds 1.0 --repeat 3
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Parámetros de Little et al. (2007) para RPDE a 25 kHz, expresados en segundos
+RPDE_DIM = 4
+RPDE_DELAY = 35 / 25000
+RPDE_RADIUS = 0.12
+RPDE_T_MAX = 1000 / 25000
+
+DFA_WINDOWS = (50, 60, 70, 80, 90, 100)
+
+D2_DIM = 10
+D2_DELAY = RPDE_DELAY
+# Ventana de Theiler (s) de la estimación por estratos de D2: los pares más
+# cercanos en el tiempo se cuentan siempre completos
+D2_THEILER = 1e-3
+
+# Puntos de referencia por defecto en ``nonlinear_features`` (≈0,2 s de
+# cálculo con unos segundos de voz; None = exacto)
+RPDE_POINTS = 5000
+D2_POINTS = 2000
+
+PPE_REFERENCE_HZ = 127.09  # f0 media de referencia (Little et al. 2009)
+PPE_BINS = 30
+
+# Elementos por bloque en las operaciones por pares (acota la memoria)
+_BLOCK = 2_000_000
+
+
+# -------------------------------
+# Utilidades
+# -------------------------------
+def delay_embedding(x: np.ndarray, dim: int, lag: int = 1) -> np.ndarray:
+    """Vectores [x_i, x_i+lag, ..., x_i+(dim-1)·lag] (vista, sin copia)."""
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    span = (dim - 1) * lag + 1
+    if x.size < span:
+        raise ValueError(f"Se necesitan al menos {span} muestras para embeber con dim={dim}, lag={lag}")
+    return sliding_window_view(x, span)[:, ::lag]
+
+
+def decimate(x: np.ndarray, sr: int, factor: int = 1):
+    """(señal, sr) diezmadas por ``factor`` con filtro anti-aliasing."""
+    if factor <= 1:
+        return np.asarray(x, dtype=np.float64), sr
+    from scipy.signal import decimate as _decimate
+
+    return _decimate(np.asarray(x, dtype=np.float64), factor, ftype="fir", zero_phase=True), sr / factor
+
+
+def _reference_points(n: int, max_points: Optional[int]) -> np.ndarray:
+    if max_points is None or n <= max_points:
+        return np.arange(n)
+    return np.linspace(0, n - 1, max_points).astype(np.int64)
+
+
+def _slope(x: np.ndarray, y: np.ndarray) -> float:
+    if x.size < 2:
+        return np.nan
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def _logarithmic_r(min_r: float, max_r: float, factor: float) -> np.ndarray:
+    # Mismos radios que nolds.logarithmic_r
+    max_i = int(np.floor(np.log(max_r / min_r) / np.log(factor)))
+    return min_r * factor ** np.arange(max_i + 1)
+
+
+# -------------------------------
+# RPDE
+# -------------------------------
+def recurrence_times(
+    x: np.ndarray,
+    dim: int,
+    lag: int,
+    radius: float,
+    t_max: int,
+    max_points: Optional[int] = None,
+) -> np.ndarray:
+    """Histograma (índices 1..t_max) de tiempos de primera recurrencia.
+
+    Para cada punto de referencia i: primer instante j > i en que la
+    trayectoria sale de la bola de radio ``radius`` centrada en x_i y primer
+    k > j en que vuelve a entrar; el tiempo es k - i. Se evalúan bloques de
+    puntos contra sus t_max sucesores a la vez.
+    """
+    x = np.ascontiguousarray(x, dtype=np.float64)
+    n = x.size - (dim - 1) * lag - t_max
+    hist = np.zeros(t_max + 1, dtype=np.int64)
+    if n <= 0:
+        return hist
+    ventanas = sliding_window_view(x, t_max + 1)  # fila i: x[i .. i+t_max]
+    r2 = radius * radius
+    refs = _reference_points(n, max_points)
+    paso = max(1, _BLOCK // (t_max * dim))
+    for b in range(0, refs.size, paso):
+        idx = refs[b: b + paso]
+        d2 = np.zeros((idx.size, t_max))
+        for k in range(dim):
+            v = ventanas[idx + k * lag]
+            d2 += (v[:, 1:] - v[:, :1]) ** 2
+        fuera = d2 > r2
+        sale = np.argmax(fuera, axis=1)
+        dentro = ~fuera
+        dentro[np.arange(t_max)[None, :] <= sale[:, None]] = False
+        vuelve = np.argmax(dentro, axis=1)
+        ok = fuera.any(axis=1) & dentro.any(axis=1)
+        hist += np.bincount(vuelve[ok] + 1, minlength=t_max + 1)
+    return hist
+
+
+def rpde(
+    y: np.ndarray,
+    sr: int,
+    dim: int = RPDE_DIM,
+    delay: float = RPDE_DELAY,
+    radius: float = RPDE_RADIUS,
+    t_max: float = RPDE_T_MAX,
+    decimate_factor: int = 1,
+    max_points: Optional[int] = None,
+) -> float:
+    """Recurrence Period Density Entropy en [0, 1] (NaN si no hay recurrencias).
+
+    ``y`` debe estar normalizada a [-1, 1] (el radio es absoluto); ``delay``
+    y ``t_max`` van en segundos.
+    """
+    y, sr = decimate(y, sr, decimate_factor)
+    lag = max(1, int(round(delay * sr)))
+    tm = max(2, int(round(t_max * sr)))
+    hist = recurrence_times(y, dim, lag, radius, tm, max_points)[1:]
+    total = hist.sum()
+    if total == 0:
+        return np.nan
+    p = hist[hist > 0] / total
+    return float(-np.sum(p * np.log(p)) / np.log(tm))
+
+
+# -------------------------------
+# DFA
+# -------------------------------
+def dfa(data: np.ndarray, nvals: Optional[Sequence[int]] = None, overlap: bool = True) -> float:
+    """Exponente α de DFA (tendencia lineal por ventana), como
+    ``nolds.dfa(data, nvals, overlap, fit_exp="poly")``."""
+    data = np.asarray(data, dtype=np.float64)
+    total = data.size
+    if nvals is None:
+        if total > 70:
+            nvals = _logarithmic_n(4, 0.1 * total, 1.2)
+        else:
+            nvals = [4, 5, 6, 7, 8, 9]
+    nvals = [int(v) for v in nvals if 2 <= v < total]
+    if len(nvals) < 2:
+        return np.nan
+    walk = np.cumsum(data - np.mean(data))
+    flucs = []
+    for n in nvals:
+        if overlap:
+            ventanas = sliding_window_view(walk, n)[: total - n: n // 2]
+        else:
+            ventanas = walk[: total - total % n].reshape(-1, n)
+        # Residuo de la recta de mínimos cuadrados, en forma cerrada
+        xc = np.arange(n) - (n - 1) / 2
+        centradas = ventanas - ventanas.mean(axis=1, keepdims=True)
+        pendiente = centradas @ xc / (xc @ xc)
+        resid = centradas - pendiente[:, None] * xc
+        flucs.append(np.sqrt(np.mean(np.sum(resid * resid, axis=1) / n)))
+    flucs = np.asarray(flucs)
+    nz = flucs > 0
+    return _slope(np.log(np.asarray(nvals)[nz]), np.log(flucs[nz]))
+
+
+def _logarithmic_n(min_n: int, max_n: float, factor: float):
+    # Mismos tamaños que nolds.logarithmic_n
+    max_i = int(np.floor(np.log(max_n / min_n) / np.log(factor)))
+    ns = [min_n]
+    for i in range(max_i + 1):
+        v = int(np.floor(min_n * factor ** i))
+        if v > ns[-1]:
+            ns.append(v)
+    return ns
+
+
+def dfa_feature(y: np.ndarray, sr: int, windows: Sequence[int] = DFA_WINDOWS, decimate_factor: int = 1) -> float:
+    """Feature DFA del dataset: sigmoide de α con ventanas de 50–100 muestras."""
+    y, _ = decimate(y, sr, decimate_factor)
+    alpha = dfa(y, windows)
+    return float(1 / (1 + np.exp(-alpha))) if not np.isnan(alpha) else np.nan
+
+
+# -------------------------------
+# D2
+# -------------------------------
+def _band_counts(data: np.ndarray, emb_dim: int, lag: int, rvals: np.ndarray, theiler: int) -> np.ndarray:
+    """Histograma (por radio) de las distancias entre puntos del embebido
+    separados menos de ``theiler`` muestras: para cada desplazamiento k la
+    distancia² es una suma de ``emb_dim`` tramos de (x[t+k] - x[t])², sin
+    construir la órbita."""
+    n = data.size - (emb_dim - 1) * lag
+    cuentas = np.zeros(rvals.size + 1, dtype=np.int64)
+    for k in range(1, min(theiler, n)):
+        e = (data[k:] - data[:-k]) ** 2
+        d2 = np.zeros(n - k)
+        for m in range(emb_dim):
+            d2 += e[m * lag: m * lag + n - k]
+        cuentas += np.bincount(np.searchsorted(rvals, np.sqrt(d2), side="left"), minlength=rvals.size + 1)
+    return cuentas
+
+
+def corr_dim(
+    data: np.ndarray,
+    emb_dim: int,
+    lag: int = 1,
+    rvals: Optional[Sequence[float]] = None,
+    max_points: Optional[int] = None,
+    theiler: int = 1,
+    seed: int = 0,
+) -> float:
+    """Dimensión de correlación, como ``nolds.corr_dim(..., fit="poly")``
+    pero sin contar la distancia 0 de cada punto consigo mismo (nolds la
+    incluye en C(r), lo que sesga la pendiente en radios pequeños).
+
+    Las distancias se calculan por bloques de filas con la identidad
+    |a-b|² = |a|² + |b|² - 2a·b (un producto de matrices), sólo el triángulo
+    superior, y cada bloque suma a C(r) de todos los radios a la vez con
+    ``searchsorted`` + ``bincount``.
+
+    Con ``max_points`` C(r) se estima por estratos: los pares separados menos
+    de ``theiler`` muestras (los que dominan los radios pequeños en una
+    órbita sobremuestreada) se cuentan siempre completos, y el resto sale de
+    ``max_points`` puntos al azar (``seed``), reescalado al nº total de pares
+    lejanos. Es un estimador insesgado del C(r) exacto; un reparto uniforme
+    de puntos, en cambio, pierde los pares cercanos y se alinea con el
+    periodo de la voz. Sin ``max_points`` el resultado no depende de
+    ``theiler``.
+    """
+    data = np.ascontiguousarray(data, dtype=np.float64)
+    if rvals is None:
+        sd = np.std(data, ddof=1)
+        rvals = _logarithmic_r(0.1 * sd, 0.5 * sd, 1.03)
+    rvals = np.asarray(rvals, dtype=np.float64)
+    orbita = delay_embedding(data, emb_dim, lag)
+    total = orbita.shape[0]
+    if total < 2:
+        return np.nan
+    theiler = max(1, min(int(theiler), total))
+    if max_points is None or total <= max_points:
+        pos = np.arange(total)
+    else:
+        pos = np.sort(np.random.default_rng(seed).choice(total, max_points, replace=False))
+    orbita = np.ascontiguousarray(orbita[pos])
+    n = orbita.shape[0]
+
+    # Pares lejanos (j - i >= theiler) del subconjunto
+    normas = np.einsum("ij,ij->i", orbita, orbita)
+    lejanos = np.zeros(rvals.size + 1, dtype=np.int64)
+    muestreados = 0
+    paso = max(1, _BLOCK // n)
+    for i0 in range(0, n - 1, paso):
+        i1 = min(n - 1, i0 + paso)
+        otros = orbita[i0 + 1:]
+        d2 = normas[i0:i1, None] + normas[None, i0 + 1:] - 2 * orbita[i0:i1] @ otros.T
+        # Fila i: sólo j > i a ``theiler`` o más muestras (columna c -> j = i0 + 1 + c)
+        d = d2[pos[i0:i1, None] + theiler <= pos[None, i0 + 1:]]
+        muestreados += d.size
+        d = np.sqrt(np.maximum(d, 0.0))
+        lejanos += np.bincount(np.searchsorted(rvals, d, side="left"), minlength=rvals.size + 1)
+
+    cuentas = _band_counts(data, emb_dim, lag, rvals, theiler).astype(np.float64)
+    total_lejanos = (total - theiler) * (total - theiler + 1) / 2
+    if muestreados:
+        cuentas += lejanos * (total_lejanos / muestreados)
+    csums = np.cumsum(cuentas)[:-1] / (total * (total - 1) / 2)  # fracción de pares con d <= r
+    nz = csums > 0
+    return _slope(np.log(rvals[nz]), np.log(csums[nz]))
+
+
+def d2(
+    y: np.ndarray,
+    sr: int,
+    emb_dim: int = D2_DIM,
+    delay: float = D2_DELAY,
+    decimate_factor: int = 1,
+    max_points: Optional[int] = D2_POINTS,
+    theiler: float = D2_THEILER,
+) -> float:
+    """Feature D2: ``corr_dim`` con retardo y ventana de Theiler en segundos
+    (retardo por defecto el de RPDE).
+
+    Los radios son los de nolds (0,1–0,5 desviaciones típicas) multiplicados
+    por √emb_dim: en 10 dimensiones las distancias típicas crecen con √dim y
+    con los radios de nolds casi ningún par queda dentro.
+    """
+    y, sr = decimate(y, sr, decimate_factor)
+    escala = np.std(y, ddof=1) * np.sqrt(emb_dim)
+    rvals = _logarithmic_r(0.1 * escala, 0.5 * escala, 1.03)
+    return corr_dim(
+        y, emb_dim, max(1, int(round(delay * sr))), rvals,
+        max_points=max_points, theiler=max(1, int(round(theiler * sr))),
+    )
+
+
+# -------------------------------
+# PPE
+# -------------------------------
+def ppe(f0: np.ndarray, reference_hz: float = PPE_REFERENCE_HZ, bins: int = PPE_BINS) -> float:
+    """Pitch Period Entropy en [0, 1] a partir del contorno de f0 sonoro (Hz).
+
+    f0 en semitonos respecto a ``reference_hz``; se quita la parte predecible
+    con un AR(2) de mínimos cuadrados y se mide la entropía del residuo
+    (histograma de ``bins`` clases, normalizada por log(bins)).
+
+    Aproximación: Little et al. blanquean con un predictor lineal propio y
+    usan otra discretización, así que los valores no están en la escala de la
+    columna PPE del dataset (por eso el motor la expone como ``PPE_aprox``).
+    """
+    f0 = np.asarray(f0, dtype=np.float64)
+    f0 = f0[f0 > 0]
+    if f0.size < 4:
+        return np.nan
+    s = 12 * np.log2(f0 / reference_hz)
+    X = np.column_stack([s[1:-1], s[:-2], np.ones(s.size - 2)])
+    coef = np.linalg.lstsq(X, s[2:], rcond=None)[0]
+    resid = s[2:] - X @ coef
+    if np.ptp(resid) == 0:
+        return 0.0
+    p = np.histogram(resid, bins=bins)[0] / resid.size
+    p = p[p > 0]
+    return float(-np.sum(p * np.log(p)) / np.log(bins))
+
+
+def nonlinear_features(
+    y: np.ndarray,
+    sr: int,
+    f0: Optional[np.ndarray] = None,
+    decimate_factor: int = 1,
+    rpde_points: Optional[int] = RPDE_POINTS,
+    d2_points: Optional[int] = D2_POINTS,
+) -> Dict[str, float]:
+    """RPDE, DFA, D2 (y ``PPE_aprox`` si se da ``f0``) de una señal normalizada."""
+    out = {
+        "RPDE": rpde(y, sr, decimate_factor=decimate_factor, max_points=rpde_points),
+        "DFA": dfa_feature(y, sr, decimate_factor=decimate_factor),
+        "D2": d2(y, sr, decimate_factor=decimate_factor, max_points=d2_points),
+    }
+    if f0 is not None:
+        out["PPE_aprox"] = ppe(f0)
+    return out
+
+
+# -------------------------------
+# Comprobación frente a nolds / referencia directa
+# -------------------------------
+def _rpde_directo(x: np.ndarray, dim: int, lag: int, radius: float, t_max: int, refs: np.ndarray) -> np.ndarray:
+    """Referencia punto a punto de ``recurrence_times``."""
+    emb = delay_embedding(x, dim, lag)
+    hist = np.zeros(t_max + 1, dtype=np.int64)
+    for i in refs:
+        salio = False
+        for s in range(1, t_max + 1):
+            dentro = np.sum((emb[i + s] - emb[i]) ** 2) <= radius * radius
+            if not salio:
+                salio = not dentro
+            elif dentro:
+                hist[s] += 1
+                break
+    return hist
+
+
+def _medir(fn, repeat: int):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        v = fn()
+    return v, (time.perf_counter() - t0) / repeat
+
+
+def _check(nombre: str, y: np.ndarray, sr: int, repeat: int, tol: float, d2_tol: float) -> bool:
+    import nolds
+
+    y = np.asarray(y, dtype=np.float64) / np.max(np.abs(y))
+    print(f"{nombre}: {y.size} muestras a {sr} Hz")
+    ok = True
+
+    def fila(medida, ref, t_ref, nuestro, t_nuestro):
+        nonlocal ok
+        igual = abs(ref - nuestro) <= tol * max(1.0, abs(ref))
+        ok = ok and igual
+        marca = "ok" if igual else "DIFIERE"
+        print(
+            f"  {medida:<22} ref={ref: .8f} ({t_ref * 1000:8.1f} ms)  numpy={nuestro: .8f} "
+            f"({t_nuestro * 1000:7.1f} ms, x{t_ref / max(t_nuestro, 1e-9):.0f})  {marca}"
+        )
+
+    # DFA: misma definición que nolds con ajuste por mínimos cuadrados
+    ref, t_ref = _medir(lambda: nolds.dfa(y, nvals=list(DFA_WINDOWS), fit_exp="poly"), repeat)
+    v, t = _medir(lambda: dfa(y, DFA_WINDOWS), repeat)
+    fila("DFA α", ref, t_ref, v, t)
+
+    # D2: nolds crea la matriz N×N; se compara en un tramo corto, quitando
+    # de su C(r) las N autodistancias (1/(N-1)) para comparar la misma curva
+    medio = y.size // 2
+    corto = y[max(0, medio - 1500): medio + 1500]
+    lag = max(1, int(round(D2_DELAY * sr)))
+    ref, t_ref = _medir(lambda: nolds.corr_dim(corto, D2_DIM, lag=lag, fit="poly", debug_data=True), 1)
+    log_r, log_c, _ = ref[1]
+    n = corto.size - (D2_DIM - 1) * lag
+    c = np.exp(log_c) - 1 / (n - 1)
+    ref = _slope(log_r[c > 0], np.log(c[c > 0]))
+    v, t = _medir(lambda: corr_dim(corto, D2_DIM, lag), repeat)
+    fila(f"D2 ({corto.size} muestras)", ref, t_ref, v, t)
+    # D2 submuestreado (el del motor) frente al exacto sobre el mismo tramo
+    tramo = y[max(0, medio - int(0.125 * sr)): medio + int(0.125 * sr)]
+    ref, t_ref = _medir(lambda: d2(tramo, sr, max_points=None), 1)
+    v, t = _medir(lambda: d2(tramo, sr), repeat)
+    igual = abs(ref - v) <= d2_tol * abs(ref)
+    ok = ok and igual
+    print(
+        f"  {f'D2 {D2_POINTS} ptos ({tramo.size})':<22} exacto={ref: .6f} ({t_ref * 1000:8.1f} ms)  "
+        f"submuestreo={v: .6f} ({t * 1000:7.1f} ms)  {'ok' if igual else 'DIFIERE'}"
+    )
+    v_sub, t_sub = _medir(lambda: d2(y, sr), repeat)
+    print(f"  {'D2 completo':<22} {v_sub: .6f} ({t_sub * 1000:.1f} ms)")
+
+    # RPDE: histograma idéntico a la versión punto a punto
+    lag = max(1, int(round(RPDE_DELAY * sr)))
+    tm = int(round(RPDE_T_MAX * sr))
+    n = y.size - (RPDE_DIM - 1) * lag - tm
+    refs = _reference_points(n, 300)
+    h_ref, t_ref = _medir(lambda: _rpde_directo(y, RPDE_DIM, lag, RPDE_RADIUS, tm, refs), 1)
+    h, t = _medir(lambda: recurrence_times(y, RPDE_DIM, lag, RPDE_RADIUS, tm, 300), repeat)
+    igual = np.array_equal(h_ref, h)
+    ok = ok and igual
+    print(
+        f"  {'RPDE histograma (300)':<22} ref {t_ref * 1000:.1f} ms | numpy {t * 1000:.1f} ms "
+        f"(x{t_ref / max(t, 1e-9):.0f})  {'ok' if igual else 'DIFIERE'}"
+    )
+    for etiqueta, kw in [("completo", {}), ("2000 ptos", {"max_points": 2000}), ("÷2, 2000 ptos", {"decimate_factor": 2, "max_points": 2000})]:
+        v, t = _medir(lambda: rpde(y, sr, **kw), repeat)
+        print(f"  RPDE {etiqueta:<17} {v: .6f} ({t * 1000:.1f} ms)")
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Precisión y tiempos de RPDE/DFA/D2 frente a nolds.")
+    parser.add_argument("wavs", nargs="*", default=["recording.wav"])
+    parser.add_argument("--seconds", type=float, default=None, help="Recorta cada audio a estos segundos.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tol", type=float, default=1e-8, help="Diferencia relativa máxima admitida.")
+    parser.add_argument("--d2-tol", type=float, default=0.05,
+                        help="Diferencia relativa máxima del D2 submuestreado frente al exacto.")
+    args = parser.parse_args(argv)
+
+    import librosa
+
+    try:
+        from .shimmer import synthetic_vowel  # type: ignore
+    except ImportError:
+        from shimmer import synthetic_vowel  # type: ignore
+
+    casos = []
+    for w in args.wavs:
+        y, sr = librosa.load(w, sr=None)
+        casos.append((w, y, sr))
+    for i, (f0, sr) in enumerate([(120, 22050), (200, 44100)]):
+        casos.append((f"vocal sintética f0={f0} Hz", synthetic_vowel(f0=f0, dur=1.0, sr=sr, seed=i), sr))
+    ok = True
+    for nombre, y, sr in casos:
+        if args.seconds:
+            y = y[: int(args.seconds * sr)]
+        ok = _check(nombre, y, sr, args.repeat, args.tol, args.d2_tol) and ok
+    return 0 if ok else 1
+
+
+__all__ = [
+    "D2_DELAY",
+    "D2_DIM",
+    "D2_POINTS",
+    "D2_THEILER",
+    "DFA_WINDOWS",
+    "PPE_BINS",
+    "PPE_REFERENCE_HZ",
+    "RPDE_DELAY",
+    "RPDE_DIM",
+    "RPDE_POINTS",
+    "RPDE_RADIUS",
+    "RPDE_T_MAX",
+    "corr_dim",
+    "d2",
+    "decimate",
+    "delay_embedding",
+    "dfa",
+    "dfa_feature",
+    "nonlinear_features",
+    "ppe",
+    "recurrence_times",
+    "rpde",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
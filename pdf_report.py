@@ -9,9 +9,25 @@ Se mejora la presentación visual usando una paleta suave y estructura de inform
 - Tablas con cabecera destacada y zebra striping sutil
 - Resultados resumidos en una banda resaltada
 - Pie de página con numeración
+
+Lo que no depende del paciente (etiquetas traducidas y saneadas, y el corte
+en líneas de los párrafos fijos: introducción, aclaraciones, aviso) forma el
+"esqueleto" del informe y se calcula una vez por idioma (``report_skeleton``,
+caché LRU); cada informe sólo maqueta los datos del paciente. El corte de
+líneas de ``multi_cell`` era la mayor parte del coste por informe.
 """
+from dataclasses import dataclass
 from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Tuple
+
 from fpdf import FPDF
+from fpdf.enums import XPos, YPos
+
+try:
+    from .metrics import timed  # type: ignore
+except ImportError:
+    from metrics import timed  # type: ignore
 
 # Paleta (azules / verdes suaves orientados a entorno médico)
 PRIMARY_RGB = (34, 102, 153)      # Azul médico
@@ -44,6 +60,31 @@ class MedicalPDF(FPDF):
         self.set_text_color(120, 120, 120)
         self.cell(0, 8, f"Página {self.page_no()}/{{nb}}", align="C")
 
+    def justified_line(self, h: float, text: str, last: bool = False, w: float = 0, new_x: XPos = XPos.LMARGIN):
+        """Escribe una línea ya cortada con la misma justificación que
+        ``multi_cell`` (``cell`` no admite align="J") sin volver a cortarla:
+        el hueco sobrante se reparte entre las palabras y cada una se coloca
+        con ``cell``. ``w=0``: hasta el margen derecho."""
+        x0 = self.get_x()
+        if self.will_page_break(h):
+            self.add_page()
+            self.set_x(x0)
+        y0 = self.get_y()
+        if w == 0:
+            w = self.w - self.r_margin - x0
+        palabras = text.split(" ")
+        if last or len(palabras) < 2:
+            self.cell(w, h, text)
+        else:
+            anchos = [self.get_string_width(p) for p in palabras]
+            hueco = (w - 2 * self.c_margin - sum(anchos)) / (len(palabras) - 1)
+            x = x0
+            for palabra, ancho in zip(palabras, anchos):
+                self.set_x(x)
+                self.cell(ancho + 2 * self.c_margin, h, palabra)
+                x += ancho + hueco
+        self.set_xy(self.l_margin if new_x == XPos.LMARGIN else x0, y0 + h)
+
 
 def _sanitize(txt: str) -> str:
     return (txt or "").encode("latin-1", "ignore").decode("latin-1")
@@ -109,44 +150,149 @@ def _table_row(pdf: FPDF, cells, widths, zebra=False, center=False):
         pdf.set_x(start_x)
 
 
-def _interpretation_table(pdf: FPDF, headers, data, widths, center=True):
+def _interpretation_table(pdf: MedicalPDF, headers, data, widths, center=True):
     # Cabecera centrada
     total_w = sum(widths)
     usable = pdf.w - pdf.l_margin - pdf.r_margin
     offset = (usable - total_w) / 2 if center else 0
     start_x_global = pdf.get_x()
-    if center:
-        pdf.set_x(pdf.l_margin + max(0, offset))
+    x0 = pdf.l_margin + max(0, offset) if center else start_x_global
+    pdf.set_x(x0)
     _table_header(pdf, headers, widths)
     pdf.set_font("Helvetica", size=8)
     col1_w, col2_w = widths
     line_h = 5
     zebra = False
-    while data:
-        feat, texto = data[0]
+    for feat, texto in data:
         zebra = not zebra
-        # Calcular altura necesaria de interpretación antes de escribir para equilibrar celda de feature
-        # Guardar posición
-        x_start = pdf.get_x(); y_start = pdf.get_y()
-        if center:
-            pdf.set_x(pdf.l_margin + max(0, offset))
+        # Cada celda se corta en líneas una sola vez; la fila se dibuja con
+        # el alto de la celda más alta (ambas columnas quedan alineadas)
+        celdas = [
+            (x0, col1_w, pdf.multi_cell(col1_w, line_h, _sanitize(str(feat)), dry_run=True, output="LINES")),
+            (x0 + col1_w, col2_w, pdf.multi_cell(col2_w, line_h, _sanitize(texto), dry_run=True, output="LINES")),
+        ]
+        row_h = line_h * max(len(lines) for _, _, lines in celdas)
+        if pdf.will_page_break(row_h):
+            pdf.add_page()
+            pdf.set_font("Helvetica", size=8)
+        y = pdf.get_y()
         if zebra:
             pdf.set_fill_color(*ZEBRA_BG)
-        # Temporariamente escribir interpretación para medir
-        # Escribimos feature con multi_cell y luego interpretación ajustando alturas
-        # Feature
-        pdf.multi_cell(col1_w, line_h, _sanitize(str(feat)), border=1, fill=zebra)
-        y_feat_end = pdf.get_y()
-        # Interpretación
-        pdf.set_xy(x_start + col1_w, y_start)
-        pdf.multi_cell(col2_w, line_h, _sanitize(texto), border=1, fill=zebra)
-        y_interp_end = pdf.get_y()
-        pdf.set_xy(x_start, max(y_feat_end, y_interp_end))
-        data = data[1:]
+        for x, w, lines in celdas:
+            pdf.rect(x, y, w, row_h, "DF" if zebra else "D")
+            pdf.set_xy(x, y)
+            for i, line in enumerate(lines):
+                pdf.justified_line(line_h, line, last=i == len(lines) - 1, w=w, new_x=XPos.LEFT)
+        pdf.set_xy(x0, y + row_h)
     if center:
         pdf.set_x(start_x_global)
 
 
+# Textos fijos del informe (en español; se pasan por ``traducir_func``)
+REPORT_TEXTS = {
+    "titulo": "Reporte Personalizado de Fonética Vocal y Parkinson",
+    "subtitulo": "Informe clínico de análisis vocal asistido por IA",
+    "paciente": "Paciente:",
+    "fecha": "Fecha de análisis:",
+    "intro": (
+        "Este informe presenta un análisis de parámetros acústicos de tu voz. "
+        "La evaluación no constituye por sí sola un diagnóstico definitivo; "
+        "considérala un apoyo complementario y consulta siempre a un profesional de salud."
+    ),
+    "sec_variables": "Variables Analizadas",
+    "variable": "Variable",
+    "bruto": "Bruto",
+    "clip": "Clip",
+    "explic": (
+        "La columna 'Bruto' muestra el valor directo calculado a partir de la señal; 'Clip' es la versión limitada "
+        "al rango de referencia para reducir outliers y facilitar comparaciones estables."
+    ),
+    "sec_interp": "Interpretación de cada variable (IA)",
+    "interpretacion": "Interpretación",
+    "sec_resultados": "Resultados del análisis",
+    "diagnostico": "Diagnóstico:",
+    "prob_sano": "Probabilidad Sano:",
+    "prob_park": "Probabilidad Parkinson:",
+    "distribucion": "Distribución visual de probabilidades",
+    "aclaracion": (
+        "Estos resultados reflejan patrones estadísticos obtenidos mediante modelos de aprendizaje automático aplicados a características acústicas. "
+        "No reemplazan evaluaciones neurológicas, pruebas motoras ni otros estudios clínicos complementarios."
+    ),
+    "extra_diag": (
+        "Interpretación del estado: Un resultado 'saludable' indica que los patrones vocales analizados se encuentran dentro de parámetros esperados. "
+        "Si la probabilidad de Parkinson es moderada o alta, se recomienda evaluación clínica presencial para correlacionar con signos motores, cognitivos y antecedentes médicos."
+    ),
+    "sec_recom": "Recomendaciones personalizadas",
+    "educativo": (
+        "Consejo general: Mantener hábitos de sueño adecuados, hidratación y ejercicios de articulación vocal puede ayudar a conservar la claridad de la voz. "
+        "Cambios persistentes o progresivos deben ser revisados por un especialista."
+    ),
+    "disclaimer": (
+        "Aviso: Este documento no reemplaza una evaluación médica presencial. Consulte a un profesional ante cualquier duda o síntoma."
+    ),
+}
+
+# Párrafos fijos: (estilo, tamaño de fuente, alto de línea)
+_PARAGRAPHS = {
+    "intro": ("", 9, 5.5),
+    "explic": ("", 8, 4.3),
+    "aclaracion": ("", 8, 4.3),
+    "extra_diag": ("", 8, 4.1),
+    "educativo": ("", 8, 4.1),
+    "disclaimer": ("I", 7, 4),
+}
+
+
+@dataclass(frozen=True)
+class ReportSkeleton:
+    """Parte del informe que sólo depende del idioma."""
+
+    labels: Dict[str, str]             # etiquetas traducidas y saneadas
+    lines: Dict[str, Tuple[str, ...]]  # párrafos fijos ya cortados en líneas
+
+
+def _new_pdf() -> MedicalPDF:
+    pdf = MedicalPDF(format="A4")
+    pdf.alias_nb_pages()
+    pdf.set_left_margin(15)
+    pdf.set_right_margin(15)
+    pdf.set_top_margin(22)
+    pdf.set_auto_page_break(True, margin=15)
+    return pdf
+
+
+@lru_cache(maxsize=16)
+def _build_skeleton(textos: Tuple[Tuple[str, str], ...]) -> ReportSkeleton:
+    labels = {k: _sanitize(v) for k, v in textos}
+    pdf = _new_pdf()
+    pdf.add_page()
+    lines = {}
+    for key, (style, size, line_h) in _PARAGRAPHS.items():
+        pdf.set_font("Helvetica", style, size)
+        lines[key] = tuple(pdf.multi_cell(0, line_h, labels[key], dry_run=True, output="LINES"))
+    return ReportSkeleton(labels, lines)
+
+
+def report_skeleton(traducir_func, idioma: str) -> ReportSkeleton:
+    """Esqueleto del informe para ``idioma`` (cacheado por textos traducidos).
+
+    Las traducciones salen de catálogo/memoria, así que pedirlas es barato;
+    la clave de la caché son los propios textos, por lo que un cambio de
+    traducción invalida el esqueleto sin más.
+    """
+    return _build_skeleton(tuple((k, traducir_func(v, idioma)) for k, v in REPORT_TEXTS.items()))
+
+
+def _paragraph(pdf: FPDF, skel: ReportSkeleton, key: str):
+    """Escribe un párrafo fijo con sus líneas ya cortadas (justificado como multi_cell)."""
+    style, size, line_h = _PARAGRAPHS[key]
+    pdf.set_font("Helvetica", style, size)
+    lines = skel.lines[key]
+    for i, line in enumerate(lines):
+        pdf.justified_line(line_h, line, last=i == len(lines) - 1)
+
+
+@timed("pdf.build_report_pdf")
 def build_report_pdf(
     traducir_func,
     paciente: str,
@@ -162,45 +308,26 @@ def build_report_pdf(
 
     La firma se conserva igual. ``rows``: iterable (feature, raw, clip, ...). ``final_interps``: (feature, texto).
     """
+    skel = report_skeleton(traducir_func, idioma)
+    L = skel.labels
 
-    pdf = MedicalPDF(format="A4")
-    pdf.alias_nb_pages()
-    pdf.set_left_margin(15)
-    pdf.set_right_margin(15)
-    pdf.set_top_margin(22)
-    pdf.set_auto_page_break(True, margin=15)
-
-    # Etiquetas traducidas
-    titulo_pdf = traducir_func("Reporte Personalizado de Fonética Vocal y Parkinson", idioma)
-    pdf._title = _sanitize(titulo_pdf[:90])  # atributos usados por header
-    pdf._subtitle = _sanitize(traducir_func("Informe clínico de análisis vocal asistido por IA", idioma))
-    label_pac = traducir_func("Paciente:", idioma)
-    label_fecha = traducir_func("Fecha de análisis:", idioma)
+    pdf = _new_pdf()
+    pdf._title = L["titulo"][:90]  # atributos usados por header
+    pdf._subtitle = L["subtitulo"]
     fecha_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
     pdf.add_page()
 
     # Caja paciente
-    _patient_box(pdf, paciente, fecha_str, label_pac, label_fecha)
+    _patient_box(pdf, paciente, fecha_str, L["paciente"], L["fecha"])
 
     # Introducción
-    intro = traducir_func(
-        "Este informe presenta un análisis de parámetros acústicos de tu voz. "
-        "La evaluación no constituye por sí sola un diagnóstico definitivo; "
-        "considérala un apoyo complementario y consulta siempre a un profesional de salud.",
-        idioma,
-    )
-    pdf.set_font("Helvetica", size=9)
-    pdf.multi_cell(0, 5.5, _sanitize(intro))
+    _paragraph(pdf, skel, "intro")
     pdf.ln(3)
 
     # Sección Variables Analizadas
-    _section_title(pdf, traducir_func("Variables Analizadas", idioma))
-    headers = [
-        traducir_func("Variable", idioma),
-        traducir_func("Bruto", idioma),
-        traducir_func("Clip", idioma),
-    ]
+    _section_title(pdf, L["sec_variables"])
+    headers = [L["variable"], L["bruto"], L["clip"]]
     widths = [70, 35, 35]
     _table_header(pdf, headers, widths, center=True)
     zebra = False
@@ -209,40 +336,31 @@ def build_report_pdf(
         _table_row(pdf, [feat, f"{raw_val:.3f}", f"{clip_val:.3f}"], widths, zebra=zebra, center=True)
     pdf.ln(2)
 
-    explic = traducir_func(
-        "La columna 'Bruto' muestra el valor directo calculado a partir de la señal; 'Clip' es la versión limitada "
-        "al rango de referencia para reducir outliers y facilitar comparaciones estables.",
-        idioma,
-    )
-    pdf.set_font("Helvetica", size=8)
     pdf.set_text_color(90, 90, 90)
-    pdf.multi_cell(0, 4.3, _sanitize(explic))
+    _paragraph(pdf, skel, "explic")
     pdf.set_text_color(0, 0, 0)
     pdf.ln(4)
 
     # Interpretaciones
-    _section_title(pdf, traducir_func("Interpretación de cada variable (IA)", idioma))
+    _section_title(pdf, L["sec_interp"])
     _interpretation_table(
         pdf,
-        [traducir_func("Variable", idioma), traducir_func("Interpretación", idioma)],
-        list(final_interps),  # usar copia
+        [L["variable"], L["interpretacion"]],
+        final_interps,
         [55, 115],
         center=True,
     )
     pdf.ln(4)
 
     # Resultados del análisis (banda)
-    _section_title(pdf, traducir_func("Resultados del análisis", idioma))
-    label_diag = traducir_func("Diagnóstico:", idioma)
-    label_ps = traducir_func("Probabilidad Sano:", idioma)
-    label_pp = traducir_func("Probabilidad Parkinson:", idioma)
+    _section_title(pdf, L["sec_resultados"])
     # Caja formal para diagnóstico (un solo bloque para evitar desalineación)
     pdf.set_font("Helvetica", "B", 10)
     pdf.set_draw_color(*ACCENT_RGB)
     pdf.set_fill_color(245, 249, 251)
     diag_text = (
-        f"{label_diag} {diag_label}\n"
-        f"{label_ps} {sano_p:.1%}   |   {label_pp} {park_p:.1%}"
+        f"{L['diagnostico']} {diag_label}\n"
+        f"{L['prob_sano']} {sano_p:.1%}   |   {L['prob_park']} {park_p:.1%}"
     )
     pdf.multi_cell(0, 8, _sanitize(diag_text), border=1, fill=True)
     pdf.ln(1)
@@ -278,58 +396,128 @@ def build_report_pdf(
     pdf.set_y(bar_y + bar_h + 3)
     pdf.set_font('Helvetica', size=7)
     pdf.set_text_color(90,90,90)
-    pdf.cell(0,4, _sanitize(traducir_func('Distribución visual de probabilidades', idioma)), ln=1, align='C')
-    pdf.set_text_color(0,0,0)
+    pdf.cell(0,4, L["distribucion"], ln=1, align='C')
     pdf.set_text_color(0, 0, 0)
     pdf.ln(2)
 
-    aclaracion = traducir_func(
-        "Estos resultados reflejan patrones estadísticos obtenidos mediante modelos de aprendizaje automático aplicados a características acústicas. "
-        "No reemplazan evaluaciones neurológicas, pruebas motoras ni otros estudios clínicos complementarios.",
-        idioma,
-    )
-    pdf.set_font("Helvetica", size=8)
     pdf.set_text_color(90, 90, 90)
-    pdf.multi_cell(0, 4.3, _sanitize(aclaracion))
+    _paragraph(pdf, skel, "aclaracion")
     pdf.set_text_color(0, 0, 0)
     pdf.ln(2)
     # Bloque explicativo adicional del diagnóstico
-    extra_diag = traducir_func(
-        "Interpretación del estado: Un resultado 'saludable' indica que los patrones vocales analizados se encuentran dentro de parámetros esperados. "
-        "Si la probabilidad de Parkinson es moderada o alta, se recomienda evaluación clínica presencial para correlacionar con signos motores, cognitivos y antecedentes médicos.",
-        idioma,
-    )
-    pdf.set_font('Helvetica', size=8)
-    pdf.multi_cell(0,4.1,_sanitize(extra_diag))
+    _paragraph(pdf, skel, "extra_diag")
     pdf.ln(3)
 
     # Recomendaciones personalizadas
-    _section_title(pdf, traducir_func("Recomendaciones personalizadas", idioma))
+    _section_title(pdf, L["sec_recom"])
     pdf.set_font("Helvetica", size=9)
     # Normalizar texto muy largo: cortar en ~5000 chars para evitar PDF gigantes no deseados
     if len(recomendacion_extensa) > 5000:
         recomendacion_extensa = recomendacion_extensa[:5000] + "..."
     pdf.multi_cell(0, 5.2, _sanitize(recomendacion_extensa))
     # Texto educativo adicional
-    educativo = traducir_func(
-        "Consejo general: Mantener hábitos de sueño adecuados, hidratación y ejercicios de articulación vocal puede ayudar a conservar la claridad de la voz. "
-        "Cambios persistentes o progresivos deben ser revisados por un especialista.",
-        idioma,
-    )
     pdf.ln(1)
-    pdf.set_font('Helvetica', size=8)
     pdf.set_text_color(70,70,70)
-    pdf.multi_cell(0,4.1,_sanitize(educativo))
+    _paragraph(pdf, skel, "educativo")
     pdf.set_text_color(0,0,0)
     pdf.ln(2)
 
-    disclaimer = traducir_func(
-        "Aviso: Este documento no reemplaza una evaluación médica presencial. Consulte a un profesional ante cualquier duda o síntoma.",
-        idioma,
-    )
+    pdf.set_text_color(120, 120, 120)
+    _paragraph(pdf, skel, "disclaimer")
+
+    raw = pdf.output(dest="S")
+    return raw.encode("latin-1") if isinstance(raw, str) else bytes(raw)
+
+
+# Textos del resumen de cohorte (``build_cohort_pdf``)
+COHORT_TEXTS = {
+    "titulo": "Resumen de cohorte: análisis vocal y Parkinson",
+    "subtitulo": "Informe consolidado de la jornada",
+    "fecha": "Fecha de generación:",
+    "sec_resumen": "Resumen",
+    "total": "Pacientes procesados",
+    "saludable": "Estado saludable",
+    "intermedio": "Estado intermedio",
+    "riesgo": "Alta probabilidad de Parkinson",
+    "error": "Grabaciones con error",
+    "sec_pacientes": "Resultados por paciente",
+    "paciente": "Paciente",
+    "diagnostico": "Diagnóstico",
+    "p_sano": "Sano",
+    "p_park": "Parkinson",
+    "informe": "Informe",
+    "disclaimer": REPORT_TEXTS["disclaimer"],
+    # Textos por defecto de los informes individuales sin salida de IA
+    "interp_defecto": "Este indicador de voz es relevante. Recuerda mantener tu voz clara y relajada.",
+    "recom_defecto": (
+        "Comenta estos resultados con un especialista, que podrá valorarlos junto con tu historia clínica "
+        "y, si lo considera necesario, indicar pruebas complementarias."
+    ),
+}
+
+
+def build_cohort_pdf(traducir_func, registros, idioma: str) -> bytes:
+    """PDF consolidado de una cohorte: conteo por estado y una fila por paciente.
+
+    ``registros``: dicts con paciente, estado ("saludable" | "intermedio" |
+    "riesgo" | "error"), diag_label, p_sano, p_parkinson e informe (nombre del
+    PDF individual) o error.
+    """
+    L = {k: _sanitize(traducir_func(v, idioma)) for k, v in COHORT_TEXTS.items()}
+    pdf = _new_pdf()
+    pdf._title = L["titulo"][:90]
+    pdf._subtitle = L["subtitulo"]
+    pdf.add_page()
+
+    pdf.set_font("Helvetica", size=9)
+    pdf.cell(0, 6, f"{L['fecha']} {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", new_x=XPos.LMARGIN, new_y=YPos.NEXT)
+    pdf.ln(2)
+
+    _section_title(pdf, L["sec_resumen"])
+    conteo = {k: 0 for k in ("saludable", "intermedio", "riesgo", "error")}
+    for r in registros:
+        conteo[r["estado"]] = conteo.get(r["estado"], 0) + 1
+    resumen = [(L["total"], len(registros))] + [(L[k], n) for k, n in conteo.items()]
+    widths = [90, 30]
+    _table_header(pdf, [L["sec_resumen"], "N"], widths, center=True)
+    zebra = False
+    for etiqueta, n in resumen:
+        zebra = not zebra
+        _table_row(pdf, [etiqueta, n], widths, zebra=zebra, center=True)
+    pdf.ln(4)
+
+    _section_title(pdf, L["sec_pacientes"])
+    headers = [L["paciente"], L["diagnostico"], L["p_sano"], L["p_park"], L["informe"]]
+    widths = [45, 50, 17, 17, 51]
+    _table_header(pdf, headers, widths, center=True)
+    zebra = False
+    for r in registros:
+        if pdf.will_page_break(6):
+            pdf.add_page()
+            _table_header(pdf, headers, widths, center=True)
+        zebra = not zebra
+        if r["estado"] == "error":
+            celdas = [r["paciente"], L["error"], "-", "-", str(r.get("error", ""))[:40]]
+        else:
+            celdas = [
+                r["paciente"][:30], r["diag_label"], f"{r['p_sano']:.1%}", f"{r['p_parkinson']:.1%}", r["informe"][:40],
+            ]
+        _table_row(pdf, celdas, widths, zebra=zebra, center=True)
+    pdf.ln(3)
+
     pdf.set_font("Helvetica", "I", 7)
     pdf.set_text_color(120, 120, 120)
-    pdf.multi_cell(0, 4, _sanitize(disclaimer))
+    pdf.multi_cell(0, 4, L["disclaimer"])
 
     raw = pdf.output(dest="S")
     return raw.encode("latin-1") if isinstance(raw, str) else bytes(raw)
+
+
+__all__ = [
+    "COHORT_TEXTS",
+    "REPORT_TEXTS",
+    "ReportSkeleton",
+    "build_cohort_pdf",
+    "build_report_pdf",
+    "report_skeleton",
+]
@@ -0,0 +1,183 @@
+"""Familia de shimmer en NumPy a partir de las amplitudes por periodo.
+
+Cada "Get shimmer (...)" de Praat sobre ``[snd, pp]`` vuelve a recorrer la
+señal para sacar la amplitud de cada periodo. Aquí esas amplitudes se
+extraen una sola vez (``period_amplitudes``: "To AmplitudeTier (period)") y
+todas las medidas salen del mismo par de arrays con operaciones vectorizadas
+(``shimmer_measures``):
+
+    local     media |A_i - A_i+1| / media A
+    local_dB  media |20·log10(A_i+1 / A_i)|
+    apqK      media |A_i - media de sus K vecinas| / media A   (K = 3, 5, 11)
+    dda       3 · apq3
+
+Los criterios son los de Praat: periodos entre ``period_min`` y
+``period_max`` y cociente entre amplitudes vecinas ≤ ``max_amplitude_factor``;
+el denominador es la media de todas las amplitudes menos la última. Las
+ventanas de apqK son sumas acumuladas (sin bucles por periodo).
+
+Comprobación de paridad contra Praat (recording.wav + vocales sintéticas):
+    python shimmer.py                 # sale con código 1 si alguna difiere
+    python shimmer.py otro.wav --repeat 20
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import Dict, Tuple
+
+import numpy as np
+import parselmouth
+from parselmouth.praat import call
+
+# Parámetros por defecto de Praat (y de funcion.extract_parkinson_features)
+PERIOD_MIN = 1e-4
+PERIOD_MAX = 0.02
+MAX_PERIOD_FACTOR = 1.3
+MAX_AMPLITUDE_FACTOR = 1.6
+
+SHIMMER_MEASURES = ["local", "local_dB", "apq3", "apq5", "apq11", "dda"]
+APQ_POINTS = (3, 5, 11)
+
+
+def period_amplitudes(
+    snd: parselmouth.Sound,
+    pp,
+    period_min: float = PERIOD_MIN,
+    period_max: float = PERIOD_MAX,
+    max_period_factor: float = MAX_PERIOD_FACTOR,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(tiempos, amplitudes) de cada periodo válido del PointProcess, como
+    los calcula Praat para el shimmer. Arrays vacíos si no hay periodos."""
+    try:
+        tier = call([snd, pp], "To AmplitudeTier (period)", 0, 0, period_min, period_max, max_period_factor)
+        m = call(call(tier, "Down to TableOfReal"), "To Matrix").values
+    except parselmouth.PraatError:
+        return np.empty(0), np.empty(0)
+    if m.size == 0:
+        return np.empty(0), np.empty(0)
+    return m[:, 0].copy(), m[:, 1].copy()
+
+
+def shimmer_measures(
+    t: np.ndarray,
+    a: np.ndarray,
+    period_min: float = PERIOD_MIN,
+    period_max: float = PERIOD_MAX,
+    max_amplitude_factor: float = MAX_AMPLITUDE_FACTOR,
+) -> Dict[str, float]:
+    """Todas las medidas de ``SHIMMER_MEASURES`` (NaN si no se pueden calcular)."""
+    t = np.asarray(t, dtype=np.float64)
+    a = np.asarray(a, dtype=np.float64)
+    res = dict.fromkeys(SHIMMER_MEASURES, np.nan)
+    n = a.size
+    if n < 2:
+        return res
+    media = np.mean(a[:-1])
+    if media == 0:
+        return res
+
+    # Par (i, i+1) válido: periodo en rango y amplitudes comparables
+    p = np.diff(t)
+    a1, a2 = a[:-1], a[1:]
+    ok = (p >= period_min) & (p <= period_max) & (np.maximum(a1 / a2, a2 / a1) <= max_amplitude_factor)
+    if ok.any():
+        res["local"] = float(np.mean(np.abs(a1 - a2)[ok]) / media)
+        res["local_dB"] = float(np.mean(np.abs(20 * np.log10(a2[ok] / a1[ok]))))
+
+    # Ventanas de K puntos: válidas si sus K-1 pares lo son; medias por cumsum
+    malos = np.concatenate(([0], np.cumsum(~ok)))
+    acum = np.concatenate(([0.0], np.cumsum(a)))
+    for k in APQ_POINTS:
+        m = n - k + 1
+        if m < 1:
+            continue
+        validas = malos[k - 1: k - 1 + m] == malos[:m]
+        if not validas.any():
+            continue
+        medias_k = (acum[k: k + m] - acum[:m]) / k
+        centro = a[k // 2: k // 2 + m]
+        res[f"apq{k}"] = float(np.mean(np.abs(centro - medias_k)[validas]) / media)
+    res["dda"] = 3 * res["apq3"]
+    return res
+
+
+def synthetic_vowel(
+    f0: float = 140.0,
+    dur: float = 2.0,
+    sr: int = 44100,
+    jitter: float = 0.01,
+    shimmer: float = 0.05,
+    seed: int = 0,
+) -> np.ndarray:
+    """Vocal sostenida sintética: pulsos glotales amortiguados con jitter y
+    shimmer gaussianos relativos (para pruebas y benchmarks)."""
+    rng = np.random.default_rng(seed)
+    partes = []
+    total = 0
+    while total < dur * sr:
+        periodo = (1 + jitter * rng.standard_normal()) / f0
+        amp = 1 + shimmer * rng.standard_normal()
+        tt = np.arange(int(periodo * sr)) / sr
+        w = 2 * np.pi * tt / periodo
+        partes.append(amp * (np.sin(w) + 0.5 * np.sin(2 * w) + 0.3 * np.sin(3 * w)) * np.exp(-3 * tt / periodo))
+        total += partes[-1].size
+    y = np.concatenate(partes)[: int(dur * sr)]
+    return y / np.max(np.abs(y))
+
+
+def _praat_measures(snd, pp) -> Dict[str, float]:
+    args = (0, 0, PERIOD_MIN, PERIOD_MAX, MAX_PERIOD_FACTOR, MAX_AMPLITUDE_FACTOR)
+    return {m: call([snd, pp], f"Get shimmer ({m})", *args) for m in SHIMMER_MEASURES}
+
+
+def _check(nombre: str, snd: parselmouth.Sound, repeat: int, tol: float) -> bool:
+    pp = call(snd, "To PointProcess (periodic, cc)", 75, 500)
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        ref = _praat_measures(snd, pp)
+    t_praat = (time.perf_counter() - t0) / repeat
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        nuestro = shimmer_measures(*period_amplitudes(snd, pp))
+    t_numpy = (time.perf_counter() - t0) / repeat
+    ok = True
+    print(f"{nombre}: Praat {t_praat * 1000:.2f} ms ({len(SHIMMER_MEASURES)} llamadas) | NumPy {t_numpy * 1000:.2f} ms")
+    for m in SHIMMER_MEASURES:
+        r, v = ref[m], nuestro[m]
+        igual = (np.isnan(r) and np.isnan(v)) or abs(r - v) <= tol * max(1.0, abs(r))
+        ok = ok and igual
+        print(f"  {m:<9} praat={r: .12f}  numpy={v: .12f}  {'ok' if igual else 'DIFIERE'}")
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Paridad y tiempos de la familia de shimmer frente a Praat.")
+    parser.add_argument("wavs", nargs="*", default=["recording.wav"])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--tol", type=float, default=1e-9, help="Diferencia relativa máxima admitida.")
+    args = parser.parse_args(argv)
+    casos = [(w, parselmouth.Sound(w)) for w in args.wavs]
+    for i, (f0, jit, shim) in enumerate([(110, 0.005, 0.02), (150, 0.01, 0.05), (220, 0.02, 0.12)]):
+        y = synthetic_vowel(f0=f0, jitter=jit, shimmer=shim, seed=i)
+        casos.append((f"vocal sintética f0={f0} Hz, shimmer={shim}", parselmouth.Sound(y, sampling_frequency=44100)))
+    ok = all([_check(nombre, snd, args.repeat, args.tol) for nombre, snd in casos])
+    return 0 if ok else 1
+
+
+__all__ = [
+    "APQ_POINTS",
+    "MAX_AMPLITUDE_FACTOR",
+    "MAX_PERIOD_FACTOR",
+    "PERIOD_MAX",
+    "PERIOD_MIN",
+    "SHIMMER_MEASURES",
+    "period_amplitudes",
+    "shimmer_measures",
+    "synthetic_vowel",
+]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
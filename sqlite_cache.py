@@ -0,0 +1,107 @@
+"""Almacén clave/valor persistente sobre SQLite con TTL y expulsión LRU.
+
+Pensado para cachés pequeñas compartidas entre hilos y procesos (varios
+workers de Streamlit en el mismo host): modo WAL, ``busy_timeout`` y una
+conexión por hilo. Los valores son texto.
+
+    c = SQLiteCache(".cache/x.sqlite", ttl=3600, max_entries=1000)
+    c.set("k", "v"); c.get("k")  # -> "v" (o None si expiró / no existe)
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class SQLiteCache:
+    """ttl: segundos de vida (None = sin caducidad).
+    max_entries / max_bytes: límites tras los que se expulsan las entradas
+    con acceso más antiguo (None = sin límite)."""
+
+    def __init__(
+        self,
+        path,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                " size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            con.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed)")
+
+    def _conn(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None or getattr(self._local, "pid", None) != os.getpid():
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            con.execute("PRAGMA busy_timeout=30000")
+            self._local.con = con
+            self._local.pid = os.getpid()
+        return con
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        con = self._conn()
+        row = con.execute("SELECT value, created FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        value, created = row
+        if self.ttl is not None and now - created > self.ttl:
+            con.execute("DELETE FROM cache WHERE key = ?", (key,))
+            return None
+        con.execute("UPDATE cache SET accessed = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value: str) -> None:
+        now = time.time()
+        con = self._conn()
+        con.execute(
+            "INSERT OR REPLACE INTO cache (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, value, len(value.encode("utf-8")), now, now),
+        )
+        self._evict(con, now)
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def _evict(self, con: sqlite3.Connection, now: float) -> None:
+        if self.ttl is not None:
+            con.execute("DELETE FROM cache WHERE created < ?", (now - self.ttl,))
+        if self.max_entries is not None:
+            con.execute(
+                "DELETE FROM cache WHERE key IN ("
+                " SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        if self.max_bytes is not None:
+            total = con.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total > self.max_bytes:
+                # Recorre de la más antigua a la más reciente hasta quedar bajo el límite
+                borrar = []
+                for key, size in con.execute("SELECT key, size FROM cache ORDER BY accessed ASC"):
+                    if total <= self.max_bytes:
+                        break
+                    borrar.append((key,))
+                    total -= size
+                con.executemany("DELETE FROM cache WHERE key = ?", borrar)
+
+
+__all__ = ["SQLiteCache"]
@@ -0,0 +1,291 @@
+"""Extracción incremental de features mientras el usuario aún graba.
+
+``funcion.extract_parkinson_features_from_array`` procesa la grabación
+completa después de "Analizar". ``StreamingExtractor`` consume el audio por
+trozos a medida que llega y mantiene el estado necesario para que, al pulsar
+"Detener", sólo quede analizar el último bloque:
+
+  - Límites del recorte: RMS por frame (mismos frames que
+    ``librosa.effects.trim``: 2048/512, centrados con ceros) calculado para
+    cada frame completo; los límites se recalculan sobre ese array con la
+    referencia (máximo) vigente.
+  - Pitch (spread1): cada bloque de ``block_seconds`` (con un margen a
+    ambos lados) pasa por ``feature_engine.analyze_pitch`` y se guardan (tiempo,
+    f0). El umbral de silencio de Praat es relativo al pico del sonido
+    analizado; se reescala con el pico global acumulado para que un bloque
+    suave no se juzgue como si fuera el más fuerte.
+  - Periodos y amplitudes (shimmer): del mismo Pitch, "To PointProcess (cc)"
+    y "To AmplitudeTier (period)"; se guardan (tiempo, amplitud) de cada
+    periodo y el shimmer se calcula al final con
+    ``shimmer.shimmer_measures``.
+
+Los bloques arrancan en el inicio de la voz. Si al final el recorte empieza
+más tarde (llegó audio más fuerte), sólo se rehace el primer bloque; el
+último se corta en el fin del recorte. ``finalize`` filtra f0 y amplitudes a
+esos límites y devuelve las mismas 3 features que ``funcion``. Con un solo
+bloque coincide con ``extract_parkinson_features_from_array``; con varios
+difiere un poco porque el seguimiento de pitch de Praat es global.
+``python streaming_features.py [audio.wav ...]`` comprueba la paridad con un
+bloque sobre los WAV dados y vocales sintéticas (sale con 1 si alguna
+feature difiere más de ``--tol``) e informa de la diferencia con bloques de
+``--block`` segundos.
+
+    ext = StreamingExtractor(sr=44100)
+    for chunk in chunks:            # float32 mono (o int16 con feed_pcm16)
+        ext.feed(chunk)
+    feats = ext.finalize()          # {"spread1": ..., "MDVP:APQ": ..., "MDVP:Shimmer": ...}
+
+``streamlit_mic_recorder`` sólo entrega el WAV al terminar, así que la app
+no usa este módulo: queda listo (y comprobado) para un grabador que emita
+trozos (WebRTC / componente propio).
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import librosa
+import numpy as np
+import parselmouth
+from parselmouth.praat import call
+
+from feature_engine import PITCH_SILENCE_THRESHOLD, analyze_pitch
+from funcion import MODEL_FEATURES
+from shimmer import period_amplitudes, shimmer_measures, synthetic_vowel
+
+FRAME_LENGTH = 2048
+HOP_LENGTH = 512
+
+
+
+class StreamingExtractor:
+    """Estado incremental de una grabación mono a ``sr`` Hz.
+
+    block_seconds: tamaño de los bloques que se analizan con Praat durante
+    la grabación (lo que queda para ``finalize`` es como mucho un bloque).
+    margin_seconds: contexto extra a cada lado del bloque; los resultados
+    sólo se guardan dentro del bloque.
+    """
+
+    def __init__(self, sr: int, block_seconds: float = 1.0, margin_seconds: float = 0.1, top_db: float = 20):
+        self.sr = int(sr)
+        self.block = max(HOP_LENGTH, int(block_seconds * sr))
+        self.margin = int(margin_seconds * sr)
+        self.top_db = top_db
+        self._buf = np.zeros(self.block * 4, dtype=np.float32)
+        self._n = 0
+        self._rms: List[np.ndarray] = []
+        self._n_frames = 0
+        self._peak = 0.0
+        self._start: Optional[int] = None  # inicio de la voz (ancla de los bloques)
+        self._done = 0  # muestras ya analizadas con Praat
+        # [ini, fin, tiempos f0, f0, tiempos de periodo, amplitudes] por bloque
+        self._blocks: List[list] = []
+        self.finished = False
+
+    # -- Entrada -------------------------------------------------------------
+    def feed(self, chunk) -> None:
+        """Añade muestras (float, mono o (canales, muestras))."""
+        if self.finished:
+            raise RuntimeError("El extractor ya se finalizó")
+        chunk = np.asarray(chunk, dtype=np.float32)
+        if chunk.ndim > 1:
+            chunk = librosa.to_mono(chunk)
+        if chunk.size == 0:
+            return
+        if self._n + chunk.size > self._buf.size:
+            nuevo = np.zeros(max(self._buf.size * 2, self._n + chunk.size), dtype=np.float32)
+            nuevo[: self._n] = self._buf[: self._n]
+            self._buf = nuevo
+        self._buf[self._n: self._n + chunk.size] = chunk
+        self._n += chunk.size
+        self._peak = max(self._peak, float(np.max(np.abs(chunk))))
+        self._update_rms(final=False)
+        if self._start is None:
+            # Los bloques empiezan donde empieza la voz (como el recorte del
+            # análisis por lotes); antes no hay nada que analizar
+            inicio, fin = self.bounds
+            if fin <= inicio:
+                return
+            self._start = self._done = inicio
+        while self._done + self.block + self.margin <= self._n:
+            self._analyze(self._done, self._done + self.block)
+
+    def feed_pcm16(self, data: bytes, channels: int = 1) -> None:
+        """Añade PCM de 16 bits intercalado (lo que emite un grabador web)."""
+        pcm = np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+        if channels > 1:
+            pcm = pcm[: pcm.size - pcm.size % channels].reshape(-1, channels).T
+        self.feed(pcm)
+
+    # -- Estado --------------------------------------------------------------
+    @property
+    def duration(self) -> float:
+        return self._n / self.sr
+
+    @property
+    def bounds(self) -> Tuple[int, int]:
+        """(inicio, fin) en muestras de la parte no silenciosa hasta ahora."""
+        if not self._rms:
+            return 0, 0
+        rms = np.concatenate(self._rms)
+        db = librosa.amplitude_to_db(rms, ref=np.max, top_db=None)
+        activos = np.flatnonzero(db > -self.top_db)
+        if activos.size == 0:
+            return 0, 0
+        inicio = int(librosa.frames_to_samples(activos[0], hop_length=HOP_LENGTH))
+        fin = min(self._n, int(librosa.frames_to_samples(activos[-1] + 1, hop_length=HOP_LENGTH)))
+        return inicio, fin
+
+    def _update_rms(self, final: bool) -> None:
+        # Frame k (centrado) cubre y[k*hop - L/2 : k*hop + L/2]; sólo se
+        # calculan los frames completos (al final, con ceros a la derecha)
+        half = FRAME_LENGTH // 2
+        ultimo = self._n // HOP_LENGTH if final else (self._n - half) // HOP_LENGTH
+        if ultimo < self._n_frames:
+            return
+        ini = self._n_frames * HOP_LENGTH - half
+        fin = ultimo * HOP_LENGTH + half
+        seg = self._buf[max(0, ini): min(fin, self._n)]
+        seg = np.pad(seg, (max(0, -ini), max(0, fin - self._n)))
+        frames = librosa.util.frame(seg, frame_length=FRAME_LENGTH, hop_length=HOP_LENGTH)
+        self._rms.append(np.sqrt(np.mean(librosa.util.abs2(frames), axis=-2)))
+        self._n_frames = ultimo + 1
+
+    def _analyze(self, ini: int, fin: int, hasta: Optional[int] = None) -> None:
+        """Pitch y amplitudes por periodo de [ini, fin), con margen de contexto
+        que no pasa del inicio de la voz ni de ``hasta``."""
+        a = max(self._start or 0, ini - self.margin)
+        b = min(self._n if hasta is None else hasta, fin + self.margin)
+        seg = self._buf[a:b].astype(np.float64)
+        self._done = max(self._done, fin)
+        vacio = np.empty(0)
+        bloque = [ini, fin, vacio, vacio, vacio, vacio]
+        self._blocks.append(bloque)
+        pico = float(np.max(np.abs(seg))) if seg.size else 0.0
+        if pico == 0.0 or seg.size < self.sr * 0.05:
+            return
+        t0, t1 = ini / self.sr, fin / self.sr
+        snd = parselmouth.Sound(seg, sampling_frequency=self.sr, start_time=a / self.sr)
+
+        silencio = min(1.0, PITCH_SILENCE_THRESHOLD * self._peak / pico)
+        pitch = analyze_pitch(snd, silencio)
+        ts, f0 = pitch.xs(), pitch.selected_array["frequency"]
+        dentro = (ts >= t0) & (ts < t1)
+        bloque[2:4] = ts[dentro], f0[dentro]
+
+        try:
+            pp = call([snd, pitch], "To PointProcess (cc)")
+        except parselmouth.PraatError:
+            return
+        tp, amp = period_amplitudes(snd, pp)
+        dentro = (tp >= t0) & (tp < t1)
+        bloque[4:6] = tp[dentro], amp[dentro]
+
+    # -- Cierre --------------------------------------------------------------
+    def finalize(self) -> dict:
+        """Analiza lo que quede y devuelve las features de MODEL_FEATURES."""
+        if not self.finished:
+            self._update_rms(final=True)
+            self.finished = True
+        inicio, fin = self.bounds
+        if fin <= inicio:
+            raise ValueError("Audio vacío")
+        if self._start != inicio:
+            # Llegó audio más fuerte y el recorte empieza más tarde que el
+            # ancla: se rehace sólo el tramo hasta el primer bloque válido
+            self._blocks = [b for b in self._blocks if b[0] >= inicio]
+            siguiente = self._blocks[0][0] if self._blocks else max(self._done, inicio)
+            self._start = inicio
+            if siguiente > inicio:
+                self._analyze(inicio, siguiente)
+        if self._done < fin:
+            self._analyze(self._done, fin, hasta=fin)
+        t0, t1 = inicio / self.sr, fin / self.sr
+
+        ts, f0, tp, amp = (
+            np.concatenate([b[k] for b in self._blocks]) if self._blocks else np.empty(0) for k in range(2, 6)
+        )
+        f0 = f0[(ts >= t0) & (ts < t1) & (f0 > 0)]
+        if f0.size:
+            fo_bar = np.mean(f0)
+            spread1 = np.log(np.mean(np.abs(f0 - fo_bar)) / fo_bar)
+        else:
+            spread1 = np.nan
+
+        dentro = (tp >= t0) & (tp < t1)
+        tp, amp = tp[dentro], amp[dentro]
+        # Mismo criterio que funcion: apq3, o apq5 si apq3 no sale
+        shim = shimmer_measures(tp, amp)
+        apq = shim["apq3"] if not np.isnan(shim["apq3"]) else shim["apq5"]
+        shimmer = shim["local"]
+
+        valores = {"spread1": spread1, "MDVP:APQ": apq, "MDVP:Shimmer": shimmer}
+        return {f: float(0.0 if np.isnan(valores[f]) else valores[f]) for f in MODEL_FEATURES}
+
+
+def _feed_all(y: np.ndarray, sr: int, chunk_ms: float, block_seconds: float) -> Tuple[dict, float, float]:
+    """Alimenta ``y`` en trozos; devuelve (features, trozo más lento, finalize) en s."""
+    paso = max(1, int(sr * chunk_ms / 1000))
+    ext = StreamingExtractor(sr, block_seconds=block_seconds)
+    t_feed = 0.0
+    for i in range(0, y.size, paso):
+        t = time.perf_counter()
+        ext.feed(y[i: i + paso])
+        t_feed = max(t_feed, time.perf_counter() - t)
+    t = time.perf_counter()
+    feats = ext.finalize()
+    return feats, t_feed, time.perf_counter() - t
+
+
+def _compare(nombre: str, y: np.ndarray, sr: int, chunk_ms: float, block_seconds: float, tol: float) -> bool:
+    """Simula una grabación en trozos y la compara con el análisis por lotes.
+
+    Con un único bloque (más largo que el audio) el resultado debe coincidir
+    con ``extract_parkinson_features_from_array`` dentro de ``tol`` relativa;
+    con bloques de ``block_seconds`` sólo se informa de la diferencia.
+    """
+    from funcion import extract_parkinson_features_from_array
+
+    t = time.perf_counter()
+    lote = extract_parkinson_features_from_array(y, sr)
+    t_lote = time.perf_counter() - t
+    uno, _, _ = _feed_all(y, sr, chunk_ms, y.size / sr + 1.0)
+    inc, t_feed, t_final = _feed_all(y, sr, chunk_ms, block_seconds)
+    print(f"{nombre}: {y.size / sr:.1f} s, trozos de {chunk_ms:.0f} ms")
+    print(f"  trozo más lento: {t_feed * 1000:.1f} ms | tras 'Detener': {t_final * 1000:.1f} ms | lote: {t_lote * 1000:.1f} ms")
+    ok = True
+    for f in MODEL_FEATURES:
+        igual = abs(uno[f] - lote[f]) <= tol * max(abs(lote[f]), 1e-12)
+        ok = ok and igual
+        print(f"  {f:<14} lote={lote[f]: .6f}  un bloque={uno[f]: .6f} {'ok' if igual else 'DIFIERE'}"
+              f"  bloques de {block_seconds:g} s={inc[f]: .6f}")
+    return ok
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compara la extracción incremental con la de lotes.")
+    parser.add_argument("wavs", nargs="*", default=["recording.wav"])
+    parser.add_argument("--chunk-ms", type=float, default=100, help="Tamaño de los trozos simulados.")
+    parser.add_argument("--block", type=float, default=1.0, help="Segundos por bloque de análisis.")
+    parser.add_argument("--tol", type=float, default=0.001,
+                        help="Diferencia relativa máxima admitida con un solo bloque.")
+    args = parser.parse_args(argv)
+
+    casos = [(w, *librosa.load(w, sr=None)) for w in args.wavs]
+    for i, (f0, jit, shim) in enumerate([(110, 0.005, 0.02), (150, 0.01, 0.05), (220, 0.02, 0.12)]):
+        y = synthetic_vowel(f0=f0, jitter=jit, shimmer=shim, seed=i)
+        casos.append((f"vocal sintética f0={f0} Hz, shimmer={shim}", y, 44100))
+    ok = True
+    for nombre, y, sr in casos:
+        ok = _compare(nombre, y, sr, args.chunk_ms, args.block, args.tol) and ok
+    return 0 if ok else 1
+
+
+__all__ = ["StreamingExtractor"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
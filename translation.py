@@ -0,0 +1,302 @@
+"""Traducción por lotes de los textos de la interfaz.
+
+Una página de resultados usa decenas de ``traducir(...)``; traducidos uno a
+uno son decenas de round trips secuenciales por rerun con la caché fría. Aquí
+los textos de una pasada se recogen primero (``prefetch``) y se traducen
+juntos:
+
+  - Los pendientes se deduplican y se unen con un separador en bloques de
+    menos de ``MAX_CHARS`` caracteres (límite de la API), un request por
+    bloque; los bloques se lanzan a la vez en un pool de hilos.
+  - Si el traductor altera el separador y no sale el mismo número de
+    piezas, ese bloque se traduce texto a texto (también en paralelo).
+
+Después, ``translate(texto, dest)`` es una consulta a memoria. Los textos
+fijos de una página se obtienen con ``collect_literals`` (literales pasados a
+``traducir`` en el código fuente).
+
+Antes que la memoria se consultan los catálogos precompilados
+``locales/<idioma>.json`` (``python catalogs.py build``): con ellos los
+textos fijos de la app y del PDF no generan ningún request y la traducción en
+línea queda sólo para el texto dinámico (IA).
+
+Detrás de la memoria hay una caché persistente en SQLite (``sqlite_cache``),
+compartida por todos los procesos del host y que sobrevive a reinicios y
+despliegues. Clave = hash(idioma, texto); tamaño acotado con expulsión LRU.
+
+Variables de entorno:
+    TRANSLATION_CACHE          "0" desactiva la caché en disco (por defecto activa)
+    TRANSLATION_CACHE_PATH     archivo SQLite (por defecto .cache/translations.sqlite)
+    TRANSLATION_CACHE_MAX_MB   tamaño máximo de los textos guardados (por defecto 64)
+    TRANSLATION_CACHE_TTL      segundos de vida (por defecto sin caducidad)
+
+    tr = Translator()
+    tr.prefetch(["Variables", "Diagnóstico"], "en")
+    tr.translate("Variables", "en")   # -> "Variables" sin red
+"""
+from __future__ import annotations
+
+import ast
+import hashlib
+import json
+import os
+import logging
+import threading
+from functools import lru_cache
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from deep_translator import GoogleTranslator
+
+try:
+    from .sqlite_cache import SQLiteCache  # type: ignore
+except ImportError:
+    from sqlite_cache import SQLiteCache  # type: ignore
+
+MAX_CHARS = 4500
+SEPARATOR = "\n~~~\n"
+LOCALES_DIR = Path(__file__).resolve().parent / "locales"
+
+logger = logging.getLogger(__name__)
+
+
+def google_translate(texto: str, dest: str) -> str:
+    return GoogleTranslator(source="auto", target=dest).translate(texto) or ""
+
+
+def _chunks(textos: List[str], max_chars: int) -> List[List[str]]:
+    """Agrupa textos consecutivos sin pasar de ``max_chars`` por bloque."""
+    bloques: List[List[str]] = []
+    actual: List[str] = []
+    largo = 0
+    for t in textos:
+        extra = len(t) + (len(SEPARATOR) if actual else 0)
+        if actual and largo + extra > max_chars:
+            bloques.append(actual)
+            actual, largo = [], 0
+            extra = len(t)
+        actual.append(t)
+        largo += extra
+    if actual:
+        bloques.append(actual)
+    return bloques
+
+
+def catalog_path(lang: str, locales_dir: Path = LOCALES_DIR) -> Path:
+    return Path(locales_dir) / f"{lang}.json"
+
+
+def load_catalog(lang: str, locales_dir: Path = LOCALES_DIR) -> Dict[str, str]:
+    """Catálogo {texto en español: traducción}; vacío si no existe."""
+    path = catalog_path(lang, locales_dir)
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        logger.exception("Catálogo de traducción corrupto: %s", path)
+        return {}
+
+
+@lru_cache(maxsize=None)
+def collect_literals(path: str, func_name: str) -> tuple:
+    """Cadenas literales pasadas como primer argumento a ``func_name`` en un
+    archivo fuente (p.e. todos los ``traducir("...", idioma)`` de app.py).
+
+    Sirve para saber de antemano qué textos fijos va a pedir una página.
+    Los f-strings y variables no se incluyen.
+    """
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    textos = []
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == func_name
+            and node.args
+            and isinstance(node.args[0], ast.Constant)
+            and isinstance(node.args[0].value, str)
+        ):
+            textos.append(node.args[0].value)
+    return tuple(dict.fromkeys(textos))
+
+
+class TranslationStore:
+    """Traducciones persistentes sobre ``SQLiteCache``; los errores de disco
+    se ignoran (la app sigue, sólo que sin caché)."""
+
+    def __init__(self, path, max_bytes: Optional[int] = None, ttl: Optional[float] = None):
+        self.store = SQLiteCache(path, ttl=ttl, max_bytes=max_bytes)
+
+    @classmethod
+    def from_env(cls) -> Optional["TranslationStore"]:
+        if os.getenv("TRANSLATION_CACHE", "1") == "0":
+            return None
+        default_path = Path(__file__).resolve().parent / ".cache" / "translations.sqlite"
+        ttl = os.getenv("TRANSLATION_CACHE_TTL")
+        try:
+            return cls(
+                os.getenv("TRANSLATION_CACHE_PATH") or default_path,
+                max_bytes=int(float(os.getenv("TRANSLATION_CACHE_MAX_MB", "64")) * 1024 * 1024),
+                ttl=float(ttl) if ttl else None,
+            )
+        except Exception:
+            return None
+
+    @staticmethod
+    def key(texto: str, dest: str) -> str:
+        return hashlib.sha256(f"{dest}\0{texto}".encode("utf-8")).hexdigest()
+
+    def get(self, texto: str, dest: str) -> Optional[str]:
+        try:
+            return self.store.get(self.key(texto, dest))
+        except Exception:
+            return None
+
+    def set_many(self, pares: Iterable[Tuple[str, str]], dest: str) -> None:
+        try:
+            for texto, traducido in pares:
+                self.store.set(self.key(texto, dest), traducido)
+        except Exception:
+            logger.exception("No se pudo guardar la traducción en disco")
+
+
+class Translator:
+    """Caché en memoria de traducciones con relleno por lotes.
+
+    backend: función (texto, idioma) -> texto; por defecto Google Translate.
+    locales_dir: carpeta de catálogos precompilados (None = sin catálogos);
+    cada idioma se carga una vez, la primera vez que se pide.
+    store: caché persistente (``TranslationStore``) o None.
+    Ante error de red se devuelve el texto original (no rompe la UI) y no se
+    memoriza, para reintentar en el siguiente rerun.
+    """
+
+    def __init__(
+        self,
+        backend: Callable[[str, str], str] = google_translate,
+        max_chars: int = MAX_CHARS,
+        workers: int = 8,
+        locales_dir: Optional[Path] = LOCALES_DIR,
+        store: Optional[TranslationStore] = None,
+    ):
+        self.backend = backend
+        self.max_chars = max_chars
+        self.locales_dir = locales_dir
+        self.store = store
+        self._catalogs: Dict[str, Dict[str, str]] = {}
+        self._memo: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="traduccion")
+
+    # -- Consulta ------------------------------------------------------------
+    def catalog(self, dest: str) -> Dict[str, str]:
+        cat = self._catalogs.get(dest)
+        if cat is None:
+            cat = load_catalog(dest, self.locales_dir) if self.locales_dir else {}
+            self._catalogs[dest] = cat
+        return cat
+
+    def lookup(self, texto: str, dest: str) -> Optional[str]:
+        """Traducción ya conocida (catálogo, memoria o disco) o ``None``; sin red."""
+        hit = self.catalog(dest).get(texto)
+        if hit is not None:
+            return hit
+        with self._lock:
+            hit = self._memo.get((dest, texto))
+        if hit is None and self.store is not None:
+            hit = self.store.get(texto, dest)
+            if hit is not None:
+                with self._lock:
+                    self._memo[(dest, texto)] = hit
+        return hit
+
+    def _store(self, pares: Iterable[Tuple[str, str]], dest: str) -> None:
+        pares = list(pares)
+        with self._lock:
+            for texto, traducido in pares:
+                self._memo[(dest, texto)] = traducido
+        if self.store is not None:
+            self.store.set_many(pares, dest)
+
+    def translate(self, texto: str, dest: str) -> str:
+        """Traducción de un texto (de memoria si ya se pidió antes)."""
+        if dest == "es" or not texto:
+            return texto or ""
+        texto = str(texto)
+        hit = self.lookup(texto, dest)
+        if hit is not None:
+            return hit
+        return self.translate_many([texto], dest)[0]
+
+    def translate_many(self, textos: Iterable[str], dest: str) -> List[str]:
+        """Traduce una lista conservando el orden; los pendientes van por lotes."""
+        textos = [str(t) if t else "" for t in textos]
+        if dest == "es":
+            return textos
+        self.prefetch(textos, dest)
+        return [self.lookup(t, dest) or t for t in textos]
+
+    # -- Relleno por lotes ---------------------------------------------------
+    def prefetch(self, textos: Iterable[str], dest: str) -> None:
+        """Traduce de una vez todos los textos aún no memorizados."""
+        if dest == "es":
+            return
+        pendientes = list(dict.fromkeys(
+            str(t) for t in textos if t and self.lookup(str(t), dest) is None
+        ))
+        if not pendientes:
+            return
+        bloques = _chunks(pendientes, self.max_chars)
+        futuros = [self._executor.submit(self._translate_block, b, dest) for b in bloques]
+        sueltos: List[str] = []
+        for bloque, fut in zip(bloques, futuros):
+            pares = fut.result()
+            if pares is None:
+                sueltos.extend(bloque)
+            else:
+                self._store(pares, dest)
+        if sueltos:
+            resultados = self._executor.map(lambda t: self._translate_one(t, dest), sueltos)
+            self._store((p for p in resultados if p is not None), dest)
+
+    def _translate_block(self, bloque: List[str], dest: str) -> Optional[List[Tuple[str, str]]]:
+        """Un request para todo el bloque; ``None`` si no se puede separar."""
+        if len(bloque) == 1:
+            return None
+        if any(SEPARATOR.strip() in t for t in bloque):
+            return None
+        try:
+            piezas = self.backend(SEPARATOR.join(bloque), dest).split(SEPARATOR.strip())
+        except Exception:
+            logger.exception("Error traduciendo bloque; se traduce texto a texto")
+            return None
+        if len(piezas) != len(bloque):
+            return None
+        return list(zip(bloque, (p.strip() for p in piezas)))
+
+    def _translate_one(self, texto: str, dest: str) -> Optional[Tuple[str, str]]:
+        try:
+            return texto, self.backend(texto, dest)
+        except Exception:
+            logger.exception("Error traduciendo texto")
+            return None
+
+
+translator = Translator(store=TranslationStore.from_env())
+
+__all__ = [
+    "LOCALES_DIR",
+    "MAX_CHARS",
+    "SEPARATOR",
+    "TranslationStore",
+    "Translator",
+    "catalog_path",
+    "collect_literals",
+    "google_translate",
+    "load_catalog",
+    "translator",
+]
@@ -0,0 +1,30 @@
+"""Barra lateral con el desglose de tiempos del último análisis.
+Uso (ver metrics.py; en la app se activa con PARKINSON_METRICS_SIDEBAR=1):
+    render_metrics_sidebar(metrics, roots=("predict", "ia", "pdf.build_report_pdf"))
+"""
+import streamlit as st
+import pandas as pd
+from typing import Sequence
+
+
+def render_metrics_sidebar(metrics, roots: Sequence[str], title: str = "⏱️ Tiempos por etapa"):
+    with st.sidebar:
+        st.markdown(f"### {title}")
+        vacio = True
+        for nombre in roots:
+            run = metrics.last_run(nombre)
+            if run is None:
+                continue
+            vacio = False
+            extra = f" · pico {run.peak_bytes / 1024:.0f} KB" if run.peak_bytes is not None else ""
+            st.markdown(f"**{nombre}** — {run.duration * 1000:.1f} ms{extra}")
+            filas = run.breakdown()
+            if filas:
+                df = pd.DataFrame(filas).rename(columns={"stage": "etapa", "count": "n", "total_ms": "ms", "peak_kb": "pico KB"})
+                if df["pico KB"].isna().all():
+                    df = df.drop(columns="pico KB")
+                st.dataframe(df.round(2), hide_index=True, use_container_width=True)
+        if vacio:
+            st.caption("Aún no hay ningún análisis medido.")
+        with st.expander("Histórico (todas las etapas)"):
+            st.dataframe(pd.DataFrame(metrics.summary()).round(2), hide_index=True, use_container_width=True)